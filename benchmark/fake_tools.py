@@ -0,0 +1,456 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""Fake docker, kanto-cm, ctr, sudo and container-management executables.
+
+The benchmarks put wrappers named like the faked tools on PATH, which invoke
+this script with the name of the tool as first argument. The fakes keep
+their state as JSON files in the directory given by FAKE_STATE_DIR and
+record each call in its 'calls.jsonl'.
+
+Latencies are configured via FAKE_LATENCIES, a JSON object mapping a tool
+or a tool and its subcommand (e.g. "docker" or "docker run") to the time
+[in seconds] the call takes. For 'docker run' and container-management
+deployments it is the time until a container prints its start-pattern lines.
+"""
+
+import fcntl
+import json
+import os
+import re
+import signal
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from re import _parser as sre_parse  # type: ignore[attr-defined]
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# docker options which are followed by a value
+DOCKER_VALUE_OPTIONS = (
+    "--name",
+    "--label",
+    "-e",
+    "-p",
+    "-v",
+    "--network",
+    "-f",
+    "--filter",
+    "--format",
+    "--time",
+    "-t",
+    "--since",
+)
+
+FAKE_TOOLS = ("docker", "kanto-cm", "ctr", "container-management")
+
+
+def get_state_dir() -> Path:
+    return Path(os.environ["FAKE_STATE_DIR"])
+
+
+def get_latency(tool: str, command: str) -> float:
+    latencies: Dict[str, float] = json.loads(os.getenv("FAKE_LATENCIES", "{}"))
+    return float(latencies.get(f"{tool} {command}", latencies.get(tool, 0.0)))
+
+
+def get_kanto_socket() -> Path:
+    return Path(os.environ["FAKE_KANTO_SOCKET"])
+
+
+@contextmanager
+def locked_state(kind: str) -> Iterator[Dict[str, Any]]:
+    """Provide the state of the given kind for modification, exclusively."""
+    state_dir = get_state_dir()
+    state_dir.mkdir(parents=True, exist_ok=True)
+    with open(state_dir / ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        path = state_dir / f"{kind}.json"
+        state = json.loads(path.read_text()) if path.exists() else {}
+        yield state
+        path.write_text(json.dumps(state))
+
+
+def record_call(tool: str, command: str, args: List[str], start: float) -> None:
+    call = {
+        "tool": tool,
+        "command": command,
+        "args": args,
+        "start": start,
+        "end": time.time(),
+    }
+    with open(get_state_dir() / "calls.jsonl", "a", encoding="utf-8") as calls:
+        calls.write(json.dumps(call) + "\n")
+
+
+def generate_match(pattern: str) -> str:
+    """Return a string matched by the regular expression."""
+
+    def generate(parsed) -> str:
+        text = ""
+        for op, value in parsed:
+            name = str(op)
+            if name == "LITERAL":
+                text += chr(value)
+            elif name == "ANY":
+                text += "x"
+            elif name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+                min_count, _, item = value
+                text += generate(item) * min_count
+            elif name == "SUBPATTERN":
+                text += generate(value[-1])
+            elif name == "BRANCH":
+                text += generate(value[1][0])
+            elif name == "IN":
+                text += generate_in(value)
+            elif name == "CATEGORY":
+                text += generate_category(str(value))
+        return text
+
+    def generate_in(items) -> str:
+        for op, value in items:
+            name = str(op)
+            if name == "LITERAL":
+                return chr(value)
+            if name == "RANGE":
+                return chr(value[0])
+            if name == "CATEGORY":
+                return generate_category(str(value))
+        return "x"
+
+    def generate_category(category: str) -> str:
+        if "DIGIT" in category:
+            return "0"
+        if "SPACE" in category:
+            return " "
+        return "x"
+
+    return generate(sre_parse.parse(pattern))
+
+
+def get_start_lines(service_id: str) -> List[str]:
+    """Return output lines matching the start patterns of the service
+    declared in the runtime.json in use."""
+    runtime_file = Path(os.getenv("runtimeFilePath", "runtime.json"))
+    if not runtime_file.is_absolute():
+        runtime_file = Path(os.getenv("VELOCITAS_WORKSPACE_DIR", ".")) / runtime_file
+    if not runtime_file.exists():
+        return []
+    for spec in json.loads(runtime_file.read_text()):
+        if spec["id"] == service_id:
+            return [
+                generate_match(entry["value"]).rstrip("\n")
+                for entry in spec.get("config", [])
+                if entry["key"] == "start-pattern"
+            ]
+    return []
+
+
+def wait_for_termination(on_exit) -> None:
+    """Block until the process receives SIGTERM, SIGINT or SIGHUP."""
+
+    def handle(_signum, _frame):
+        on_exit()
+        sys.exit(0)
+
+    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(signum, handle)
+    while True:
+        signal.pause()
+
+
+def parse_docker_args(
+    args: List[str], interspersed: bool = True
+) -> Tuple[Dict[str, List[str]], List[str]]:
+    """Split the arguments of a docker command into its options and positional
+    arguments. Unless interspersed, options end at the first positional
+    argument, e.g. at the image of 'docker run'."""
+    options: Dict[str, List[str]] = {}
+    positional: List[str] = []
+    index = 0
+    while index < len(args):
+        arg = args[index]
+        is_option = arg.startswith("-") and (interspersed or not positional)
+        if is_option and arg in DOCKER_VALUE_OPTIONS:
+            options.setdefault(arg, []).append(args[index + 1])
+            index += 2
+            continue
+        if is_option:
+            options.setdefault(arg, [])
+        else:
+            positional.append(arg)
+        index += 1
+    return options, positional
+
+
+def docker(command: str, args: List[str]) -> int:
+    options, positional = parse_docker_args(args, interspersed=command != "run")
+
+    if command == "run":
+        name = options.get("--name", [uuid.uuid4().hex[:12]])[0]
+        labels = dict(label.split("=", 1) for label in options.get("--label", []))
+        with locked_state("docker") as containers:
+            if name in containers:
+                print(f"Conflict. The container name {name!r} is already in use")
+                return 125
+            containers[name] = {
+                "id": uuid.uuid4().hex,
+                "image": positional[0],
+                "labels": labels,
+                "pid": None if "-d" in options else os.getpid(),
+                "remove": "--rm" in options,
+            }
+        if "-d" in options:
+            print(containers[name]["id"])
+            return 0
+
+        for line in get_start_lines(name):
+            print(line, flush=True)
+
+        def remove():
+            with locked_state("docker") as containers:
+                containers.pop(name, None)
+
+        wait_for_termination(remove)
+
+    if command in ("stop", "kill", "rm"):
+        names = positional
+        code = 0
+        with locked_state("docker") as containers:
+            for name in names:
+                container = containers.get(name)
+                if container is None:
+                    print(
+                        f"Error response from daemon: No such container: {name}",
+                        file=sys.stderr,
+                    )
+                    code = 1
+                    continue
+                if container["pid"] is not None:
+                    try:
+                        os.kill(
+                            container["pid"],
+                            signal.SIGKILL if command == "kill" else signal.SIGTERM,
+                        )
+                    except ProcessLookupError:
+                        pass
+                if container["remove"] or command == "rm" or container["pid"]:
+                    del containers[name]
+                else:
+                    container["stopped"] = True
+                print(name)
+        return code
+
+    if command == "start":
+        with locked_state("docker") as containers:
+            for name in positional:
+                containers.get(name, {}).pop("stopped", None)
+        return 0
+
+    if command == "ps":
+        with locked_state("docker") as containers:
+            names = [
+                name
+                for name, container in containers.items()
+                if "-a" in options or not container.get("stopped")
+            ]
+        for filter in options.get("-f", []) + options.get("--filter", []):
+            key, _, value = filter.partition("=")
+            if key == "name":
+                names = [name for name in names if value in name]
+        for name in names:
+            print(name if "-q" not in options else containers[name]["id"][:12])
+        return 0
+
+    if command == "container" and positional[:1] == ["inspect"]:
+        with locked_state("docker") as containers:
+            container = containers.get(positional[1])
+        if container is None:
+            print(f"Error: No such container: {positional[1]}", file=sys.stderr)
+            return 1
+        running = not container.get("stopped")
+        if "-f" in options:
+            print(f"'{str(running).lower()}'")
+            return 0
+        inspect_result = {
+            "Id": container["id"],
+            "Image": f"sha256:{container['image']}",
+            "State": {"Running": running},
+            "Config": {"Labels": container["labels"]},
+        }
+        print(json.dumps([inspect_result]))
+        return 0
+
+    if command == "image" and positional[:1] == ["inspect"]:
+        print(f"sha256:{positional[-1]}")
+        return 0
+
+    if command == "images":
+        print(positional[0] if positional else "")
+        return 0
+
+    if command == "logs":
+        name = positional[0]
+        while True:
+            with locked_state("docker") as containers:
+                if name not in containers:
+                    return 0
+            time.sleep(0.1)
+
+    if command == "save":
+        sys.stdout.buffer.write(b"fake image archive\n")
+        return 0
+
+    # pull, push, build, ...
+    return 0
+
+
+def kanto_cm(command: str, args: List[str]) -> int:
+    names = [args[args.index("-n") + 1]] if "-n" in args else []
+
+    if command == "sysinfo":
+        return 0 if get_kanto_socket().exists() else 1
+
+    with locked_state("kanto") as containers:
+        if command == "get":
+            if not names or names[0] not in containers:
+                return 1
+            status = containers[names[0]]["state"]
+            print(
+                json.dumps(
+                    {"state": {"status": status, "running": status == "Running"}}
+                )
+            )
+            return 0
+        if command == "remove":
+            if names and names[0] in containers:
+                del containers[names[0]]
+                return 0
+            print(f"Error: container {names} not found", file=sys.stderr)
+            return 1
+        if command == "create":
+            containers[names[0]] = {"image": args[-1], "state": "Created"}
+            print(uuid.uuid4().hex)
+            return 0
+        if command == "start":
+            containers[names[0]]["state"] = "Running"
+            return 0
+        if command == "stop":
+            containers[names[0]]["state"] = "Stopped"
+            return 0
+        if command == "list":
+            print("ID  |Name  |Image  |Status")
+            for name, container in containers.items():
+                print(f"{name}  |{name}  |{container['image']}  |{container['state']}")
+            return 0
+    return 0
+
+
+def ctr(args: List[str]) -> int:
+    # skip global options, e.g. '-a <address> -n <namespace>'
+    while args and args[0] in ("-a", "-n", "--address", "--namespace"):
+        args = args[2:]
+    command = args[:2]
+    with locked_state("ctr") as state:
+        images: List[str] = state.setdefault("images", [])
+        if command in (["i", "ls"], ["images", "ls"]):
+            for image in images:
+                print(image)
+        elif command in (["i", "rm"], ["images", "rm"]):
+            state["images"] = [image for image in images if image not in args[2:]]
+        elif command in (["i", "import"], ["images", "import"]):
+            sys.stdin.buffer.read()
+            name = os.getenv(
+                "FAKE_CTR_IMPORT_NAME", "docker.io/library/imported:latest"
+            )
+            if name not in images:
+                images.append(name)
+    return 0
+
+
+def container_management(args: List[str]) -> int:
+    deployment_dir = Path(args[args.index("--deployment-ctr-dir") + 1])
+    socket_path = get_kanto_socket()
+    with locked_state("kanto") as containers:
+        for descriptor in sorted(deployment_dir.glob("*.json")):
+            deployment = json.loads(descriptor.read_text())
+            containers[deployment["container_name"]] = {
+                "image": deployment["image"]["name"],
+                "state": "Running",
+            }
+    with locked_state("container-management") as state:
+        state["pid"] = os.getpid()
+
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    socket_path.touch()
+
+    def remove_socket():
+        socket_path.unlink(missing_ok=True)
+
+    wait_for_termination(remove_socket)
+    return 0
+
+
+def sudo(args: List[str]) -> int:
+    tool = args[0]
+    if tool in FAKE_TOOLS:
+        return main([tool, *args[1:]])
+    if tool == "pkill" and args[-1] == "container-management":
+        with locked_state("container-management") as state:
+            pid: Optional[int] = state.pop("pid", None)
+        if pid is None:
+            return 1
+        try:
+            os.kill(pid, signal.SIGHUP)
+        except ProcessLookupError:
+            return 1
+        return 0
+    # e.g. chmod of the Kanto socket: nothing to do for the fakes
+    return 0
+
+
+def main(argv: List[str]) -> int:
+    tool, args = argv[0], argv[1:]
+    if tool == "sudo":
+        return sudo(args)
+
+    command = next((arg for arg in args if not arg.startswith("-")), "")
+    if tool == "ctr":
+        command = " ".join(arg for arg in args if re.fullmatch(r"[a-z]+", arg))
+    start = time.time()
+    time.sleep(get_latency(tool, command.split(" ")[0]))
+    try:
+        if tool == "docker":
+            # the latency of run and container-management is their startup time,
+            # so the call gets recorded before blocking until termination
+            if command == "run":
+                record_call(tool, command, args, start)
+            return docker(command, args[args.index(command) + 1 :])
+        if tool == "kanto-cm":
+            return kanto_cm(command, args[args.index(command) + 1 :])
+        if tool == "ctr":
+            return ctr(args)
+        if tool == "container-management":
+            record_call(tool, command, args, start)
+            return container_management(args)
+        print(f"Unsupported fake tool {tool!r}", file=sys.stderr)
+        return 127
+    finally:
+        if tool != "container-management" and command != "run":
+            record_call(tool, command, args, start)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
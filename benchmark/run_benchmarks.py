@@ -0,0 +1,457 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""Benchmarks of the runtime lifecycle commands against fake container tools.
+
+Runs the lifecycle commands of runtime_local and runtime_kanto end-to-end
+with fake docker, kanto-cm, ctr, sudo and container-management executables
+on PATH (see fake_tools.py) for runtimes of different sizes and writes the
+results as JSON, optionally comparing them to the results of another run.
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from queue import Empty, Queue
+from threading import Thread
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+FAKE_TOOLS_SCRIPT = Path(__file__).resolve().parent / "fake_tools.py"
+FAKE_TOOLS = ("docker", "kanto-cm", "ctr", "sudo", "container-management")
+KANTO_SOCKET_PATH = "/run/container-management/container-management.sock"
+
+DEFAULT_SERVICE_COUNTS = [1, 5, 50]
+DEFAULT_LATENCIES = {"docker run": 0.1, "container-management": 0.2}
+COMMAND_TIMEOUT_SEC = 300
+
+LOCAL_UP_READY = re.compile(r"Runtime is ready to use!")
+RUN_SERVICE_READY = re.compile(r"✅.*Starting service")
+APP_NAME = "benchmarkapp"
+
+
+class Measurement(NamedTuple):
+    wall_sec: float
+    calls: List[Dict[str, Any]]
+
+
+class Sandbox:
+    """An isolated package, workspace and fake tool state for one runtime size."""
+
+    def __init__(self, root: Path, service_count: int, latencies: Dict[str, float]):
+        self.root = root
+        self.service_count = service_count
+        self.package_dir = root / "package"
+        self.workspace_dir = root / "workspace"
+        self.state_dir = root / "state"
+        bin_dir = root / "bin"
+
+        # run copies, so no state is left in the repository
+        for package in ("runtime_local", "runtime_kanto"):
+            shutil.copytree(
+                REPO_DIR / package,
+                self.package_dir / package,
+                ignore=shutil.ignore_patterns("test", "__pycache__"),
+            )
+        self.kanto_socket = root / "kanto" / "container-management.sock"
+        self._redirect_kanto_socket()
+        self.workspace_dir.mkdir()
+        (self.workspace_dir / "vss.json").write_text("{}\n")
+        runtime = create_runtime(service_count)
+        (self.workspace_dir / "runtime.json").write_text(json.dumps(runtime, indent=4))
+        shutil.copy(REPO_DIR / "runtime.json", self.package_dir / "runtime.json")
+
+        bin_dir.mkdir()
+        for tool in FAKE_TOOLS:
+            wrapper = bin_dir / tool
+            wrapper.write_text(
+                f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_TOOLS_SCRIPT}" {tool} "$@"\n'
+            )
+            wrapper.chmod(0o755)
+
+        images = {
+            "mqttBrokerImage": "fake/mosquitto:1.0",
+            "vehicleDatabrokerImage": "fake/databroker:1.0",
+            "seatServiceImage": "fake/seatservice:1.0",
+            "feederCanImage": "fake/feedercan:1.0",
+            "mockServiceImage": "fake/mockservice:1.0",
+        }
+        self.env = {
+            **os.environ,
+            **images,
+            "PATH": f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+            "PYTHONUNBUFFERED": "1",
+            "FAKE_STATE_DIR": str(self.state_dir),
+            "FAKE_LATENCIES": json.dumps(latencies),
+            "FAKE_KANTO_SOCKET": str(self.kanto_socket),
+            "VELOCITAS_WORKSPACE_DIR": str(self.workspace_dir),
+            "VELOCITAS_PACKAGE_DIR": str(self.package_dir),
+            "VELOCITAS_CACHE_DATA": json.dumps(
+                {"vspec_file_path": str(self.workspace_dir / "vss.json")}
+            ),
+            "VELOCITAS_APP_MANIFEST": json.dumps({"name": APP_NAME}),
+            "runtimeFilePath": str(self.workspace_dir / "runtime.json"),
+            "mockFilePath": "mock.py",
+            "containerBackend": "cli",
+        }
+
+    def _redirect_kanto_socket(self) -> None:
+        """Make the copy of the Kanto runtime use the socket of the fake
+        container management within the sandbox."""
+        runtime_module = self.package_dir.joinpath(
+            "runtime_kanto", "src", "runtime", "runtime.py"
+        )
+        source = runtime_module.read_text(encoding="utf-8")
+        if KANTO_SOCKET_PATH not in source:
+            raise RuntimeError(f"{KANTO_SOCKET_PATH} not found in {runtime_module}")
+        runtime_module.write_text(
+            source.replace(KANTO_SOCKET_PATH, str(self.kanto_socket)), encoding="utf-8"
+        )
+
+    def reset(self) -> None:
+        """Remove the state of the fake tools."""
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+        self.state_dir.mkdir()
+
+    def script(self, package: str, *path: str) -> List[str]:
+        return [sys.executable, str(self.package_dir.joinpath(package, "src", *path))]
+
+    def read_calls(self) -> List[Dict[str, Any]]:
+        calls_file = self.state_dir / "calls.jsonl"
+        if not calls_file.exists():
+            return []
+        with open(calls_file, encoding="utf-8") as calls:
+            return [json.loads(line) for line in calls if line.strip()]
+
+    def clear_calls(self) -> None:
+        (self.state_dir / "calls.jsonl").unlink(missing_ok=True)
+
+
+def create_runtime(service_count: int) -> List[Dict[str, Any]]:
+    """Create a runtime.json with the given number of services.
+
+    The first two services are the MQTT broker and the databroker the
+    vehicle app deployment refers to, all others depend on the first one.
+    """
+    service_ids = ["mqtt-broker", "vehicledatabroker"] + [
+        f"service-{index}" for index in range(2, service_count)
+    ]
+    runtime = []
+    for index, service_id in enumerate(service_ids[:service_count]):
+        config = [
+            {"key": "image", "value": f"fake/{service_id}:1.0"},
+            {"key": "port", "value": str(20000 + index)},
+            {"key": "env", "value": "LOG_LEVEL=info"},
+            {
+                "key": "start-pattern",
+                "value": f".*{service_id} listening on \\d+\\.\\d+\\.\\d+\\.\\d+:\\d+",
+            },
+        ]
+        if index > 0:
+            config.append({"key": "depends-on", "value": service_ids[0]})
+        runtime.append({"id": service_id, "interfaces": [], "config": config})
+    return runtime
+
+
+class RunningCommand:
+    """A spawned lifecycle command whose output is read line by line."""
+
+    def __init__(self, args: List[str], sandbox: Sandbox):
+        self.start = time.monotonic()
+        self.output: List[str] = []
+        self._lines: Queue = Queue()
+        self.process = subprocess.Popen(
+            args,
+            env=sandbox.env,
+            cwd=sandbox.workspace_dir,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+        Thread(target=self._read_output, daemon=True).start()
+
+    def _read_output(self) -> None:
+        assert self.process.stdout is not None
+        for line in self.process.stdout:
+            self._lines.put(line)
+        self._lines.put(None)
+
+    def wait_for_output(self, pattern: re.Pattern) -> float:
+        """Wait for an output line matching the pattern and return the time
+        elapsed since the start of the command."""
+        deadline = self.start + COMMAND_TIMEOUT_SEC
+        while True:
+            try:
+                line = self._lines.get(timeout=max(deadline - time.monotonic(), 0))
+            except Empty:
+                raise self.error(f"no output matching {pattern.pattern!r}")
+            if line is None:
+                raise self.error(f"exited before output matching {pattern.pattern!r}")
+            self.output.append(line)
+            if pattern.search(line):
+                return time.monotonic() - self.start
+
+    def wait(self) -> float:
+        """Wait for the command to exit and return the time elapsed since
+        its start."""
+        try:
+            self.process.wait(
+                max(self.start + COMMAND_TIMEOUT_SEC - time.monotonic(), 0)
+            )
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            raise self.error("timed out")
+        elapsed = time.monotonic() - self.start
+        while True:
+            line = self._lines.get()
+            if line is None:
+                break
+            self.output.append(line)
+        return elapsed
+
+    def terminate(self) -> float:
+        """Send SIGTERM and return the time it took the command to exit."""
+        start = time.monotonic()
+        self.process.send_signal(signal.SIGTERM)
+        self.wait()
+        return time.monotonic() - start
+
+    def error(self, message: str) -> RuntimeError:
+        self.process.kill()
+        tail = "".join(self.output[-20:])
+        return RuntimeError(f"{' '.join(self.process.args)}: {message}\n{tail}")
+
+
+def measure(sandbox: Sandbox, run: Callable[[], float]) -> Measurement:
+    sandbox.clear_calls()
+    wall_sec = run()
+    return Measurement(wall_sec, sandbox.read_calls())
+
+
+def run_to_completion(sandbox: Sandbox, args: List[str]) -> float:
+    command = RunningCommand(args, sandbox)
+    elapsed = command.wait()
+    if command.process.returncode != 0:
+        raise command.error(f"failed with {command.process.returncode}")
+    return elapsed
+
+
+def benchmark_lifecycle(sandbox: Sandbox) -> Dict[str, Measurement]:
+    """Run all lifecycle commands once, starting from a clean state."""
+    sandbox.reset()
+    measurements: Dict[str, Measurement] = {}
+    local_up = sandbox.script("runtime_local", "runtime-up.py")
+
+    up: Optional[RunningCommand] = None
+
+    def start_local_up(*args: str) -> float:
+        nonlocal up
+        up = RunningCommand(local_up + list(args), sandbox)
+        return up.wait_for_output(LOCAL_UP_READY)
+
+    measurements["local up"] = measure(sandbox, start_local_up)
+    assert up is not None
+    measurements["local up shutdown"] = measure(sandbox, up.terminate)
+
+    run_service: Optional[RunningCommand] = None
+
+    def start_run_service() -> float:
+        nonlocal run_service
+        run_service = RunningCommand(
+            sandbox.script("runtime_local", "run_service.py") + ["mqtt-broker"],
+            sandbox,
+        )
+        return run_service.wait_for_output(RUN_SERVICE_READY)
+
+    measurements["local run-service"] = measure(sandbox, start_run_service)
+    assert run_service is not None
+    run_service.terminate()
+
+    # keep the services running to have something to stop
+    start_local_up("--keep-alive")
+    assert up is not None
+    up.terminate()
+    measurements["local down"] = measure(
+        sandbox,
+        lambda: run_to_completion(
+            sandbox, sandbox.script("runtime_local", "runtime-down.py")
+        ),
+    )
+
+    measurements["kanto up"] = measure(
+        sandbox,
+        lambda: run_to_completion(
+            sandbox, sandbox.script("runtime_kanto", "runtime", "runtime_up.py")
+        ),
+    )
+    if sandbox.service_count >= 2:
+        measurements["kanto deploy-vehicleapp"] = measure(
+            sandbox,
+            lambda: run_to_completion(
+                sandbox,
+                sandbox.script(
+                    "runtime_kanto", "app_deployment", "deploy_vehicleapp.py"
+                ),
+            ),
+        )
+    measurements["kanto down"] = measure(
+        sandbox,
+        lambda: run_to_completion(
+            sandbox, sandbox.script("runtime_kanto", "runtime", "runtime_down.py")
+        ),
+    )
+    return measurements
+
+
+def summarize(
+    command: str, service_count: int, measurements: List[Measurement]
+) -> Dict[str, Any]:
+    walls = [measurement.wall_sec for measurement in measurements]
+    calls = measurements[0].calls
+    calls_by_command: Dict[str, int] = {}
+    for call in calls:
+        key = f"{call['tool']} {call['command']}".strip()
+        calls_by_command[key] = calls_by_command.get(key, 0) + 1
+    median = statistics.median(walls)
+    return {
+        "command": command,
+        "services": service_count,
+        "wall_sec": {"median": median, "min": min(walls), "max": max(walls)},
+        "calls": len(calls),
+        "calls_by_command": dict(sorted(calls_by_command.items())),
+        "per_call_sec": median / len(calls) if calls else None,
+    }
+
+
+def get_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_DIR,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Return a table comparing the median wall times to the baseline."""
+    baseline_medians = {
+        (result["command"], result["services"]): result["wall_sec"]["median"]
+        for result in baseline["results"]
+    }
+    lines = [
+        f"{'command':<26}{'services':>9}{'baseline':>11}{'current':>11}{'delta':>9}"
+    ]
+    for result in results["results"]:
+        key = (result["command"], result["services"])
+        current = result["wall_sec"]["median"]
+        if key not in baseline_medians:
+            lines.append(f"{key[0]:<26}{key[1]:>9}{'-':>11}{current:>10.3f}s{'-':>9}")
+            continue
+        before = baseline_medians[key]
+        delta = (current - before) / before * 100 if before else 0.0
+        lines.append(
+            f"{key[0]:<26}{key[1]:>9}{before:>10.3f}s{current:>10.3f}s{delta:>8.1f}%"
+        )
+    return lines
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--services",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SERVICE_COUNTS,
+        help="Numbers of services of the benchmarked runtimes.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Repetitions of each benchmark."
+    )
+    parser.add_argument(
+        "--latencies",
+        type=json.loads,
+        default=DEFAULT_LATENCIES,
+        help="JSON object mapping fake tools or tool subcommands to their latency "
+        f"in seconds, default: {json.dumps(DEFAULT_LATENCIES)}",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("benchmark-results.json"),
+        help="File to write the results to.",
+    )
+    parser.add_argument(
+        "--compare",
+        type=Path,
+        metavar="BASELINE",
+        help="Results of a previous run to compare with.",
+    )
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {
+        "metadata": {
+            "commit": get_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "latencies": args.latencies,
+        },
+        "results": [],
+    }
+    for service_count in args.services:
+        with tempfile.TemporaryDirectory(prefix="runtime-benchmark-") as root:
+            sandbox = Sandbox(Path(root), service_count, args.latencies)
+            runs: Dict[str, List[Measurement]] = {}
+            for repetition in range(args.repeat):
+                print(
+                    f"{service_count} service(s), run {repetition + 1}/{args.repeat}",
+                    flush=True,
+                )
+                for command, measurement in benchmark_lifecycle(sandbox).items():
+                    runs.setdefault(command, []).append(measurement)
+            for command, measurements in runs.items():
+                result = summarize(command, service_count, measurements)
+                results["results"].append(result)
+                print(
+                    f"  {command:<26}{result['wall_sec']['median']:>8.3f}s "
+                    f"{result['calls']:>5} calls"
+                )
+
+    args.output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"Results written to {args.output}")
+    if args.compare:
+        print("\n".join(compare(results, json.loads(args.compare.read_text()))))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
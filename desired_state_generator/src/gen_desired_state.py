@@ -21,7 +21,6 @@ import tempfile
 from typing import Any, Dict, List, Optional
 
 import velocitas_lib
-import velocitas_lib.services
 
 from velocitas_lib import get_workspace_dir
 
@@ -74,8 +73,7 @@ def parse_vehicle_signal_interface(config: Dict[str, Any]) -> List[str]:
 
     requirements.append(f"{DATABROKER_ID}:v1")
 
-    datapoints = config["datapoints"]["required"]
-    for datapoint in datapoints:
+    for datapoint in get_required_datapoints(config):
         path = str(datapoint["path"]).lower().replace(".", "-")
         access = datapoint["access"]
         requirements.append(f"vss-{access}-{path}:{version}")
@@ -83,6 +81,19 @@ def parse_vehicle_signal_interface(config: Dict[str, Any]) -> List[str]:
     return requirements
 
 
+def get_required_datapoints(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Return the datapoints required by the vehicle signal interface config.
+
+    Args:
+        config (Dict[str, Any]): The json-config of the interface,
+        as defined in the appManifest.json.
+
+    Returns:
+        List[Dict[str, Any]]: The required datapoints with their path and access.
+    """
+    return list(config["datapoints"]["required"])
+
+
 def parse_grpc_interface(config: Dict[str, Any]) -> str:
     """Parse the grpc interface config.
 
@@ -12,9 +12,14 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 
+import os
+import sys
+
 from velocitas_lib import create_log_file
 from velocitas_lib.docker import build_vehicleapp_image
-from yaspin import yaspin
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "runtime"))
+from spinner import create_spinner  # noqa: E402
 
 
 def build_vehicleapp():
@@ -22,7 +27,7 @@ def build_vehicleapp():
 
     print("Hint: Log files can be found in your workspace's logs directory")
     log_output = create_log_file("build-vapp", "runtime_kanto")
-    with yaspin(text="Building VehicleApp...", color="cyan") as spinner:
+    with create_spinner("Building VehicleApp...") as spinner:
         try:
             status = "> Building VehicleApp image"
             spinner.write(status)
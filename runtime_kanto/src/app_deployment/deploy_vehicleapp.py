@@ -12,132 +12,34 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 
+import argparse
 import os
 import subprocess
 import sys
 from io import TextIOWrapper
+from typing import Set
 
+from image_digests import get_app_image, get_local_image_id, get_registry_digests
 from velocitas_lib import create_log_file, get_app_manifest
 from velocitas_lib.docker import (
     is_docker_image_build_locally,
     push_docker_image_to_registry,
 )
 from velocitas_lib.services import get_service_port
-from yaspin import yaspin
 
-sys.path.append(os.path.join(os.path.dirname(__file__), "..", "app_deployment"))
-from build_vehicleapp import build_vehicleapp  # noqa: E402
-
-
-def is_vehicleapp_in_kanto(app_name: str, log_output: TextIOWrapper) -> bool:
-    """Return whether the vehicleapp image is already in Kanto or not.
-
-    Args:
-        app_name (str): App name
-        log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
-    """
-    return (
-        subprocess.call(
-            ["kanto-cm", "get", "-n", app_name],
-            stdout=log_output,
-            stderr=log_output,
-        )
-        == 0
-    )
-
-
-def is_vehicleapp_in_containerd(app_name: str, log_output: TextIOWrapper) -> bool:
-    """Return whether the vehicleapp image is already in containerd or not.
-
-    Args:
-        app_name (str): App name
-        log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
-    """
-    images = str(
-        subprocess.check_output(
-            [
-                "sudo",
-                "ctr",
-                "-a",
-                "/run/docker/containerd/containerd.sock",
-                "-n",
-                "kanto-cm",
-                "i",
-                "ls",
-                "-q",
-            ],
-            stderr=log_output,
-        ),
-        "utf-8",
-    )
-    return app_name in images
-
-
-def is_vehicleapp_installed(app_name: str, log_output: TextIOWrapper) -> bool:
-    """Return whether the vehicleapp is already installed or not.
-
-    Args:
-        app_name (str): App name
-        log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
-    """
-    return is_vehicleapp_in_containerd(app_name, log_output) or is_vehicleapp_in_kanto(
-        app_name, log_output
-    )
-
-
-def remove_vehicleapp(app_name: str, log_output: TextIOWrapper):
-    """Uninstall VehicleApp container
-
-    Args:
-        app_name (str): App name to remove container for
-        log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
-    """
-    if is_vehicleapp_in_kanto(app_name, log_output):
-        log_output.write(f"Removing {app_name} container from Kanto\n")
-        subprocess.call(
-            ["kanto-cm", "remove", "-f", "-n", app_name],
-            stdout=log_output,
-            stderr=log_output,
-        )
-
-    if is_vehicleapp_in_containerd(app_name, log_output):
-        log_output.write(f"Removing {app_name} container from containerd\n")
-        ps = subprocess.Popen(
-            (
-                "sudo",
-                "ctr",
-                "-a",
-                "/run/docker/containerd/containerd.sock",
-                "-n",
-                "kanto-cm",
-                "i",
-                "ls",
-                "-q",
-            ),
-            stdout=subprocess.PIPE,
-        )
-        app_id = str(
-            subprocess.check_output(
-                ["grep", app_name], stdin=ps.stdout, stderr=log_output
-            ),
-            "utf-8",
-        )
-        ps.wait()
-        subprocess.call(
-            [
-                "sudo",
-                "ctr",
-                "-a",
-                "/run/docker/containerd/containerd.sock",
-                "-n",
-                "kanto-cm",
-                "i",
-                "rm",
-                app_id.strip(),
-            ],
-            stdout=log_output,
-            stderr=log_output,
-        )
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "runtime"))
+from container_readiness import is_container_running  # noqa: E402
+from spinner import Spinner, create_spinner  # noqa: E402
+from vehicleapp_container import (  # noqa: E402
+    get_imported_image_id,
+    get_vehicleapp_image_digest,
+    import_vehicleapp_image,
+    is_image_import_enabled,
+    is_vehicleapp_in_kanto,
+    is_vehicleapp_installed,
+    remove_vehicleapp,
+    remove_vehicleapp_container,
+)
 
 
 def create_container(app_name: str, log_output: TextIOWrapper):
@@ -199,28 +101,126 @@ def start_container(app_name: str, log_output: TextIOWrapper):
     )
 
 
-def deploy_vehicleapp():
+def is_vehicleapp_current(
+    app_name: str, registry_digests: Set[str], log_output: TextIOWrapper
+) -> bool:
+    """Return whether the VehicleApp container runs the image of the registry.
+
+    Args:
+        app_name (str): App name of the container
+        registry_digests (Set[str]): Digests of the image in the registry
+        log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
+    """
+    if not registry_digests or not is_container_running(app_name, log_output):
+        return False
+    image_digest = get_vehicleapp_image_digest(get_app_image(app_name), log_output)
+    return image_digest in registry_digests
+
+
+def push_vehicleapp_image(
+    app_name: str, force: bool, spinner: Spinner, log_output: TextIOWrapper
+) -> bool:
+    """Push the VehicleApp image to the local registry, unless the registry
+    already has it.
+
+    Args:
+        app_name (str): App name of the image
+        force (bool): Push in any case.
+        spinner (Spinner): The progress spinner to update.
+        log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
+
+    Returns:
+        bool: True if the running container already uses the image.
+    """
+    status = f"> Pushing {app_name} docker image to registry..."
+    image_id = get_local_image_id(app_name, log_output)
+    registry_digests = get_registry_digests(app_name)
+    if force or image_id is None or image_id not in registry_digests:
+        push_docker_image_to_registry(app_name, log_output)
+        registry_digests = get_registry_digests(app_name)
+        spinner.write(f"{status} done!")
+    else:
+        spinner.write(f"{status} skipped, image is up to date.")
+    return not force and is_vehicleapp_current(app_name, registry_digests, log_output)
+
+
+def import_vehicleapp_image_into_kanto(
+    app_name: str, force: bool, spinner: Spinner, log_output: TextIOWrapper
+) -> bool:
+    """Import the VehicleApp image into Kanto's containerd namespace, unless
+    it was already imported.
+
+    Args:
+        app_name (str): App name of the image
+        force (bool): Import in any case.
+        spinner (Spinner): The progress spinner to update.
+        log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
+
+    Returns:
+        bool: True if the running container already uses the image.
+    """
+    status = f"> Importing {app_name} docker image into containerd..."
+    image = get_app_image(app_name)
+    image_id = get_local_image_id(app_name, log_output)
+    if image_id is None:
+        raise RuntimeError(f"Cannot find the image {image}")
+    if not force and get_imported_image_id(image, log_output) == image_id:
+        spinner.write(f"{status} skipped, image is up to date.")
+        return is_container_running(app_name, log_output)
+
+    import_vehicleapp_image(image, image_id, log_output)
+    spinner.write(f"{status} done!")
+    return False
+
+
+def deploy_vehicleapp(force: bool = False):
     """Deploy VehicleApp docker image via kanto-cm
-    and display the progress using a given spinner."""
+    and display the progress using a given spinner.
+
+    The image is either pushed to the local registry, from which Kanto pulls
+    it, or imported into Kanto's containerd directly, if the
+    'appImageTransfer' variable is set to 'import'. Transferring the image
+    and recreating the container are skipped if the registry (respectively
+    containerd) and the running container already have the image.
+
+    Args:
+        force (bool): Transfer and recreate the container in any case.
+    """
 
     print("Hint: Log files can be found in your workspace's logs directory")
     log_output = create_log_file("deploy-vapp", "runtime_kanto")
-    with yaspin(text="Deploying VehicleApp...", color="cyan") as spinner:
+    with create_spinner("Deploying VehicleApp...") as spinner:
         try:
             app_name = get_app_manifest()["name"].lower()
 
             if not is_docker_image_build_locally(app_name):
                 spinner.write("Cannot find vehicle app image...")
                 spinner.stop()
+                # building is the exception, so it is only imported if needed
+                from build_vehicleapp import build_vehicleapp
+
                 build_vehicleapp()
 
             spinner.start()
-            push_docker_image_to_registry(app_name, log_output)
-            status = f"> Pushing {app_name} docker image to registry done!"
-            spinner.write(status)
+            is_import = is_image_import_enabled()
+            if is_import:
+                is_current = import_vehicleapp_image_into_kanto(
+                    app_name, force, spinner, log_output
+                )
+            else:
+                is_current = push_vehicleapp_image(app_name, force, spinner, log_output)
+            if is_current:
+                spinner.write(f"> Vehicleapp container for {app_name} is up to date.")
+                spinner.ok("✅")
+                return
 
             status = "> Removing old vehicleapp..."
-            if is_vehicleapp_installed(app_name, log_output):
+            # with imports, only the container is removed, so unpacking the
+            # next image reuses the snapshots of the layers both share
+            if is_import and is_vehicleapp_in_kanto(app_name, log_output):
+                remove_vehicleapp_container(app_name, log_output)
+                spinner.write(f"{status} done!")
+            elif not is_import and is_vehicleapp_installed(app_name, log_output):
                 remove_vehicleapp(app_name, log_output)
                 spinner.write(f"{status} done!")
             else:
@@ -236,4 +236,13 @@ def deploy_vehicleapp():
 
 
 if __name__ == "__main__":
-    deploy_vehicleapp()
+    parser = argparse.ArgumentParser(
+        description="Deploys the VehicleApp image via Kanto."
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Push the image and recreate the container even if up to date.",
+    )
+    args = parser.parse_args()
+    deploy_vehicleapp(args.force)
@@ -0,0 +1,77 @@
+# Copyright (c) 2023-2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Digests identifying the vehicleapp image locally and in the registry.
+
+The ID of a local image is the digest of its config (or, with the containerd
+image store of Docker, of its manifest). The registry identifies an image by
+the digest of its manifest, which refers to the config by its digest. So an
+image is current in the registry if its ID is one of these.
+"""
+
+import json
+import subprocess
+import urllib.request
+from io import TextIOWrapper
+from typing import Optional, Set
+
+APP_REGISTRY = "localhost:12345"
+APP_TAG = "local"
+MANIFEST_MEDIA_TYPES = [
+    "application/vnd.docker.distribution.manifest.v2+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+    "application/vnd.oci.image.manifest.v1+json",
+    "application/vnd.oci.image.index.v1+json",
+]
+REGISTRY_TIMEOUT_SEC = 5
+
+
+def get_app_image(app_name: str) -> str:
+    """Return the reference of the vehicleapp image in the registry."""
+    return f"{APP_REGISTRY}/{app_name}:{APP_TAG}"
+
+
+def get_local_image_id(app_name: str, log_output: TextIOWrapper) -> Optional[str]:
+    """Return the ID of the local vehicleapp image, None if there is none."""
+    result = subprocess.run(
+        ["docker", "image", "inspect", "--format", "{{.Id}}", get_app_image(app_name)],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=log_output,
+    )
+    image_id = result.stdout.decode("utf-8").strip()
+    return image_id if result.returncode == 0 and image_id else None
+
+
+def get_registry_digests(app_name: str) -> Set[str]:
+    """Return the digests of the manifest of the vehicleapp image in the
+    registry and of the config it refers to, an empty set if the registry
+    does not have the image or is not reachable."""
+    request = urllib.request.Request(
+        f"http://{APP_REGISTRY}/v2/{app_name}/manifests/{APP_TAG}",
+        headers={"Accept": ", ".join(MANIFEST_MEDIA_TYPES)},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=REGISTRY_TIMEOUT_SEC) as response:
+            manifest_digest = response.headers.get("Docker-Content-Digest")
+            manifest = json.load(response)
+    except (OSError, ValueError):
+        return set()
+
+    digests = {manifest_digest} if manifest_digest else set()
+    config = manifest.get("config") if isinstance(manifest, dict) else None
+    if isinstance(config, dict) and config.get("digest"):
+        digests.add(config["digest"])
+    return digests
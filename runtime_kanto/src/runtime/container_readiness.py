@@ -0,0 +1,161 @@
+# Copyright (c) 2023-2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Waits for the containers deployed by Kanto to run and to get ready.
+
+Kanto creates and starts the containers of its deployment descriptors in
+the background, possibly pulling their images first. The states of the
+containers are polled concurrently with an exponential backoff until all of
+them run. Optionally, the readiness probes the services declare in
+runtime.json are run afterwards.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import TextIOWrapper
+from threading import Event
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from velocitas_lib.services import Service
+
+# shared with the local runtime, which is part of the same package
+LOCAL_RUNTIME_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "..", "runtime_local", "src")
+)
+if LOCAL_RUNTIME_DIR not in sys.path:
+    sys.path.append(LOCAL_RUNTIME_DIR)
+
+INITIAL_POLL_DELAY_SEC = 0.05
+MAX_POLL_DELAY_SEC = 1.0
+
+
+class ContainerReadiness(NamedTuple):
+    service_id: str
+    # [in seconds] since waiting started, None if not reached in time
+    running_sec: Optional[float]
+    ready_sec: Optional[float]
+
+
+def get_container_state(
+    name: str, log_output: TextIOWrapper
+) -> Optional[Dict[str, Any]]:
+    """Return the state of the container as reported by 'kanto-cm get', e.g.
+    {"status": "Running", "running": true, ...}, None if it does not exist."""
+    result = subprocess.run(
+        ["kanto-cm", "get", "-n", name],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=log_output,
+    )
+    if result.returncode != 0:
+        return None
+    try:
+        state = json.loads(result.stdout)["state"]
+    except (ValueError, KeyError, TypeError):
+        return None
+    return state if isinstance(state, dict) else None
+
+
+def is_container_running(name: str, log_output: TextIOWrapper) -> bool:
+    """Return whether the container exists and is running."""
+    state = get_container_state(name, log_output)
+    return state is not None and state.get("running") is True
+
+
+def wait_until_running(
+    name: str,
+    deadline: float,
+    is_running: Callable[[str], bool],
+) -> bool:
+    """Poll the container until it runs.
+
+    Args:
+        name: Name of the container.
+        deadline: Deadline as returned by time.monotonic.
+        is_running: Returns whether the container with the given name runs.
+
+    Returns:
+        bool: True if the container runs, False if the deadline was reached.
+    """
+    delay_sec = INITIAL_POLL_DELAY_SEC
+    while not is_running(name):
+        remaining_sec = deadline - time.monotonic()
+        if remaining_sec <= 0:
+            return False
+        time.sleep(min(delay_sec, remaining_sec))
+        delay_sec = min(delay_sec * 2, MAX_POLL_DELAY_SEC)
+    return True
+
+
+def run_readiness_probes(service: Service, deadline: float) -> bool:
+    """Run the readiness probes declared for the service in runtime.json, see
+    the local runtime, until they pass or the deadline is reached."""
+    # only needed if the containers are probed
+    from readiness_probes import get_readiness_probes, wait_until_ready
+
+    probes = get_readiness_probes(service)
+    # never set, so probing is only given up at the deadline
+    abort = Event()
+    return wait_until_ready(probes, max(deadline - time.monotonic(), 0), abort.wait)
+
+
+def wait_until_containers_ready(
+    services: List[Service],
+    timeout_sec: float,
+    probe: bool,
+    log_output: TextIOWrapper,
+    on_ready: Callable[[ContainerReadiness], None] = lambda _: None,
+) -> List[ContainerReadiness]:
+    """Wait concurrently for the containers of the services to run and,
+    optionally, for their readiness probes to pass.
+
+    Args:
+        services: The deployed services, whose containers are named like them.
+        timeout_sec: Timeout [in seconds] for all containers to get ready.
+        probe: Whether to run the readiness probes of the services.
+        log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
+        on_ready: Called for each container once it got ready or failed to.
+
+    Returns:
+        List[ContainerReadiness]: The readiness of each container, in the
+            order of the services.
+    """
+    start = time.monotonic()
+    deadline = start + timeout_sec
+
+    def wait(service: Service) -> ContainerReadiness:
+        running_sec = ready_sec = None
+        if wait_until_running(
+            service.id,
+            deadline,
+            lambda name: is_container_running(name, log_output),
+        ):
+            running_sec = time.monotonic() - start
+            if not probe:
+                ready_sec = running_sec
+            elif run_readiness_probes(service, deadline):
+                ready_sec = time.monotonic() - start
+        readiness = ContainerReadiness(service.id, running_sec, ready_sec)
+        on_ready(readiness)
+        return readiness
+
+    if not services:
+        return []
+    with ThreadPoolExecutor(len(services)) as executor:
+        return list(executor.map(wait, services))
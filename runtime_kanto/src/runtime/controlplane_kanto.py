@@ -15,8 +15,9 @@
 import subprocess
 from io import TextIOWrapper
 
+from spinner import Spinner
+from vehicleapp_container import is_image_import_enabled
 from velocitas_lib.docker import container_exists
-from yaspin.core import Yaspin
 
 K3D_REGISTRY_NAME = "k3d-registry"
 KANTO_REGISTRY_NAME = "registry"
@@ -98,12 +99,12 @@ def stop_registry(log_output: TextIOWrapper):
     )
 
 
-def configure_controlplane(spinner: Yaspin, log_output: TextIOWrapper):
+def configure_controlplane(spinner: Spinner, log_output: TextIOWrapper):
     """Configure the Kanto control plane and display the progress
     using the given spinner.
 
     Args:
-        spinner (Yaspin): The progress spinner to update.
+        spinner (Spinner): The progress spinner to update.
         log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
     """
     if container_exists(K3D_REGISTRY_NAME, log_output):
@@ -112,6 +113,12 @@ def configure_controlplane(spinner: Yaspin, log_output: TextIOWrapper):
         )
 
     status = "> Checking Kanto registry... "
+    if is_image_import_enabled():
+        # the vehicleapp image is imported into containerd directly
+        spinner.write(status + "not needed for image imports.")
+        log_output.write(status + "not needed for image imports.\n")
+        return
+
     if not container_exists(KANTO_REGISTRY_NAME, log_output):
         spinner.write(status + "starting registry.")
         create_and_start_registry(log_output)
@@ -129,12 +136,12 @@ def configure_controlplane(spinner: Yaspin, log_output: TextIOWrapper):
             log_output.write(status + "started.\n")
 
 
-def reset_controlplane(spinner: Yaspin, log_output: TextIOWrapper):
+def reset_controlplane(spinner: Spinner, log_output: TextIOWrapper):
     """Reset the Kanto control plane and display the progress
     using the given spinner.
 
     Args:
-        spinner (Yaspin): The progress spinner to update.
+        spinner (Spinner): The progress spinner to update.
         log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
     """
 
@@ -0,0 +1,256 @@
+# Copyright (c) 2023-2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Generates the deployment descriptors of Kanto's container management from
+the services of runtime.json.
+
+Kanto deploys the descriptors in 'update' mode, i.e. it recreates a container
+if its descriptor differs from the container. So a descriptor is only
+written if its content changed, leaving unchanged containers alone.
+
+Kanto keeps the containers of deleted descriptors, so the names of the
+deployed containers are recorded next to the descriptors, until the
+containers are removed.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from io import TextIOWrapper
+from typing import Any, Dict, List
+
+from velocitas_lib import get_workspace_dir
+from velocitas_lib.services import Service, get_services
+
+# shared with the local runtime, which is part of the same package
+LOCAL_RUNTIME_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "..", "runtime_local", "src")
+)
+if LOCAL_RUNTIME_DIR not in sys.path:
+    sys.path.append(LOCAL_RUNTIME_DIR)
+
+DESCRIPTOR_EXTENSION = ".json"
+DEPLOYED_CONTAINERS_FILE = "deployed_containers.json"
+# containers of the descriptors maintained by hand before, which were named
+# differently from their services
+LEGACY_CONTAINER_NAMES = ["databroker", "mosquitto"]
+PROPAGATION_MODES = ["private", "rprivate", "shared", "rshared", "slave", "rslave"]
+DEFAULT_PROPAGATION_MODE = "rprivate"
+
+
+def get_deployment_dir() -> str:
+    """Return the directory of the generated deployment descriptors."""
+    return os.path.join(
+        get_workspace_dir(), ".velocitas", "runtime_kanto", "deployment"
+    )
+
+
+def apply_vss_subset(services: List[Service]) -> List[Service]:
+    """Return the services with the databroker mounting the subset of the VSS
+    the app requires, if the 'vssSubsetEnabled' variable is set."""
+    if os.getenv("vssSubsetEnabled", "false").lower() != "true":
+        return services
+
+    # only needed if the VSS subset is enabled
+    import vss_subset
+
+    return vss_subset.apply_vss_subset(services)
+
+
+def get_mount_point(service_id: str, mount: str) -> Dict[str, str]:
+    """Return the mount point of a 'source:destination[:options]' mount.
+
+    Of the comma-separated options, Kanto supports the propagation mode and
+    'rw', which is the default.
+
+    Raises:
+        ValueError: If the mount is invalid or has an unsupported option,
+            e.g. 'ro'.
+    """
+    source, _, rest = mount.partition(":")
+    destination, _, options = rest.partition(":")
+    if not source or not destination:
+        raise ValueError(f"Invalid mount {mount!r} of service {service_id!r}")
+    propagation_mode = DEFAULT_PROPAGATION_MODE
+    for option in filter(None, options.split(",")):
+        if option in PROPAGATION_MODES:
+            propagation_mode = option
+        elif option != "rw":
+            raise ValueError(
+                f"Mount option {option!r} of service {service_id!r} is not "
+                "supported by Kanto"
+            )
+    return {
+        "destination": destination,
+        "source": source,
+        "propagation_mode": propagation_mode,
+    }
+
+
+def get_deployment_descriptor(service: Service) -> Dict[str, Any]:
+    """Return the deployment descriptor of the container of the service, which
+    is named like the service and uses the network of the host."""
+    descriptor: Dict[str, Any] = {
+        "container_name": service.id,
+        "image": {"name": service.config.image},
+        "host_config": {
+            "devices": [],
+            "network_mode": "host",
+            "privileged": False,
+            "restart_policy": {
+                "maximum_retry_count": 0,
+                "retry_timeout": 0,
+                "type": "unless-stopped",
+            },
+        },
+        "config": {
+            "env": [
+                name if value is None else f"{name}={value}"
+                for name, value in service.config.env_vars.items()
+            ],
+        },
+    }
+    if service.config.args:
+        descriptor["config"]["cmd"] = list(service.config.args)
+    if service.config.mounts:
+        descriptor["mount_points"] = [
+            get_mount_point(service.id, mount) for mount in service.config.mounts
+        ]
+    return descriptor
+
+
+def get_canonical_content(descriptor: Dict[str, Any]) -> bytes:
+    """Return the descriptor serialized with sorted keys, so equal descriptors
+    have equal content."""
+    return (json.dumps(descriptor, indent=4, sort_keys=True) + "\n").encode("utf-8")
+
+
+def write_deployment_descriptors(
+    services: List[Service], deployment_dir: str
+) -> List[str]:
+    """Write the deployment descriptors of the services whose content changed
+    and remove those of services which are no longer part of runtime.json.
+    The containers of the services are recorded as deployed.
+
+    Args:
+        services: The enabled services.
+        deployment_dir: The directory of the descriptors.
+
+    Returns:
+        List[str]: The ids of the services whose descriptors were written or
+            removed.
+    """
+    os.makedirs(deployment_dir, exist_ok=True)
+    record_deployed_containers(deployment_dir, [service.id for service in services])
+    changed: List[str] = []
+    for service in services:
+        content = get_canonical_content(get_deployment_descriptor(service))
+        path = os.path.join(deployment_dir, f"{service.id}{DESCRIPTOR_EXTENSION}")
+        if _get_file_hash(path) == hashlib.sha256(content).hexdigest():
+            continue
+        temp_path = f"{path}.{os.getpid()}"
+        with open(temp_path, "wb") as descriptor_file:
+            descriptor_file.write(content)
+        os.replace(temp_path, path)
+        changed.append(service.id)
+
+    service_ids = {service.id for service in services}
+    for service_id in get_deployed_service_ids(deployment_dir):
+        if service_id not in service_ids:
+            os.remove(
+                os.path.join(deployment_dir, f"{service_id}{DESCRIPTOR_EXTENSION}")
+            )
+            changed.append(service_id)
+    return changed
+
+
+def get_deployed_service_ids(deployment_dir: str) -> List[str]:
+    """Return the ids of the services which have a deployment descriptor."""
+    if not os.path.isdir(deployment_dir):
+        return []
+    return sorted(
+        file_name.removesuffix(DESCRIPTOR_EXTENSION)
+        for file_name in os.listdir(deployment_dir)
+        if file_name.endswith(DESCRIPTOR_EXTENSION)
+    )
+
+
+def get_deployed_containers(deployment_dir: str) -> List[str]:
+    """Return the names of the containers deployed from the descriptors and
+    not removed yet. Without a record, the containers of the descriptors
+    maintained by hand before are assumed."""
+    path = os.path.join(os.path.dirname(deployment_dir), DEPLOYED_CONTAINERS_FILE)
+    try:
+        with open(path, encoding="utf-8") as record_file:
+            return list(json.load(record_file))
+    except FileNotFoundError:
+        return list(LEGACY_CONTAINER_NAMES)
+    except ValueError:
+        return []
+
+
+def record_deployed_containers(deployment_dir: str, names: List[str]) -> None:
+    """Add the containers to the record of deployed containers."""
+    recorded = get_deployed_containers(deployment_dir)
+    _write_deployed_containers(
+        deployment_dir, recorded + sorted(set(names) - set(recorded))
+    )
+
+
+def forget_deployed_containers(deployment_dir: str, names: List[str]) -> None:
+    """Remove the containers, e.g. once removed, from the record of deployed
+    containers."""
+    _write_deployed_containers(
+        deployment_dir,
+        [name for name in get_deployed_containers(deployment_dir) if name not in names],
+    )
+
+
+def _write_deployed_containers(deployment_dir: str, names: List[str]) -> None:
+    path = os.path.join(os.path.dirname(deployment_dir), DEPLOYED_CONTAINERS_FILE)
+    temp_path = f"{path}.{os.getpid()}"
+    with open(temp_path, "w", encoding="utf-8") as record_file:
+        json.dump(names, record_file)
+    os.replace(temp_path, path)
+
+
+def generate_deployment_descriptors(log_output: TextIOWrapper) -> str:
+    """Generate the deployment descriptors of the enabled services of
+    runtime.json.
+
+    Args:
+        log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
+
+    Returns:
+        str: The directory of the descriptors.
+    """
+    deployment_dir = get_deployment_dir()
+    changed = write_deployment_descriptors(
+        apply_vss_subset(get_services(verbose=False)), deployment_dir
+    )
+    if changed:
+        log_output.write(f"Updated deployment descriptors: {', '.join(changed)}\n")
+    else:
+        log_output.write("Deployment descriptors are up to date\n")
+    return deployment_dir
+
+
+def _get_file_hash(path: str) -> str:
+    try:
+        with open(path, "rb") as file:
+            return hashlib.sha256(file.read()).hexdigest()
+    except FileNotFoundError:
+        return ""
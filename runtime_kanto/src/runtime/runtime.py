@@ -12,26 +12,64 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 
-import json
 import os
 import subprocess
-import sys
 import time
 from io import TextIOWrapper
 from pathlib import Path
-
-from velocitas_lib import (
-    get_app_manifest,
-    get_cache_data,
-    get_package_path,
-    get_script_path,
-    get_workspace_dir,
-    require_env,
+from typing import List
+
+from deployment_descriptors import (
+    forget_deployed_containers,
+    generate_deployment_descriptors,
+    get_deployed_containers,
+    get_deployed_service_ids,
+    get_deployment_dir,
 )
-from yaspin.core import Yaspin
+from spinner import Spinner
+from startup_wait import check_process, wait_for_path
+from vehicleapp_container import remove_vehicleapp
+from velocitas_lib import get_app_manifest, get_script_path, get_workspace_dir
+
+KANTO_SOCKET_PATH = "/run/container-management/container-management.sock"
+KANTO_STARTUP_TIMEOUT_SEC = 60
+PROBE_INITIAL_DELAY_SEC = 0.02
+PROBE_MAX_DELAY_SEC = 0.5
+
+
+def remove_containers(names: List[str], log_output: TextIOWrapper):
+    """Remove the containers with the given names.
+
+    Args:
+        names (List[str]): The names of the containers.
+        log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
+    """
+    for name in names:
+        log_output.write(f"Removing {name} container\n")
+        subprocess.call(
+            ["kanto-cm", "remove", "-f", "-n", name],
+            stdout=log_output,
+            stderr=log_output,
+        )
+
 
-sys.path.append(os.path.join(os.path.dirname(__file__), "..", "app_deployment"))
-from deploy_vehicleapp import remove_vehicleapp  # noqa: E402
+def remove_stale_containers(log_output: TextIOWrapper):
+    """Remove the deployed containers which have no deployment descriptor
+    anymore, i.e. of services disabled or removed from runtime.json since
+    the last start.
+
+    Args:
+        log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
+    """
+    deployment_dir = get_deployment_dir()
+    service_ids = get_deployed_service_ids(deployment_dir)
+    stale = [
+        name
+        for name in get_deployed_containers(deployment_dir)
+        if name not in service_ids
+    ]
+    remove_containers(stale, log_output)
+    forget_deployed_containers(deployment_dir, stale)
 
 
 def remove_container(log_output: TextIOWrapper):
@@ -40,130 +78,27 @@ def remove_container(log_output: TextIOWrapper):
     Args:
         log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
     """
-    log_output.write("Removing databroker container\n")
-    subprocess.call(
-        ["kanto-cm", "remove", "-f", "-n", "databroker"],
-        stdout=log_output,
-        stderr=log_output,
-    )
-    log_output.write("Removing mosquitto container\n")
-    subprocess.call(
-        ["kanto-cm", "remove", "-f", "-n", "mosquitto"],
-        stdout=log_output,
-        stderr=log_output,
-    )
-    log_output.write("Removing feedercan container\n")
-    subprocess.call(
-        ["kanto-cm", "remove", "-f", "-n", "feedercan"],
-        stdout=log_output,
-        stderr=log_output,
-    )
-    log_output.write("Removing seatservice container\n")
-    subprocess.call(
-        ["kanto-cm", "remove", "-f", "-n", "seatservice"],
-        stdout=log_output,
-        stderr=log_output,
-    )
-    log_output.write("Removing mockservice container\n")
-    subprocess.call(
-        ["kanto-cm", "remove", "-f", "-n", "mockservice"],
-        stdout=log_output,
-        stderr=log_output,
-    )
+    deployment_dir = get_deployment_dir()
+    names = get_deployed_containers(deployment_dir)
+    names += [
+        service_id
+        for service_id in get_deployed_service_ids(deployment_dir)
+        if service_id not in names
+    ]
+    remove_containers(names, log_output)
+    if os.path.isdir(deployment_dir):
+        forget_deployed_containers(deployment_dir, names)
     app_name = get_app_manifest()["name"].lower()
     log_output.write(f"Removing {app_name} container\n")
     remove_vehicleapp(app_name, log_output)
 
 
-def adapt_feedercan_deployment_file():
-    """Update the feedercan config with the correct mount path."""
-
-    file_path = os.path.join(get_script_path(), "deployment", "feedercan.json")
-    if not os.path.isfile(file_path):
-        return
-
-    with open(
-        file_path,
-        "r+",
-        encoding="utf-8",
-    ) as f:
-        data = json.load(f)
-        data["image"]["name"] = require_env("feederCanImage")
-        data["mount_points"][0]["source"] = os.path.join(
-            get_package_path(), "config", "feedercan"
-        )
-        f.seek(0)
-        json.dump(data, f, indent=4)
-
-
-def adapt_mockservice_deployment_file():
-    """Update the mockservice config with the correct mount path."""
-
-    file_path = os.path.join(get_script_path(), "deployment", "mockservice.json")
-    if not os.path.isfile(file_path):
-        return
-
-    with open(
-        file_path,
-        "r+",
-        encoding="utf-8",
-    ) as f:
-        data = json.load(f)
-        source = os.path.join(get_package_path(), "mock.py")
-        # use mock.py from repo root if available
-        if os.path.isfile(os.path.join(get_workspace_dir(), "mock.py")):
-            source = os.path.join(get_workspace_dir(), "mock.py")
-
-        data["image"]["name"] = require_env("mockServiceImage")
-        data["mount_points"][0]["source"] = source
-        f.seek(0)
-        json.dump(data, f, indent=4)
-
-
-def adapt_databroker_deployment_file():
-    """Update the databroker config with the correct mount path."""
-
-    file_path = os.path.join(get_script_path(), "deployment", "databroker.json")
-    if not os.path.isfile(file_path):
-        return
-
-    with open(
-        file_path,
-        "r+",
-        encoding="utf-8",
-    ) as f:
-        data = json.load(f)
-        cache = get_cache_data()
-        data["image"]["name"] = require_env("vehicleDatabrokerImage")
-        data["mount_points"][0]["source"] = cache["vspec_file_path"]
-        f.seek(0)
-        json.dump(data, f, indent=4)
-
-
-def adapt_mosquitto_deployment_file():
-    """Update the databroker config with the correct mount path."""
-
-    file_path = os.path.join(get_script_path(), "deployment", "mosquitto.json")
-    if not os.path.isfile(file_path):
-        return
-
-    with open(
-        file_path,
-        "r+",
-        encoding="utf-8",
-    ) as f:
-        data = json.load(f)
-        data["image"]["name"] = require_env("mqttBrokerImage")
-        f.seek(0)
-        json.dump(data, f, indent=4)
-
-
-def undeploy_runtime(spinner: Yaspin, log_output: TextIOWrapper):
+def undeploy_runtime(spinner: Spinner, log_output: TextIOWrapper):
     """Undeploy/remove the runtime and display the progress
     using the given spinner.
 
     Args:
-        spinner (Yaspin): The progress spinner to update.
+        spinner (Spinner): The progress spinner to update.
         log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
     """
     status = "> Undeploying runtime... "
@@ -178,11 +113,20 @@ def is_kanto_running(log_output: TextIOWrapper) -> bool:
     Args:
         log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
     """
-    if Path("/run/container-management/container-management.sock").exists():
+    if Path(KANTO_SOCKET_PATH).exists():
         adapt_socket(log_output)
     else:
         return False
 
+    return is_kanto_responding(log_output)
+
+
+def is_kanto_responding(log_output: TextIOWrapper) -> bool:
+    """Check if Kanto's container management responds to requests.
+
+    Args:
+        log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
+    """
     try:
         subprocess.check_call(
             [
@@ -212,24 +156,24 @@ def adapt_socket(log_output: TextIOWrapper):
             "sudo",
             "chmod",
             "a+rw",
-            "/run/container-management/container-management.sock",
+            KANTO_SOCKET_PATH,
         ],
         stdout=log_output,
         stderr=log_output,
     )
 
 
-def start_kanto(spinner: Yaspin, log_output: TextIOWrapper):
+def start_kanto(spinner: Spinner, log_output: TextIOWrapper) -> bool:
     """Starting the Kanto process in background
 
     Args:
-        spinner (Yaspin): The progress spinner to update.
+        spinner (Spinner): The progress spinner to update.
         log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
+
+    Returns:
+        bool: True if Kanto is ready, False if starting it failed.
     """
-    adapt_feedercan_deployment_file()
-    adapt_mockservice_deployment_file()
-    adapt_databroker_deployment_file()
-    adapt_mosquitto_deployment_file()
+    deployment_dir = generate_deployment_descriptors(log_output)
     log_output.write("Starting Kanto runtime\n")
     kanto = subprocess.Popen(
         [
@@ -238,7 +182,7 @@ def start_kanto(spinner: Yaspin, log_output: TextIOWrapper):
             "--cfg-file",
             f"{get_script_path()}/config.json",
             "--deployment-ctr-dir",
-            f"{get_script_path()}/deployment",
+            deployment_dir,
             "--log-file",
             f"{get_workspace_dir()}/logs/runtime_kanto/container-management.log",
         ],
@@ -247,23 +191,53 @@ def start_kanto(spinner: Yaspin, log_output: TextIOWrapper):
         stdout=log_output,
     )
 
-    socket = Path("/run/container-management/container-management.sock")
-    while not socket.exists():
-        print("waiting")
-        time.sleep(1)
-
-    adapt_socket(log_output)
-
-    # sleep a bit to properly get the errors
-    time.sleep(0.1)
-    if kanto.poll() == 1:
+    try:
+        wait_until_kanto_ready(kanto, log_output)
+        # the descriptors of these were deleted, but Kanto keeps containers
+        remove_stale_containers(log_output)
+    except RuntimeError as error:
+        log_output.write(f"{error}\n")
         spinner.text = "Starting Kanto failed!"
         spinner.fail("💥")
-        stop_kanto(log_output)
-        return
+        if kanto.poll() is None:
+            stop_kanto(log_output)
+        return False
 
     spinner.text = "Kanto is ready to use!"
     spinner.ok("✅")
+    return True
+
+
+def wait_until_kanto_ready(
+    kanto: subprocess.Popen,
+    log_output: TextIOWrapper,
+    timeout_sec: float = KANTO_STARTUP_TIMEOUT_SEC,
+):
+    """Wait for the started container management to create its socket and
+    to respond to requests, probing it with an exponential backoff.
+
+    Args:
+        kanto (subprocess.Popen): The container management process.
+        log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
+        timeout_sec (float): Timeout [in seconds] for getting ready.
+
+    Raises:
+        RuntimeError: If the process exited or the timeout was reached.
+    """
+    deadline = time.monotonic() + timeout_sec
+    wait_for_path(KANTO_SOCKET_PATH, kanto, deadline)
+    adapt_socket(log_output)
+
+    delay_sec = PROBE_INITIAL_DELAY_SEC
+    while not is_kanto_responding(log_output):
+        check_process(kanto, deadline)
+        try:
+            # returns early if the process exits meanwhile
+            kanto.wait(min(delay_sec, max(deadline - time.monotonic(), 0)))
+        except subprocess.TimeoutExpired:
+            pass
+        delay_sec = min(delay_sec * 2, PROBE_MAX_DELAY_SEC)
+    log_output.write("Kanto is ready\n")
 
 
 def stop_kanto(log_output: TextIOWrapper):
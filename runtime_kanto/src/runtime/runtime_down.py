@@ -14,8 +14,8 @@
 
 from controlplane_kanto import reset_controlplane
 from runtime import stop_kanto, undeploy_runtime
+from spinner import create_spinner
 from velocitas_lib import create_log_file
-from yaspin import yaspin
 
 
 def runtime_down():
@@ -23,7 +23,7 @@ def runtime_down():
 
     print("Hint: Log files can be found in your workspace's logs directory")
     log_output = create_log_file("runtime-down", "runtime_kanto")
-    with yaspin(text="Stopping Kanto...", color="cyan") as spinner:
+    with create_spinner("Stopping Kanto...") as spinner:
         try:
             spinner.write("Removing containers...")
             undeploy_runtime(spinner, log_output)
@@ -12,34 +12,100 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 
+import argparse
 import signal
+import sys
+from io import TextIOWrapper
 
+from container_readiness import ContainerReadiness, wait_until_containers_ready
 from controlplane_kanto import configure_controlplane
 from runtime import is_kanto_running, start_kanto
 from runtime_down import runtime_down
+from spinner import Spinner, create_spinner
 from velocitas_lib import create_log_file
-from yaspin import yaspin
+from velocitas_lib.services import get_services
 
+DEFAULT_READY_TIMEOUT_SEC = 120
 
-def runtime_up():
-    """Start up the Kanto runtime."""
+
+def format_readiness(readiness: ContainerReadiness, probe: bool) -> str:
+    """Return the time to running (and to ready) of the container."""
+    if readiness.running_sec is None:
+        return f"> {readiness.service_id} not running in time"
+    status = f"> {readiness.service_id} running after {readiness.running_sec:.2f}s"
+    if not probe:
+        return status
+    if readiness.ready_sec is None:
+        return f"{status}, readiness probes did not pass in time"
+    return f"{status}, ready after {readiness.ready_sec:.2f}s"
+
+
+def wait_for_containers(
+    spinner: Spinner, log_output: TextIOWrapper, timeout_sec: float, probe: bool
+) -> bool:
+    """Wait for the containers of the services to run and, optionally, to
+    pass their readiness probes.
+
+    Args:
+        spinner (Spinner): The progress spinner to update.
+        log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
+        timeout_sec (float): Timeout [in seconds] for all containers.
+        probe (bool): Whether to run the readiness probes of the services.
+
+    Returns:
+        bool: True if all containers got ready in time, False otherwise.
+    """
+    spinner.text = "Waiting for containers..."
+    spinner.start()
+    results = wait_until_containers_ready(
+        get_services(verbose=False),
+        timeout_sec,
+        probe,
+        log_output,
+        lambda readiness: spinner.write(format_readiness(readiness, probe)),
+    )
+    if any(readiness.ready_sec is None for readiness in results):
+        spinner.text = "Containers did not get ready in time!"
+        spinner.fail("💥")
+        return False
+    spinner.text = "Containers are ready!"
+    spinner.ok("✅")
+    return True
+
+
+def runtime_up(
+    ready_timeout_sec: float = DEFAULT_READY_TIMEOUT_SEC, probe: bool = False
+) -> bool:
+    """Start up the Kanto runtime and wait for its containers to run.
+
+    Args:
+        ready_timeout_sec (float): Timeout [in seconds] for the containers.
+        probe (bool): Whether to wait for the readiness probes of the
+            services as well.
+
+    Returns:
+        bool: True if the runtime is ready, False otherwise.
+    """
 
     print("Hint: Log files can be found in your workspace's logs directory")
     log_output = create_log_file("runtime-up", "runtime_kanto")
-    with yaspin(text="Configuring controlplane for Kanto...", color="cyan") as spinner:
+    with create_spinner("Configuring controlplane for Kanto...") as spinner:
         try:
             configure_controlplane(spinner, log_output)
             spinner.ok("✅")
             spinner.text = "Starting Kanto..."
             spinner.start()
             if not is_kanto_running(log_output):
-                start_kanto(spinner, log_output)
+                if not start_kanto(spinner, log_output):
+                    return False
             else:
                 spinner.text = "Kanto is ready to use!"
                 spinner.ok("✅")
+            return wait_for_containers(spinner, log_output, ready_timeout_sec, probe)
         except Exception as err:
             log_output.write(str(err))
             spinner.fail("💥")
+            return False
 
 
 def handler(_signum, _frame):  # noqa: U101 unused arguments
@@ -47,6 +113,22 @@ def handler(_signum, _frame):  # noqa: U101 unused arguments
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Starts the Kanto runtime and waits for its containers."
+    )
+    parser.add_argument(
+        "--ready-timeout",
+        type=float,
+        default=DEFAULT_READY_TIMEOUT_SEC,
+        help="Timeout [in seconds] for all containers to run.",
+    )
+    parser.add_argument(
+        "--probe",
+        action="store_true",
+        help="Also wait for the readiness probes declared in runtime.json.",
+    )
+    args = parser.parse_args()
     signal.signal(signal.SIGINT, handler)
     signal.signal(signal.SIGTERM, handler)
-    runtime_up()
+    if not runtime_up(args.ready_timeout, args.probe):
+        sys.exit(1)
@@ -0,0 +1,146 @@
+# Copyright (c) 2023-2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Waits for a path created by a starting process, e.g. the socket of Kanto's
+container management.
+
+The nearest existing directory along the path is watched via inotify and the
+process via a pidfd, so the wait ends as soon as the path is created or the
+process exits. Where these are unavailable, both are polled.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import subprocess
+import time
+from typing import Optional
+
+IN_ATTRIB = 0x4
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+WATCH_MASK = IN_ATTRIB | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF | IN_MOVE_SELF
+READ_SIZE = 64 * 1024
+POLL_INTERVAL_SEC = 0.05
+
+
+def check_process(process: subprocess.Popen, deadline: float) -> None:
+    """Check that the process is still running and the deadline not reached.
+
+    Args:
+        process: The starting process.
+        deadline: Deadline as returned by time.monotonic.
+
+    Raises:
+        RuntimeError: If the process exited or the deadline was reached.
+    """
+    if process.poll() is not None:
+        raise RuntimeError(
+            f"Process {process.pid} unexpectedly exited with {process.returncode}"
+        )
+    if time.monotonic() >= deadline:
+        raise RuntimeError("Timeout reached, the process did not get ready in time")
+
+
+def wait_for_path(path: str, process: subprocess.Popen, deadline: float) -> None:
+    """Wait for the path to exist.
+
+    Args:
+        path: The path, e.g. of a socket.
+        process: The starting process, which creates the path.
+        deadline: Deadline as returned by time.monotonic.
+
+    Raises:
+        RuntimeError: If the process exited or the deadline was reached.
+    """
+    with _DirectoryWatcher() as watcher:
+        process_fd = _open_pidfd(process)
+        try:
+            while True:
+                check_process(process, deadline)
+                is_watched = watcher.watch(_get_existing_ancestor(path))
+                # checked after adding the watch, so a creation is not missed
+                if os.path.exists(path):
+                    return
+                fds = [fd for fd in (watcher.fd, process_fd) if fd is not None]
+                wait_sec = max(deadline - time.monotonic(), 0)
+                if not is_watched or process_fd is None:
+                    wait_sec = min(wait_sec, POLL_INTERVAL_SEC)
+                if watcher.fd in select.select(fds, [], [], wait_sec)[0]:
+                    watcher.read_events()
+        finally:
+            if process_fd is not None:
+                os.close(process_fd)
+
+
+class _DirectoryWatcher:
+    """Watches directories for created entries via inotify, if available."""
+
+    def __init__(self):
+        self.fd: Optional[int] = None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return
+        if fd >= 0:
+            self.fd = fd
+            self._add_watch_function = libc.inotify_add_watch
+
+    def __enter__(self) -> "_DirectoryWatcher":
+        return self
+
+    def __exit__(self, *_) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def watch(self, directory: str) -> bool:
+        """Watch the directory, watching it again is a no-op.
+
+        Returns:
+            bool: False if it cannot be watched, e.g. without inotify.
+        """
+        if self.fd is None:
+            return False
+        return (
+            self._add_watch_function(self.fd, os.fsencode(directory), WATCH_MASK) >= 0
+        )
+
+    def read_events(self) -> None:
+        """Discard the pending events."""
+        assert self.fd is not None
+        try:
+            os.read(self.fd, READ_SIZE)
+        except BlockingIOError:
+            pass
+
+
+def _get_existing_ancestor(path: str) -> str:
+    directory = os.path.dirname(os.path.abspath(path))
+    while not os.path.isdir(directory):
+        directory = os.path.dirname(directory)
+    return directory
+
+
+def _open_pidfd(process: subprocess.Popen) -> Optional[int]:
+    try:
+        return os.pidfd_open(process.pid)
+    except (OSError, AttributeError):
+        # e.g. the process already exited or older kernels
+        return None
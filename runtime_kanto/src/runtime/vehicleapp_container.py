@@ -0,0 +1,200 @@
+# Copyright (c) 2023-2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import subprocess
+from io import TextIOWrapper
+from typing import List, Optional
+
+CONTAINERD_SOCKET = "/run/docker/containerd/containerd.sock"
+KANTO_NAMESPACE = "kanto-cm"
+# the ID of the docker image an image was imported from
+IMAGE_ID_LABEL = "org.eclipse.velocitas.image-id"
+
+
+def is_image_import_enabled() -> bool:
+    """Return whether the vehicleapp image is imported into Kanto's containerd
+    namespace directly, instead of being pulled from the local registry."""
+    return os.getenv("appImageTransfer", "registry").lower() == "import"
+
+
+def get_ctr_command(*args: str) -> List[str]:
+    """Return the ctr command with the given args in Kanto's namespace."""
+    return ["sudo", "ctr", "-a", CONTAINERD_SOCKET, "-n", KANTO_NAMESPACE, *args]
+
+
+def is_vehicleapp_in_kanto(app_name: str, log_output: TextIOWrapper) -> bool:
+    """Return whether the vehicleapp image is already in Kanto or not.
+
+    Args:
+        app_name (str): App name
+        log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
+    """
+    return (
+        subprocess.call(
+            ["kanto-cm", "get", "-n", app_name],
+            stdout=log_output,
+            stderr=log_output,
+        )
+        == 0
+    )
+
+
+def is_vehicleapp_in_containerd(app_name: str, log_output: TextIOWrapper) -> bool:
+    """Return whether the vehicleapp image is already in containerd or not.
+
+    Args:
+        app_name (str): App name
+        log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
+    """
+    images = str(
+        subprocess.check_output(get_ctr_command("i", "ls", "-q"), stderr=log_output),
+        "utf-8",
+    )
+    return app_name in images
+
+
+def get_vehicleapp_image_digest(image: str, log_output: TextIOWrapper) -> Optional[str]:
+    """Return the digest of the vehicleapp image in containerd, i.e. of the
+    manifest Kanto pulled, None if the image is not there.
+
+    Args:
+        image (str): Reference of the image, e.g. 'localhost:12345/app:local'
+        log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
+    """
+    columns = _get_image_columns(image, log_output)
+    return columns[2] if columns is not None else None
+
+
+def get_imported_image_id(image: str, log_output: TextIOWrapper) -> Optional[str]:
+    """Return the ID of the docker image the vehicleapp image in containerd
+    was imported from, None if it was not imported.
+
+    Args:
+        image (str): Reference of the image, e.g. 'localhost:12345/app:local'
+        log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
+    """
+    columns = _get_image_columns(image, log_output)
+    if columns is None:
+        return None
+    for label in columns[-1].split(","):
+        key, _, value = label.partition("=")
+        if key == IMAGE_ID_LABEL:
+            return value
+    return None
+
+
+def _get_image_columns(image: str, log_output: TextIOWrapper) -> Optional[List[str]]:
+    images = str(
+        subprocess.check_output(get_ctr_command("i", "ls"), stderr=log_output),
+        "utf-8",
+    )
+    # columns: REF TYPE DIGEST SIZE PLATFORMS LABELS, the size has a unit
+    for line in images.splitlines()[1:]:
+        columns = line.split()
+        if len(columns) >= 7 and columns[0] == image:
+            return columns
+    return None
+
+
+def import_vehicleapp_image(image: str, image_id: str, log_output: TextIOWrapper):
+    """Stream the vehicleapp image from docker into Kanto's containerd
+    namespace and label it with the ID of the docker image.
+
+    docker save exports all layers of the image, so the whole image is
+    streamed on every import, including layers containerd has already.
+
+    Args:
+        image (str): Reference of the image, e.g. 'localhost:12345/app:local'
+        image_id (str): ID of the docker image
+        log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
+    """
+    log_output.write(f"Importing {image} into containerd\n")
+    log_output.flush()
+    save = subprocess.Popen(
+        ["docker", "save", image], stdout=subprocess.PIPE, stderr=log_output
+    )
+    assert save.stdout is not None
+    try:
+        import_code = subprocess.call(
+            get_ctr_command("i", "import", "-"),
+            stdin=save.stdout,
+            stdout=log_output,
+            stderr=log_output,
+        )
+    finally:
+        save.stdout.close()
+        save_code = save.wait()
+    if save_code != 0:
+        raise subprocess.CalledProcessError(save_code, save.args)
+    if import_code != 0:
+        raise subprocess.CalledProcessError(import_code, "ctr i import")
+    subprocess.check_call(
+        get_ctr_command("i", "label", image, f"{IMAGE_ID_LABEL}={image_id}"),
+        stdout=log_output,
+        stderr=log_output,
+    )
+
+
+def is_vehicleapp_installed(app_name: str, log_output: TextIOWrapper) -> bool:
+    """Return whether the vehicleapp is already installed or not.
+
+    Args:
+        app_name (str): App name
+        log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
+    """
+    return is_vehicleapp_in_containerd(app_name, log_output) or is_vehicleapp_in_kanto(
+        app_name, log_output
+    )
+
+
+def remove_vehicleapp_container(app_name: str, log_output: TextIOWrapper):
+    """Remove the VehicleApp container from Kanto, keeping its image
+
+    Args:
+        app_name (str): App name to remove container for
+        log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
+    """
+    if is_vehicleapp_in_kanto(app_name, log_output):
+        log_output.write(f"Removing {app_name} container from Kanto\n")
+        subprocess.call(
+            ["kanto-cm", "remove", "-f", "-n", app_name],
+            stdout=log_output,
+            stderr=log_output,
+        )
+
+
+def remove_vehicleapp(app_name: str, log_output: TextIOWrapper):
+    """Uninstall VehicleApp container
+
+    Args:
+        app_name (str): App name to remove container for
+        log_output (TextIOWrapper | int): Logfile to write or DEVNULL by default.
+    """
+    remove_vehicleapp_container(app_name, log_output)
+
+    if is_vehicleapp_in_containerd(app_name, log_output):
+        log_output.write(f"Removing {app_name} container from containerd\n")
+        images = str(
+            subprocess.check_output(
+                get_ctr_command("i", "ls", "-q"), stderr=log_output
+            ),
+            "utf-8",
+        )
+        app_images = [image for image in images.splitlines() if app_name in image]
+        subprocess.call(
+            get_ctr_command("i", "rm", *app_images),
+            stdout=log_output,
+            stderr=log_output,
+        )
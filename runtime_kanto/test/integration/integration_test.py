@@ -13,10 +13,8 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import json
-import os
 import subprocess
 import sys
-import time
 from pathlib import Path
 from re import Pattern
 from re import compile as re_compile
@@ -86,27 +84,11 @@ def run_command_until_logs_match(
     return True
 
 
-def wait_for_container_update():
-    path = os.path.join(Path.cwd(), "logs/runtime_kanto/container-management.log")
-    with open(path, mode="r", encoding="utf-8") as f:
-        while True:
-            line = f.readline()
-            print(line)
-            if line.find("finished containers update") != -1:
-                f.close()
-                break
-            # if line is empty and string not found wait for more input
-            if len(line) == 0:
-                print("waiting")
-                time.sleep(1)
-
-
 def test_scripts_run_successfully():
     create_dummy_vspec_file()
     assert run_command_until_logs_match(f"{BASE_COMMAND_RUNTIME} up", regex_runtime_up)
-    wait_for_container_update()
-    assert check_container_is_running("mosquitto")
-    assert check_container_is_running("databroker")
+    assert check_container_is_running("mqtt-broker")
+    assert check_container_is_running("vehicledatabroker")
     # feedercan and seatservice are disabled for now
     # assert check_container_is_running("feedercan")
     # assert check_container_is_running("seatservice")
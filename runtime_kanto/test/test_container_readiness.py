@@ -0,0 +1,100 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import os
+import subprocess
+import sys
+from threading import Timer
+from typing import List
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "runtime"))
+
+import container_readiness  # noqa: E402
+from container_readiness import (  # noqa: E402
+    ContainerReadiness,
+    wait_until_containers_ready,
+)
+from velocitas_lib.services import Service, ServiceSpecConfig  # noqa: E402
+
+# 'kanto-cm get -n <name>': the container runs once a file of its name exists
+FAKE_KANTO_CM = """#!/bin/sh
+if [ -f "$(dirname "$0")/$3" ]; then
+    echo '{"state": {"status": "Running", "running": true}}'
+else
+    echo '{"state": {"status": "Created", "running": false}}'
+fi
+"""
+
+SERVICES = [
+    Service("broker", ServiceSpecConfig("broker:1.0")),
+    Service("app", ServiceSpecConfig("app:1.0")),
+]
+
+
+@pytest.fixture()
+def containers(tmp_path, monkeypatch):
+    kanto_cm = tmp_path / "kanto-cm"
+    kanto_cm.write_text(FAKE_KANTO_CM)
+    kanto_cm.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+    def start(name: str, delay_sec: float = 0) -> None:
+        timer = Timer(delay_sec, (tmp_path / name).touch)
+        timer.start()
+
+    return start
+
+
+def test_wait__containers_running(containers):
+    containers("broker")
+    containers("app", 0.3)
+    reported: List[ContainerReadiness] = []
+
+    results = wait_until_containers_ready(
+        SERVICES, 5, False, subprocess.DEVNULL, reported.append
+    )
+
+    assert [readiness.service_id for readiness in results] == ["broker", "app"]
+    assert [readiness.service_id for readiness in reported] == ["broker", "app"]
+    broker, app = results
+    assert broker.running_sec is not None and broker.running_sec < 0.3
+    assert app.running_sec is not None and app.running_sec >= 0.3
+    assert app.ready_sec == app.running_sec
+
+
+def test_wait__timeout(containers):
+    containers("broker")
+
+    broker, app = wait_until_containers_ready(SERVICES, 0.3, False, subprocess.DEVNULL)
+
+    assert broker.ready_sec is not None
+    assert app == ContainerReadiness("app", None, None)
+
+
+def test_wait__probe(containers, monkeypatch):
+    containers("broker")
+    containers("app")
+    monkeypatch.setattr(
+        container_readiness,
+        "run_readiness_probes",
+        lambda service, _: service.id == "broker",
+    )
+
+    broker, app = wait_until_containers_ready(SERVICES, 5, True, subprocess.DEVNULL)
+
+    assert broker.ready_sec is not None
+    assert app.running_sec is not None and app.ready_sec is None
@@ -0,0 +1,165 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "runtime"))
+
+from deployment_descriptors import (  # noqa: E402
+    LEGACY_CONTAINER_NAMES,
+    generate_deployment_descriptors,
+    get_deployed_containers,
+    get_deployment_dir,
+    get_mount_point,
+)
+
+RUNTIME = [
+    {
+        "id": "mqtt-broker",
+        "config": [
+            {"key": "image", "value": "${{ mqttBrokerImage }}"},
+            {"key": "arg", "value": "mosquitto"},
+            {"key": "arg", "value": "-c"},
+            {"key": "arg", "value": "/mosquitto-no-auth.conf"},
+        ],
+    },
+    {
+        "id": "vehicledatabroker",
+        "config": [
+            {"key": "image", "value": "databroker:0.5.0"},
+            {"key": "env", "value": "KUKSA_DATABROKER_PORT=55555"},
+            {
+                "key": "mount",
+                "value": "${{ builtin.cache.vspec_file_path }}:/vspec.json",
+            },
+        ],
+    },
+    {
+        "id": "seatservice",
+        "config": [
+            {"key": "enabled", "value": "false"},
+            {"key": "image", "value": "seatservice:0.4.0"},
+        ],
+    },
+]
+
+
+@pytest.fixture()
+def runtime_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("VELOCITAS_PACKAGE_DIR", str(tmp_path))
+    monkeypatch.setenv("VELOCITAS_WORKSPACE_DIR", str(tmp_path))
+    monkeypatch.setenv(
+        "VELOCITAS_CACHE_DATA", json.dumps({"vspec_file_path": "/tmp/vss.json"})
+    )
+    monkeypatch.setenv("runtimeFilePath", "runtime.json")
+    monkeypatch.setenv("mqttBrokerImage", "mosquitto:2.0.14")
+    path = tmp_path / "runtime.json"
+    path.write_text(json.dumps(RUNTIME))
+    return path
+
+
+def generate(tmp_path):
+    log = tmp_path / "log.txt"
+    with open(log, "w", encoding="utf-8") as log_output:
+        deployment_dir = generate_deployment_descriptors(log_output)
+    return deployment_dir, log.read_text()
+
+
+def read_descriptor(deployment_dir, service_id):
+    with open(os.path.join(deployment_dir, f"{service_id}.json")) as descriptor:
+        return json.load(descriptor)
+
+
+def test_generate__enabled_services(runtime_file, tmp_path):
+    deployment_dir, log = generate(tmp_path)
+
+    assert deployment_dir == get_deployment_dir()
+    assert sorted(os.listdir(deployment_dir)) == [
+        "mqtt-broker.json",
+        "vehicledatabroker.json",
+    ]
+    assert log == "Updated deployment descriptors: mqtt-broker, vehicledatabroker\n"
+    mosquitto = read_descriptor(deployment_dir, "mqtt-broker")
+    assert mosquitto["container_name"] == "mqtt-broker"
+    assert mosquitto["image"] == {"name": "mosquitto:2.0.14"}
+    assert mosquitto["config"] == {
+        "env": [],
+        "cmd": ["mosquitto", "-c", "/mosquitto-no-auth.conf"],
+    }
+    assert "mount_points" not in mosquitto
+    databroker = read_descriptor(deployment_dir, "vehicledatabroker")
+    assert databroker["config"] == {"env": ["KUKSA_DATABROKER_PORT=55555"]}
+    assert databroker["mount_points"] == [
+        {
+            "destination": "/vspec.json",
+            "source": "/tmp/vss.json",
+            "propagation_mode": "rprivate",
+        }
+    ]
+    assert databroker["host_config"]["network_mode"] == "host"
+
+
+def test_generate__unchanged__not_written(runtime_file, tmp_path):
+    deployment_dir, _ = generate(tmp_path)
+    path = os.path.join(deployment_dir, "mqtt-broker.json")
+    os.utime(path, ns=(0, 0))
+
+    _, log = generate(tmp_path)
+
+    assert log == "Deployment descriptors are up to date\n"
+    assert os.stat(path).st_mtime_ns == 0
+
+
+def test_generate__changed__only_changed_written(runtime_file, tmp_path, monkeypatch):
+    deployment_dir, _ = generate(tmp_path)
+    monkeypatch.setenv("mqttBrokerImage", "mosquitto:2.0.18")
+
+    _, log = generate(tmp_path)
+
+    assert log == "Updated deployment descriptors: mqtt-broker\n"
+    mosquitto = read_descriptor(deployment_dir, "mqtt-broker")
+    assert mosquitto["image"] == {"name": "mosquitto:2.0.18"}
+
+
+def test_generate__disabled__descriptor_removed(runtime_file, tmp_path):
+    deployment_dir, _ = generate(tmp_path)
+    runtime = json.loads(json.dumps(RUNTIME))
+    runtime[0]["config"].append({"key": "enabled", "value": "false"})
+    runtime_file.write_text(json.dumps(runtime))
+
+    _, log = generate(tmp_path)
+
+    assert log == "Updated deployment descriptors: mqtt-broker\n"
+    assert os.listdir(deployment_dir) == ["vehicledatabroker.json"]
+    assert get_deployed_containers(deployment_dir) == LEGACY_CONTAINER_NAMES + [
+        "mqtt-broker",
+        "vehicledatabroker",
+    ]
+
+
+def test_get_mount_point__options():
+    assert get_mount_point("service", "/src:/dst:rshared,rw") == {
+        "destination": "/dst",
+        "source": "/src",
+        "propagation_mode": "rshared",
+    }
+    with pytest.raises(ValueError, match="'ro' of service 'service'"):
+        get_mount_point("service", "/src:/dst:ro")
+    with pytest.raises(ValueError, match="Invalid mount"):
+        get_mount_point("service", "/src")
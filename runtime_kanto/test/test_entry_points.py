@@ -0,0 +1,99 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import re
+import subprocess
+import sys
+from typing import Dict
+
+import pytest
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+RUNTIME_DIR = os.path.join(SRC_DIR, "runtime")
+APP_DEPLOYMENT_DIR = os.path.join(SRC_DIR, "app_deployment")
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+\d+ \| +(\S+)")
+# imported by every command, but not part of this package
+BASELINE_IMPORTS = "import velocitas_lib.docker, velocitas_lib.services"
+# only needed if stdout is a TTY respectively if the app is not built yet
+DEFERRED_MODULES = ["yaspin", "build_vehicleapp"]
+RUNS = 3
+
+
+def get_import_times(code: str, pycache_dir: str) -> Dict[str, int]:
+    """Return the self import time [in us] of each module imported by the
+    given code, measured with 'python -X importtime'."""
+    env = {
+        name: value
+        for name, value in os.environ.items()
+        if name != "PYTHONDONTWRITEBYTECODE"
+    }
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-X",
+            f"pycache_prefix={pycache_dir}",
+            "-c",
+            code,
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+    return {
+        match.group(2): int(match.group(1))
+        for match in map(IMPORT_TIME_LINE.match, result.stderr.splitlines())
+        if match
+    }
+
+
+@pytest.mark.parametrize(
+    "script_dir, command, budget_ms",
+    [
+        (RUNTIME_DIR, "runtime_up", 15),
+        (RUNTIME_DIR, "runtime_down", 15),
+        (APP_DEPLOYMENT_DIR, "deploy_vehicleapp", 15),
+        (APP_DEPLOYMENT_DIR, "build_vehicleapp", 15),
+    ],
+)
+def test_entry_point__import_time__within_budget(
+    tmp_path, script_dir, command, budget_ms
+):
+    code = f"import sys; sys.path.insert(0, {script_dir!r}); __import__({command!r})"
+    # the first runs populate the bytecode cache, like for installed packages
+    baseline = get_import_times(BASELINE_IMPORTS, str(tmp_path))
+    get_import_times(code, str(tmp_path))
+
+    import_times = [get_import_times(code, str(tmp_path)) for _ in range(RUNS)]
+
+    assert command in import_times[0]
+    for module in DEFERRED_MODULES:
+        assert module == command or module not in import_times[0]
+    own_import_ms = min(
+        sum(time for module, time in times.items() if module not in baseline) / 1000
+        for times in import_times
+    )
+    assert own_import_ms <= budget_ms
+
+
+def test_runtime__import__does_not_load_app_deployment(tmp_path):
+    code = f"import sys; sys.path.insert(0, {RUNTIME_DIR!r}); import runtime"
+
+    import_times = get_import_times(code, str(tmp_path))
+
+    assert "runtime" in import_times
+    assert "deploy_vehicleapp" not in import_times
@@ -0,0 +1,79 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import json
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from threading import Thread
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "app_deployment"))
+
+import image_digests  # noqa: E402
+from image_digests import get_registry_digests  # noqa: E402
+
+MANIFEST = {
+    "schemaVersion": 2,
+    "mediaType": "application/vnd.docker.distribution.manifest.v2+json",
+    "config": {"digest": "sha256:config"},
+    "layers": [],
+}
+
+
+class FakeRegistry(BaseHTTPRequestHandler):
+    def do_GET(self):  # noqa: N802 name given by BaseHTTPRequestHandler
+        if self.path != "/v2/app/manifests/local":
+            self.send_error(404)
+            return
+        body = json.dumps(MANIFEST).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", str(MANIFEST["mediaType"]))
+        self.send_header("Docker-Content-Digest", "sha256:manifest")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_):
+        pass
+
+
+@pytest.fixture()
+def registry(monkeypatch):
+    server = HTTPServer(("127.0.0.1", 0), FakeRegistry)
+    thread = Thread(target=server.serve_forever)
+    thread.start()
+    monkeypatch.setattr(
+        image_digests, "APP_REGISTRY", f"127.0.0.1:{server.server_port}"
+    )
+    yield
+    server.shutdown()
+    thread.join()
+    server.server_close()
+
+
+def test_get_registry_digests(registry):
+    assert get_registry_digests("app") == {"sha256:manifest", "sha256:config"}
+
+
+def test_get_registry_digests__unknown_image(registry):
+    assert get_registry_digests("other") == set()
+
+
+def test_get_registry_digests__registry_unreachable(registry, monkeypatch):
+    monkeypatch.setattr(image_digests, "APP_REGISTRY", "127.0.0.1:1")
+
+    assert get_registry_digests("app") == set()
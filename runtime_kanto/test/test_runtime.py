@@ -0,0 +1,94 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "runtime"))
+
+import runtime  # noqa: E402
+from deployment_descriptors import (  # noqa: E402
+    generate_deployment_descriptors,
+    get_deployed_containers,
+    get_deployment_dir,
+)
+from runtime import remove_container, remove_stale_containers  # noqa: E402
+
+# records the calls
+FAKE_KANTO_CM = """#!/bin/sh
+echo "$@" >> "$(dirname "$0")/calls.txt"
+"""
+
+
+def service_spec(service_id, enabled=True):
+    return {
+        "id": service_id,
+        "config": [
+            {"key": "image", "value": f"{service_id}:latest"},
+            {"key": "enabled", "value": "true" if enabled else "false"},
+        ],
+    }
+
+
+@pytest.fixture()
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.setenv("VELOCITAS_PACKAGE_DIR", str(tmp_path))
+    monkeypatch.setenv("VELOCITAS_WORKSPACE_DIR", str(tmp_path))
+    monkeypatch.setenv("VELOCITAS_CACHE_DATA", "{}")
+    monkeypatch.setenv("runtimeFilePath", "runtime.json")
+    monkeypatch.setenv("VELOCITAS_APP_MANIFEST", json.dumps({"name": "App"}))
+    kanto_cm = tmp_path / "kanto-cm"
+    kanto_cm.write_text(FAKE_KANTO_CM)
+    kanto_cm.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setattr(runtime, "remove_vehicleapp", lambda *_: None)
+
+    log_output = open(tmp_path / "log.txt", "w", encoding="utf-8")
+
+    def deploy(*services):
+        (tmp_path / "runtime.json").write_text(json.dumps(list(services)))
+        generate_deployment_descriptors(log_output)
+
+    yield deploy, log_output
+    log_output.close()
+
+
+def read_removed(tmp_path):
+    calls = (tmp_path / "calls.txt").read_text().splitlines()
+    return [call.removeprefix("remove -f -n ") for call in calls]
+
+
+def test_remove_stale_containers__removes_legacy_and_disabled(workspace, tmp_path):
+    deploy, log_output = workspace
+    deploy(service_spec("broker"), service_spec("feeder"))
+    deploy(service_spec("broker"), service_spec("feeder", enabled=False))
+
+    remove_stale_containers(log_output)
+
+    assert read_removed(tmp_path) == ["databroker", "mosquitto", "feeder"]
+    assert get_deployed_containers(get_deployment_dir()) == ["broker"]
+
+
+def test_remove_container__removes_recorded_containers(workspace, tmp_path):
+    deploy, log_output = workspace
+    deploy(service_spec("broker"), service_spec("feeder"))
+    deploy(service_spec("broker"))
+
+    remove_container(log_output)
+
+    assert read_removed(tmp_path) == ["databroker", "mosquitto", "broker", "feeder"]
+    assert get_deployed_containers(get_deployment_dir()) == []
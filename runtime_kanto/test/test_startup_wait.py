@@ -0,0 +1,68 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "runtime"))
+
+from startup_wait import wait_for_path  # noqa: E402
+
+
+@pytest.fixture()
+def processes():
+    started = []
+
+    def start(script: str) -> subprocess.Popen:
+        process = subprocess.Popen(["sh", "-c", script])
+        started.append(process)
+        return process
+
+    yield start
+
+    for process in started:
+        process.kill()
+        process.wait()
+
+
+def test_wait_for_path__created_in_new_directory(tmp_path, processes):
+    path = tmp_path / "run" / "container-management" / "cm.sock"
+    process = processes(f"sleep 0.2; mkdir -p {path.parent}; touch {path}; sleep 10")
+    start = time.monotonic()
+
+    wait_for_path(str(path), process, time.monotonic() + 5)
+
+    assert path.exists()
+    assert time.monotonic() - start < 1
+
+
+def test_wait_for_path__process_exits(tmp_path, processes):
+    process = processes("sleep 0.2; exit 3")
+    start = time.monotonic()
+
+    with pytest.raises(RuntimeError, match="unexpectedly exited with 3"):
+        wait_for_path(str(tmp_path / "cm.sock"), process, time.monotonic() + 5)
+    assert time.monotonic() - start < 1
+
+
+def test_wait_for_path__deadline(tmp_path, processes):
+    process = processes("sleep 10")
+
+    with pytest.raises(RuntimeError, match="Timeout reached"):
+        wait_for_path(str(tmp_path / "cm.sock"), process, time.monotonic() + 0.2)
@@ -0,0 +1,107 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src", "runtime"))
+
+from vehicleapp_container import (  # noqa: E402
+    get_imported_image_id,
+    get_vehicleapp_image_digest,
+    import_vehicleapp_image,
+    remove_vehicleapp,
+)
+
+# records the calls, 'ctr i import' stores the imported archive, 'ctr i ls'
+# prints the images of images.txt and Kanto has no containers
+FAKE_TOOLS = {
+    "sudo": 'exec "$@"\n',
+    "kanto-cm": "exit 1\n",
+    "docker": 'echo "$@" >> "$(dirname "$0")/calls.txt"\necho "image archive"\n',
+    "ctr": """echo "$@" >> "$(dirname "$0")/calls.txt"
+if [ "$6" = import ]; then
+    cat > "$(dirname "$0")/imported.tar"
+elif [ "$6" = ls ] && [ "$7" = -q ]; then
+    cut -d " " -f 1 "$(dirname "$0")/images.txt"
+elif [ "$6" = ls ]; then
+    echo "REF TYPE DIGEST SIZE PLATFORMS LABELS"
+    cat "$(dirname "$0")/images.txt"
+fi
+""",
+}
+IMAGES = """\
+localhost:12345/other:local application/vnd.oci.image.manifest.v1+json \
+sha256:other 1.0 MiB linux/amd64 -
+localhost:12345/app:local application/vnd.oci.image.manifest.v1+json \
+sha256:manifest 52.3 MiB linux/amd64 \
+io.cri-containerd.image=managed,org.eclipse.velocitas.image-id=sha256:id
+"""
+
+
+@pytest.fixture()
+def tools(tmp_path, monkeypatch):
+    for name, script in FAKE_TOOLS.items():
+        tool = tmp_path / name
+        tool.write_text(f"#!/bin/sh\n{script}")
+        tool.chmod(0o755)
+    (tmp_path / "images.txt").write_text(IMAGES)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    return tmp_path
+
+
+def test_get_image_info(tools):
+    image = "localhost:12345/app:local"
+
+    assert get_vehicleapp_image_digest(image, subprocess.DEVNULL) == "sha256:manifest"
+    assert get_imported_image_id(image, subprocess.DEVNULL) == "sha256:id"
+    assert (
+        get_imported_image_id("localhost:12345/other:local", subprocess.DEVNULL) is None
+    )
+    assert get_imported_image_id("unknown", subprocess.DEVNULL) is None
+
+
+def test_import_vehicleapp_image(tools):
+    with open(tools / "log.txt", "w", encoding="utf-8") as log_output:
+        import_vehicleapp_image("localhost:12345/app:local", "sha256:id", log_output)
+
+    assert (tools / "imported.tar").read_text() == "image archive\n"
+    socket_args = "-a /run/docker/containerd/containerd.sock -n kanto-cm"
+    calls = (tools / "calls.txt").read_text().splitlines()
+    # saving and importing run concurrently
+    assert sorted(calls[:2]) == [
+        f"{socket_args} i import -",
+        "save localhost:12345/app:local",
+    ]
+    assert calls[2:] == [
+        f"{socket_args} i label localhost:12345/app:local "
+        "org.eclipse.velocitas.image-id=sha256:id",
+    ]
+
+
+def test_remove_vehicleapp(tools):
+    with open(tools / "log.txt", "w", encoding="utf-8") as log_output:
+        remove_vehicleapp("app", log_output)
+
+    socket_args = "-a /run/docker/containerd/containerd.sock -n kanto-cm"
+    calls = (tools / "calls.txt").read_text().splitlines()
+    assert calls == [
+        f"{socket_args} i ls -q",
+        f"{socket_args} i ls -q",
+        f"{socket_args} i rm localhost:12345/app:local",
+    ]
@@ -0,0 +1,179 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import os
+import subprocess
+from typing import Callable, Dict, List, Optional
+
+from file_watcher import FileWatcher
+
+DEBOUNCE_SEC = 0.1
+STOP_GRACE_PERIOD_SEC = 5.0
+WAIT_INTERVAL_SEC = 0.5
+
+# run by a warm interpreter: imports the modules given as arguments ahead of
+# time, then runs the script (and its arguments) it receives via stdin
+WARM_INTERPRETER_CODE = """
+import importlib, json, os, runpy, sys
+for name in sys.argv[1:]:
+    importlib.import_module(name)
+request = sys.stdin.readline()
+if not request:
+    sys.exit(0)
+sys.argv = json.loads(request)
+sys.path[0] = os.path.dirname(os.path.abspath(sys.argv[0]))
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+
+def get_python_script(program_args: List[str]) -> Optional[List[str]]:
+    """Return the script and its arguments, if the program is a Python script
+    run by an interpreter, e.g. 'python3 app/src/main.py'.
+
+    Returns:
+        Optional[List[str]]: The script and its arguments, None otherwise.
+    """
+    if (
+        len(program_args) >= 2
+        and os.path.basename(program_args[0]).startswith("python")
+        and program_args[1].endswith(".py")
+    ):
+        return program_args[1:]
+    return None
+
+
+class AppReloader:
+    """Runs an app and restarts it on demand.
+
+    The environment of the app is computed once, so restarting only costs
+    stopping and spawning the app. For Python scripts, a warm interpreter
+    can be kept in reserve, which has already imported the given modules
+    (e.g. the SDK), so that a restart does not need to import them again.
+    """
+
+    def __init__(
+        self,
+        program_args: List[str],
+        env: Dict[str, str],
+        preload: Optional[List[str]] = None,
+        on_event: Callable[[str], None] = print,
+    ):
+        """
+        Args:
+            program_args: The executable of the app and its arguments.
+            env: The environment of the app.
+            preload: Modules for a warm interpreter to import ahead of time.
+                No warm interpreter is used if empty or if the app is no
+                Python script.
+            on_event: Called with messages about the app.
+        """
+        self.program_args = program_args
+        self.env = env
+        self.preload = preload or []
+        self.on_event = on_event
+        self.process: Optional[subprocess.Popen] = None
+        self._script = get_python_script(program_args)
+        self._warm: Optional[subprocess.Popen] = None
+
+    def start(self) -> None:
+        """Start the app, in the warm interpreter if possible."""
+        warm, self._warm = self._warm, None
+        if warm is not None and warm.poll() is None and warm.stdin is not None:
+            assert self._script is not None
+            warm.stdin.write(json.dumps(self._script) + "\n")
+            warm.stdin.close()
+            self.process = warm
+        else:
+            if warm is not None:
+                self.on_event("Warm interpreter failed, starting the app cold")
+            self.process = subprocess.Popen(self.program_args, env=self.env)
+
+        if self.preload and self._script is not None:
+            self._warm = subprocess.Popen(
+                [self.program_args[0], "-c", WARM_INTERPRETER_CODE, *self.preload],
+                stdin=subprocess.PIPE,
+                env=self.env,
+                text=True,
+            )
+
+    def stop(self) -> Optional[int]:
+        """Stop the app gracefully, killing it if it does not terminate in
+        time.
+
+        Returns:
+            Optional[int]: The exit code of the app, None if it was not started.
+        """
+        if self.process is None:
+            return None
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(STOP_GRACE_PERIOD_SEC)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        return self.process.wait()
+
+    def restart(self) -> None:
+        """Stop the app and start it again."""
+        self.stop()
+        self.start()
+
+    def close(self) -> None:
+        """Stop the app and the warm interpreter."""
+        self.stop()
+        if self._warm is not None:
+            self._warm.kill()
+            self._warm.wait()
+            self._warm = None
+
+
+def watch_app(
+    reloader: AppReloader,
+    paths: List[str],
+    debounce_sec: float = DEBOUNCE_SEC,
+    is_stopping: Callable[[], bool] = lambda: False,
+) -> None:
+    """Run the app and restart it whenever files within the paths change,
+    until stopped.
+
+    Args:
+        reloader: Runs the app.
+        paths: The directories to watch recursively.
+        debounce_sec: Time [in seconds] without changes before restarting.
+        is_stopping: Returns whether to stop watching.
+    """
+    with FileWatcher(paths) as watcher:
+        reloader.start()
+        exit_reported = False
+        try:
+            while not is_stopping():
+                changes = watcher.wait_for_changes(debounce_sec, WAIT_INTERVAL_SEC)
+                if changes:
+                    reloader.on_event(
+                        f"> {len(changes)} file(s) changed, restarting the app"
+                    )
+                    reloader.restart()
+                    exit_reported = False
+                    continue
+
+                assert reloader.process is not None
+                returncode = reloader.process.poll()
+                if returncode is not None and not exit_reported:
+                    reloader.on_event(
+                        f"> App exited with code {returncode}, waiting for changes"
+                    )
+                    exit_reported = True
+        finally:
+            reloader.close()
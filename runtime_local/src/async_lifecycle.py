@@ -0,0 +1,242 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""asyncio API to run and stop services with the docker CLI.
+
+It allows driving many services and their readiness probes from a single
+event loop, e.g. of a test harness. Unlike the synchronous API of local_lib,
+whose processes are supervised and drained by threads, the processes started
+here belong to the running event loop and are drained by its tasks.
+"""
+
+import asyncio
+import time
+from functools import partial
+from io import TextIOBase
+from re import Pattern, compile
+from typing import IO, Callable, List, Optional, Set, Union
+
+from container_backend import get_docker_run_args, get_kill_timeout
+from local_lib import (
+    FINGERPRINT_LABEL,
+    StartupMonitor,
+    get_container_runtime_executable,
+    get_service_fingerprint,
+    get_stop_timeout,
+)
+from log_sink import create_log_sink
+from readiness_probes import (
+    ReadinessProbe,
+    get_readiness_probes,
+    wait_until_ready_async,
+)
+from startup_trace import READY, get_startup_trace
+from velocitas_lib import create_log_file
+from velocitas_lib.services import Service
+
+OUTPUT_CHUNK_SIZE = 64 * 1024
+
+# keeps the tasks draining the outputs of the processes from being collected
+_drain_tasks: Set[asyncio.Task] = set()
+
+
+async def run_service(
+    service: Service, startup_timeout_sec: float = 60
+) -> asyncio.subprocess.Process:
+    """Run a single service, see local_lib.run_service.
+
+    If the startup fails, times out or is cancelled, the service is stopped.
+
+    Args:
+        service: The service.
+        startup_timeout_sec: Timeout [in seconds] for the service to get ready.
+
+    Returns:
+        The docker CLI process running the container of the service.
+    """
+    log = create_log_sink(service.id, "runtime_local")
+    log.write(f"Starting {service.id!r}\n")
+
+    probes = get_readiness_probes(service)
+    patterns: List[Pattern[str]] = []
+    if not probes:
+        patterns = [compile(pattern) for pattern in service.config.startup_log_patterns]
+
+    args = get_docker_run_args(
+        get_container_runtime_executable(),
+        service,
+        {FINGERPRINT_LABEL: get_service_fingerprint(service)},
+    )
+    log.write(" ".join(args) + "\n\n")
+    log.flush()
+
+    trace = get_startup_trace()
+    with trace.phase(service.id, "spawn"):
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            start_new_session=True,
+        )
+    try:
+        with trace.phase(service.id, "startup"):
+            await wait_ready(
+                process,
+                log,
+                patterns,
+                startup_timeout_sec,
+                probes,
+                on_event=partial(trace.instant, service.id),
+            )
+    except BaseException:
+        # shielded, so a cancellation does not leave the container behind
+        await asyncio.shield(_discard(service, process))
+        raise
+    trace.instant(service.id, READY)
+    return process
+
+
+async def wait_ready(
+    process: asyncio.subprocess.Process,
+    log: TextIOBase,
+    patterns: List[Pattern[str]],
+    timeout_sec: float,
+    probes: Optional[List[ReadinessProbe]] = None,
+    on_event: Callable[[str], None] = lambda _: None,
+) -> None:
+    """Wait for the process to match all its startup patterns and to pass
+    all its readiness probes, see local_lib.monitor_startup.
+
+    The outputs of the process keep being drained into the log afterwards.
+
+    Args:
+        process: The started process, with its outputs piped to stdout.
+        log: Log to tee the outputs into.
+        patterns: Startup patterns which all need to match.
+        timeout_sec: Timeout [in seconds] for matching and probing.
+        probes: Readiness probes to run after all patterns matched.
+        on_event: Called with the startup milestones of the process.
+
+    Raises:
+        RuntimeError: If the process terminated or the timeout was reached.
+    """
+    assert process.stdout is not None
+    if probes is None:
+        probes = []
+    deadline = time.monotonic() + timeout_sec
+    monitor = StartupMonitor(log, patterns, on_event)
+    started = asyncio.Event()
+    if monitor.is_started():
+        # without patterns, e.g. if probed, a silent process is started
+        started.set()
+    closed = asyncio.Event()
+    drain_task = asyncio.create_task(_drain(process.stdout, monitor, started, closed))
+    _drain_tasks.add(drain_task)
+    drain_task.add_done_callback(_drain_tasks.discard)
+
+    try:
+        await asyncio.wait_for(started.wait(), timeout_sec)
+        is_ready = monitor.terminated or await wait_until_ready_async(
+            probes, deadline - time.monotonic(), closed
+        )
+    except asyncio.TimeoutError:
+        is_ready = False
+    if monitor.terminated:
+        raise RuntimeError("Service unexpectedly terminated")
+    if not is_ready:
+        process.kill()
+        raise RuntimeError(
+            f"Timeout reached after {timeout_sec} seconds, service killed!"
+        )
+    if probes:
+        on_event("probes passed")
+
+
+async def _drain(
+    output: asyncio.StreamReader,
+    monitor: StartupMonitor,
+    started: asyncio.Event,
+    closed: asyncio.Event,
+) -> None:
+    while chunk := await output.read(OUTPUT_CHUNK_SIZE):
+        monitor.feed(chunk)
+        if monitor.is_started():
+            started.set()
+    monitor.close()
+    started.set()
+    closed.set()
+
+
+async def _discard(service: Service, process: asyncio.subprocess.Process) -> None:
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+        await process.wait()
+    # keeps the log of the failed startup
+    await _stop_container(service, asyncio.subprocess.DEVNULL)
+
+
+async def stop_service(service: Service) -> None:
+    """Stop the given service, see local_lib.stop_service.
+
+    If stopping does not finish in time, the container is killed. If the
+    call is cancelled, the docker CLI process is killed.
+
+    Args:
+        service: The service to stop.
+    """
+    with create_log_file(service.id, "runtime_local") as log:
+        log.write(f"Stopping {service.id!r}\n")
+        log.flush()
+        await _stop_container(service, log)
+
+
+async def _stop_container(service: Service, log: Union[IO[str], int]) -> None:
+    executable = get_container_runtime_executable()
+    timeout_sec = get_stop_timeout(service)
+    time_args = [] if timeout_sec is None else ["--time", str(timeout_sec)]
+    if not await _run(
+        [executable, "stop", *time_args, service.id],
+        log,
+        get_kill_timeout(timeout_sec),
+    ):
+        if not isinstance(log, int):
+            log.write(f"Stopping {service.id} timed out, killing it\n")
+            log.flush()
+        await _run([executable, "kill", service.id], log, None)
+
+
+async def _run(
+    args: List[str], log: Union[IO[str], int], timeout_sec: Optional[float]
+) -> bool:
+    """Run the command, killing it on timeout or cancellation.
+
+    Returns:
+        bool: False if the timeout was reached, True otherwise.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *args, stdin=asyncio.subprocess.DEVNULL, stdout=log, stderr=log
+    )
+    try:
+        await asyncio.wait_for(process.wait(), timeout_sec)
+        return True
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await asyncio.shield(process.wait())
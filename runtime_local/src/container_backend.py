@@ -0,0 +1,808 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import http.client
+import json
+import os
+import re
+import socket
+import subprocess
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from io import TextIOBase
+from queue import Empty, LifoQueue
+from threading import Event, Thread
+from typing import IO, Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+from urllib.parse import quote, urlencode
+
+from velocitas_lib.services import Service
+
+DEFAULT_DOCKER_SOCKET = "/var/run/docker.sock"
+API_POOL_SIZE = 8
+API_TIMEOUT_SEC = 30
+DEFAULT_STOP_TIMEOUT_SEC = 10
+# time granted to the engine on top of the stop timeout before escalating to kill
+STOP_KILL_GRACE_SEC = 10
+
+# Progress line of a layer printed by 'docker pull', e.g. "a1b2c3d4e5f6: Pull complete"
+CLI_LAYER_PROGRESS_PATTERN = re.compile(r"^([0-9a-f]{12}): (.+)$")
+
+# Stream types of the multiplexed log stream of the Docker Engine API
+STREAM_STDOUT = 1
+STREAM_STDERR = 2
+
+
+def write_log(log: Any, text: str) -> None:
+    """Write the text to the log, if the log is a writable stream.
+
+    Args:
+        log: Log stream, DEVNULL or None.
+        text: The text to write.
+    """
+    if hasattr(log, "write"):
+        log.write(text)
+
+
+class ContainerProcess:
+    """Represents a container started via the Docker Engine API.
+
+    Provides the subset of the subprocess.Popen interface used to manage
+    the processes of the services.
+    """
+
+    def __init__(self, client: "DockerApiClient", container_id: str, args: List[str]):
+        self.args = args
+        self.container_id = container_id
+        self.returncode: Optional[int] = None
+        self._client = client
+        self._exited = Event()
+        self._wait_ready = Event()
+        Thread(target=self._wait_for_exit, daemon=True).start()
+        self._wait_ready.wait()
+
+    def _wait_for_exit(self) -> None:
+        connection = self._client.create_connection(timeout=None)
+        try:
+            connection.request(
+                "POST", f"/containers/{self.container_id}/wait?condition=removed"
+            )
+            self._wait_ready.set()
+            response = connection.getresponse()
+            body = response.read()
+            status_code = -1
+            if response.status == 200:
+                status_code = json.loads(body).get("StatusCode", -1)
+            self.returncode = status_code
+        except OSError:
+            self.returncode = -1
+        finally:
+            self._wait_ready.set()
+            connection.close()
+            self._exited.set()
+
+    def poll(self) -> Optional[int]:
+        """Return the exit code of the container, or None if it is running."""
+        return self.returncode if self._exited.is_set() else None
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        """Wait for the container to exit and return its exit code."""
+        if not self._exited.wait(timeout):
+            raise subprocess.TimeoutExpired(self.args, timeout or 0)
+        assert self.returncode is not None
+        return self.returncode
+
+    def send_signal(self, signal_name: str) -> None:
+        """Send the signal to the main process of the container."""
+        if self._exited.is_set():
+            return
+        self._client.request(
+            "POST",
+            f"/containers/{self.container_id}/kill?signal={signal_name}",
+            expected=(204, 404, 409),
+        )
+
+    def terminate(self) -> None:
+        """Terminate the container with SIGTERM."""
+        self.send_signal("SIGTERM")
+
+    def kill(self) -> None:
+        """Kill the container with SIGKILL."""
+        self.send_signal("SIGKILL")
+
+
+ServiceProcess = Union[subprocess.Popen, ContainerProcess]
+
+
+class ContainerState(NamedTuple):
+    id: str
+    running: bool
+    image_id: str
+    labels: Dict[str, str]
+    # of the main process of the container, 0 if not running
+    pid: int = 0
+
+
+class PullProgress(NamedTuple):
+    layer: str
+    status: str
+    current: int = 0
+    total: int = 0
+
+
+def get_kill_timeout(timeout_sec: Optional[int]) -> int:
+    """Return the time [in seconds] after which stopping a container with the
+    given stop timeout is considered hung and escalated to kill."""
+    if timeout_sec is None:
+        timeout_sec = DEFAULT_STOP_TIMEOUT_SEC
+    return timeout_sec + STOP_KILL_GRACE_SEC
+
+
+class ContainerBackend(ABC):
+    """Interface of the container engines services can be run with."""
+
+    @abstractmethod
+    def start_container(
+        self, service: Service, log: TextIOBase, labels: Optional[Dict[str, str]] = None
+    ) -> Tuple[ServiceProcess, IO[bytes]]:
+        """Create and start the container of the service.
+
+        Args:
+            service: The service to start.
+            log: Log stream of the service.
+            labels: Labels to attach to the container.
+
+        Returns:
+            Tuple[ServiceProcess, IO[bytes]]: The process representing the
+                running container and the readable end of a pipe delivering
+                its outputs (stdout + stderr).
+        """
+
+    @abstractmethod
+    def attach_container(self, name: str) -> Tuple[ServiceProcess, IO[bytes]]:
+        """Attach to the outputs of an already running container.
+
+        Args:
+            name: The name of the container.
+
+        Returns:
+            Tuple[ServiceProcess, IO[bytes]]: See start_container. Only outputs
+                produced from now on are delivered.
+        """
+
+    @abstractmethod
+    def stop_container(
+        self, name: str, log: Any = None, timeout_sec: Optional[int] = None
+    ) -> None:
+        """Stop the container with the given name.
+
+        The container is killed if it did not exit within the timeout.
+
+        Args:
+            name: The name of the container to stop.
+            log: Log stream to forward the outputs to.
+            timeout_sec: Grace period [in seconds] between SIGTERM and SIGKILL,
+                None for the default of the engine.
+        """
+
+    def stop_containers(
+        self, timeouts: Dict[str, Optional[int]], log: Any = None
+    ) -> None:
+        """Stop the containers with the given names concurrently.
+
+        Args:
+            timeouts: Maps the names of the containers to stop to their
+                timeouts, see stop_container.
+            log: Log stream to forward the outputs to.
+        """
+        if not timeouts:
+            return
+        with ThreadPoolExecutor(max_workers=len(timeouts)) as executor:
+            futures = [
+                executor.submit(self.stop_container, name, log, timeout_sec)
+                for name, timeout_sec in timeouts.items()
+            ]
+            # consume all results to propagate the first error
+            for future in futures:
+                future.result()
+
+    @abstractmethod
+    def list_running_containers(self) -> List[str]:
+        """Return the names of all running containers."""
+
+    @abstractmethod
+    def inspect_container(self, name: str) -> Optional[ContainerState]:
+        """Return the state of the container or None, if it does not exist.
+
+        Args:
+            name: The name of the container.
+        """
+
+    @abstractmethod
+    def get_image_id(self, image: str) -> Optional[str]:
+        """Return the ID of the local image or None, if it is not present.
+
+        Args:
+            image: The reference of the image.
+        """
+
+    @abstractmethod
+    def pull_image(
+        self, image: str, on_progress: Callable[[PullProgress], None] = lambda _: None
+    ) -> None:
+        """Pull the image from its registry.
+
+        Args:
+            image: The reference of the image to pull.
+            on_progress: Called for each progress update of a layer. Progress
+                updates of the image itself have an empty layer.
+
+        Raises:
+            RuntimeError: If the image could not be pulled.
+        """
+
+
+def parse_container_state(inspect_result: Dict[str, Any]) -> ContainerState:
+    """Parse the result of inspecting a container.
+
+    Args:
+        inspect_result: The inspect result as returned by the Docker Engine.
+    """
+    return ContainerState(
+        id=inspect_result["Id"],
+        running=inspect_result["State"]["Running"],
+        image_id=inspect_result.get("Image", ""),
+        labels=inspect_result["Config"].get("Labels") or {},
+        pid=inspect_result["State"].get("Pid", 0),
+    )
+
+
+def get_docker_run_args(
+    executable: str, service: Service, labels: Optional[Dict[str, str]] = None
+) -> List[str]:
+    """Return the command line to run the service with the docker CLI.
+
+    Args:
+        executable: The docker executable.
+        service: The service to run.
+        labels: Labels to attach to the container.
+    """
+    label_args = []
+    for key, value in (labels or {}).items():
+        label_args.append("--label")
+        label_args.append(f"{key}={value}")
+
+    port_forward_args = []
+    for port_forward in service.config.port_forwards:
+        port_forward_args.append("-p")
+        port_forward_args.append(port_forward)
+
+    mount_args = []
+    for mount in service.config.mounts:
+        mount_args.append("-v")
+        mount_args.append(mount)
+
+    env_forward_args = []
+    for key, value in service.config.env_vars.items():
+        env_forward_args.append("-e")
+        if value:
+            env_forward_args.append(f"{key}={value}")
+        else:
+            env_forward_args.append(f"{key}")
+
+    return [
+        executable,
+        "run",
+        "--rm",
+        "--init",
+        "--name",
+        service.id,
+        *label_args,
+        *env_forward_args,
+        *port_forward_args,
+        *mount_args,
+        "--network",
+        "host",
+        service.config.image,
+        *service.config.args,
+    ]
+
+
+class DockerCliBackend(ContainerBackend):
+    """Runs containers by invoking the docker CLI."""
+
+    def __init__(self, executable: str):
+        self.executable = executable
+
+    def _spawn(self, args: List[str]) -> Tuple[ServiceProcess, IO[bytes]]:
+        process = subprocess.Popen(
+            args,
+            start_new_session=True,
+            stderr=subprocess.STDOUT,
+            stdout=subprocess.PIPE,
+        )
+        assert process.stdout is not None
+        return process, process.stdout
+
+    def start_container(
+        self, service: Service, log: TextIOBase, labels: Optional[Dict[str, str]] = None
+    ) -> Tuple[ServiceProcess, IO[bytes]]:
+        args = get_docker_run_args(self.executable, service, labels)
+        log.write(" ".join(args) + "\n\n")
+        log.flush()
+        return self._spawn(args)
+
+    def attach_container(self, name: str) -> Tuple[ServiceProcess, IO[bytes]]:
+        since = str(int(time.time()))
+        return self._spawn(
+            [self.executable, "logs", "--follow", "--since", since, name]
+        )
+
+    def stop_container(
+        self, name: str, log: Any = None, timeout_sec: Optional[int] = None
+    ) -> None:
+        self.stop_containers({name: timeout_sec}, log)
+
+    def stop_containers(
+        self, timeouts: Dict[str, Optional[int]], log: Any = None
+    ) -> None:
+        # one batched call per distinct timeout, all of them running concurrently
+        batches: Dict[Optional[int], List[str]] = {}
+        for name, timeout_sec in timeouts.items():
+            batches.setdefault(timeout_sec, []).append(name)
+
+        processes: List[Tuple[subprocess.Popen, List[str], Optional[int]]] = []
+        for timeout_sec, names in batches.items():
+            timeout_args = (
+                ["--time", str(timeout_sec)] if timeout_sec is not None else []
+            )
+            process = subprocess.Popen(
+                [self.executable, "stop", *timeout_args, *names],
+                stderr=subprocess.STDOUT,
+                stdout=log,
+            )
+            processes.append((process, names, timeout_sec))
+
+        for process, names, timeout_sec in processes:
+            try:
+                process.wait(get_kill_timeout(timeout_sec))
+            except subprocess.TimeoutExpired:
+                process.kill()
+                subprocess.call(
+                    [self.executable, "kill", *names],
+                    stderr=subprocess.STDOUT,
+                    stdout=log,
+                )
+
+    def list_running_containers(self) -> List[str]:
+        result = subprocess.run(
+            [self.executable, "ps", "--format", "{{.Names}}"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        return result.stdout.decode("utf-8").split()
+
+    def inspect_container(self, name: str) -> Optional[ContainerState]:
+        result = subprocess.run(
+            [self.executable, "container", "inspect", name],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        if result.returncode != 0:
+            return None
+        return parse_container_state(json.loads(result.stdout)[0])
+
+    def get_image_id(self, image: str) -> Optional[str]:
+        result = subprocess.run(
+            [self.executable, "image", "inspect", "--format", "{{.Id}}", image],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        if result.returncode != 0:
+            return None
+        return result.stdout.decode("utf-8").strip()
+
+    def pull_image(
+        self, image: str, on_progress: Callable[[PullProgress], None] = lambda _: None
+    ) -> None:
+        process = subprocess.Popen(
+            [self.executable, "pull", image],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        assert process.stdout is not None
+        output = []
+        for raw_line in process.stdout:
+            line = raw_line.decode("utf-8", errors="replace").strip()
+            output.append(line)
+            match = CLI_LAYER_PROGRESS_PATTERN.match(line)
+            if match:
+                on_progress(PullProgress(layer=match.group(1), status=match.group(2)))
+            elif line:
+                on_progress(PullProgress(layer="", status=line))
+        if process.wait() != 0:
+            raise RuntimeError(f"Pulling {image!r} failed: {output[-1:]}")
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a unix domain socket."""
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = API_TIMEOUT_SEC):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class DockerApiError(RuntimeError):
+    """Raised if the Docker Engine API responded with an unexpected status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class DockerApiClient:
+    """Minimal client of the Docker Engine API keeping its connections alive.
+
+    Idle connections are kept in a pool, so consecutive requests do not pay
+    for connecting to the daemon.
+    """
+
+    def __init__(self, socket_path: str, pool_size: int = API_POOL_SIZE):
+        self.socket_path = socket_path
+        self._pool: LifoQueue[UnixHTTPConnection] = LifoQueue(maxsize=pool_size)
+
+    def create_connection(
+        self, timeout: Optional[float] = API_TIMEOUT_SEC
+    ) -> UnixHTTPConnection:
+        """Create a new, unpooled connection, e.g. for streaming requests."""
+        return UnixHTTPConnection(self.socket_path, timeout)
+
+    def _acquire(self) -> Tuple[UnixHTTPConnection, bool]:
+        try:
+            return self._pool.get_nowait(), True
+        except Empty:
+            return self.create_connection(), False
+
+    def _release(self, connection: UnixHTTPConnection) -> None:
+        try:
+            self._pool.put_nowait(connection)
+        except Exception:
+            connection.close()
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[Dict[str, Any]] = None,
+        expected: Tuple[int, ...] = (200, 201, 204),
+        timeout: float = API_TIMEOUT_SEC,
+    ) -> Tuple[int, Any]:
+        """Send a request and return the status and the decoded JSON response.
+
+        Args:
+            method: The HTTP method.
+            path: The path of the endpoint including the query.
+            body: The JSON body to send.
+            expected: The status codes which are no errors.
+            timeout: Timeout [in seconds] of the request.
+
+        Raises:
+            DockerApiError: If the response status is not expected.
+        """
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        while True:
+            connection, reused = self._acquire()
+            connection.timeout = timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(timeout)
+            try:
+                connection.request(method, path, body=payload, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+            except (http.client.RemoteDisconnected, ConnectionError):
+                connection.close()
+                # the daemon may close idle keep-alive connections at any time
+                if reused:
+                    continue
+                raise
+            except Exception:
+                connection.close()
+                raise
+
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(connection)
+            break
+
+        content: Any = None
+        if data and response.getheader("Content-Type", "").startswith(
+            "application/json"
+        ):
+            content = json.loads(data)
+        if response.status not in expected:
+            message = (
+                content.get("message")
+                if isinstance(content, dict)
+                else data.decode("utf-8", errors="replace").strip()
+            )
+            raise DockerApiError(
+                response.status,
+                f"Docker API {method} {path} failed ({response.status}): {message}",
+            )
+        return response.status, content
+
+    def stream(self, method: str, path: str) -> http.client.HTTPResponse:
+        """Send a request whose response is streamed, on a dedicated connection.
+
+        The connection is closed together with the returned response.
+        """
+        connection = self.create_connection(timeout=None)
+        connection.request(method, path)
+        response = connection.getresponse()
+        if response.status != 200:
+            message = response.read().decode("utf-8", errors="replace").strip()
+            connection.close()
+            raise DockerApiError(
+                response.status,
+                f"Docker API {method} {path} failed ({response.status}): {message}",
+            )
+        return response
+
+    def ping(self) -> bool:
+        """Return whether the daemon is reachable."""
+        try:
+            self.request("GET", "/_ping")
+            return True
+        except OSError:
+            return False
+
+
+def demultiplex_stream(response: http.client.HTTPResponse, output_fd: int) -> None:
+    """Copy the payload of a multiplexed Docker stream to the file descriptor.
+
+    Args:
+        response: The streamed response, e.g. of the logs endpoint.
+        output_fd: File descriptor to write stdout and stderr payloads to.
+    """
+    buffer = b""
+    while True:
+        chunk = response.read1(64 * 1024)
+        if not chunk:
+            break
+        buffer += chunk
+        while len(buffer) >= 8:
+            stream_type = buffer[0]
+            size = int.from_bytes(buffer[4:8], "big")
+            if len(buffer) < 8 + size:
+                break
+            if stream_type in (STREAM_STDOUT, STREAM_STDERR):
+                os.write(output_fd, buffer[8 : 8 + size])
+            buffer = buffer[8 + size :]
+
+
+class DockerApiBackend(ContainerBackend):
+    """Runs containers via the HTTP API of the Docker Engine."""
+
+    def __init__(self, socket_path: str = DEFAULT_DOCKER_SOCKET):
+        self.client = DockerApiClient(socket_path)
+
+    def _get_create_config(
+        self, service: Service, labels: Dict[str, str]
+    ) -> Dict[str, Any]:
+        env = []
+        for key, value in service.config.env_vars.items():
+            if value:
+                env.append(f"{key}={value}")
+            elif key in os.environ:
+                # like 'docker run -e KEY' forward the variable of the caller
+                env.append(f"{key}={os.environ[key]}")
+
+        exposed_ports: Dict[str, Dict] = {}
+        port_bindings: Dict[str, List[Dict[str, str]]] = {}
+        for port_forward in service.config.port_forwards:
+            parts = port_forward.split(":")
+            container_port = parts[-1] if "/" in parts[-1] else f"{parts[-1]}/tcp"
+            binding = {"HostPort": parts[-2] if len(parts) > 1 else ""}
+            if len(parts) > 2:
+                binding["HostIp"] = parts[0]
+            exposed_ports[container_port] = {}
+            port_bindings.setdefault(container_port, []).append(binding)
+
+        config: Dict[str, Any] = {
+            "Image": service.config.image,
+            "Labels": labels,
+            "Env": env,
+            "ExposedPorts": exposed_ports,
+            "HostConfig": {
+                "AutoRemove": True,
+                "Init": True,
+                "NetworkMode": "host",
+                "Binds": list(service.config.mounts),
+                "PortBindings": port_bindings,
+            },
+        }
+        if service.config.args:
+            config["Cmd"] = list(service.config.args)
+        return config
+
+    def _create_container(
+        self, service: Service, log: TextIOBase, labels: Dict[str, str]
+    ) -> str:
+        path = f"/containers/create?{urlencode({'name': service.id})}"
+        config = self._get_create_config(service, labels)
+        try:
+            _, content = self.client.request("POST", path, config)
+        except DockerApiError as error:
+            if error.status != 404:
+                raise
+            log.write(f"Unable to find image {service.config.image!r} locally\n")
+            self.pull_image(
+                service.config.image,
+                lambda progress: write_log(log, f"{progress.status}\n"),
+            )
+            _, content = self.client.request("POST", path, config)
+        return content["Id"]
+
+    def pull_image(
+        self, image: str, on_progress: Callable[[PullProgress], None] = lambda _: None
+    ) -> None:
+        response = self.client.stream(
+            "POST", f"/images/create?{urlencode({'fromImage': image})}"
+        )
+        try:
+            for line in response:
+                if not line.strip():
+                    continue
+                progress = json.loads(line)
+                if "error" in progress:
+                    raise RuntimeError(f"Pulling {image!r} failed: {progress['error']}")
+                detail = progress.get("progressDetail") or {}
+                on_progress(
+                    PullProgress(
+                        layer=progress.get("id", ""),
+                        status=progress.get("status", ""),
+                        current=detail.get("current", 0),
+                        total=detail.get("total", 0),
+                    )
+                )
+        finally:
+            response.close()
+
+    def _follow_logs(self, container_id: str, since: int = 0) -> IO[bytes]:
+        read_fd, write_fd = os.pipe()
+        logs = self.client.stream(
+            "GET",
+            f"/containers/{container_id}/logs?follow=1&stdout=1&stderr=1&since={since}",
+        )
+
+        def forward_logs():
+            try:
+                demultiplex_stream(logs, write_fd)
+            except OSError:
+                pass
+            finally:
+                logs.close()
+                os.close(write_fd)
+
+        Thread(target=forward_logs, daemon=True).start()
+        return os.fdopen(read_fd, "rb", buffering=0)
+
+    def start_container(
+        self, service: Service, log: TextIOBase, labels: Optional[Dict[str, str]] = None
+    ) -> Tuple[ServiceProcess, IO[bytes]]:
+        args = get_docker_run_args("docker", service, labels)
+        log.write(" ".join(args) + "\n\n")
+        log.flush()
+
+        container_id = self._create_container(service, log, labels or {})
+        try:
+            self.client.request("POST", f"/containers/{container_id}/start")
+        except Exception:
+            # unlike one that ran, a container which failed to start is not
+            # removed automatically and would block the next start
+            self.client.request(
+                "DELETE", f"/containers/{container_id}?force=1", expected=(204, 404)
+            )
+            raise
+        process = ContainerProcess(self.client, container_id, args)
+        return process, self._follow_logs(container_id)
+
+    def attach_container(self, name: str) -> Tuple[ServiceProcess, IO[bytes]]:
+        state = self.inspect_container(name)
+        if state is None:
+            raise RuntimeError(f"No such container: {name}")
+        process = ContainerProcess(self.client, state.id, ["docker", "attach", name])
+        return process, self._follow_logs(state.id, since=int(time.time()))
+
+    def stop_container(
+        self, name: str, log: Any = None, timeout_sec: Optional[int] = None
+    ) -> None:
+        path = f"/containers/{quote(name)}/stop"
+        if timeout_sec is not None:
+            path += f"?t={timeout_sec}"
+        try:
+            status, _ = self.client.request(
+                "POST",
+                path,
+                expected=(204, 304, 404),
+                timeout=get_kill_timeout(timeout_sec),
+            )
+        except TimeoutError:
+            write_log(log, f"Stopping {name} timed out, killing it\n")
+            status, _ = self.client.request(
+                "POST", f"/containers/{quote(name)}/kill", expected=(204, 404, 409)
+            )
+        if status == 404:
+            write_log(log, f"Error response from daemon: No such container: {name}\n")
+        else:
+            write_log(log, f"{name}\n")
+
+    def list_running_containers(self) -> List[str]:
+        _, content = self.client.request("GET", "/containers/json")
+        return [
+            container_name.removeprefix("/")
+            for container in content
+            for container_name in container["Names"]
+        ]
+
+    def inspect_container(self, name: str) -> Optional[ContainerState]:
+        status, content = self.client.request(
+            "GET", f"/containers/{quote(name)}/json", expected=(200, 404)
+        )
+        return parse_container_state(content) if status == 200 else None
+
+    def get_image_id(self, image: str) -> Optional[str]:
+        status, content = self.client.request(
+            "GET", f"/images/{quote(image)}/json", expected=(200, 404)
+        )
+        return content["Id"] if status == 200 else None
+
+
+def get_docker_socket_path() -> str:
+    """Return the path of the socket of the Docker Engine API, honoring
+    a DOCKER_HOST pointing to a unix socket."""
+    docker_host = os.getenv("DOCKER_HOST", "")
+    if docker_host.startswith("unix://"):
+        return docker_host.removeprefix("unix://")
+    return DEFAULT_DOCKER_SOCKET
+
+
+def create_container_backend(kind: str, executable: str) -> ContainerBackend:
+    """Create the container backend of the given kind.
+
+    Args:
+        kind: 'api' for the Docker Engine API, 'cli' for the docker CLI or
+            'auto' to use the API if the daemon is reachable via a local
+            socket and the CLI otherwise.
+        executable: The executable used by the CLI backend.
+    """
+    if kind not in ("api", "cli", "auto"):
+        raise ValueError(f"Unsupported container backend: {kind!r}")
+    if kind == "api":
+        return DockerApiBackend(get_docker_socket_path())
+
+    docker_host = os.getenv("DOCKER_HOST", "")
+    if kind == "auto" and (not docker_host or docker_host.startswith("unix://")):
+        api_backend = DockerApiBackend(get_docker_socket_path())
+        if api_backend.client.ping():
+            return api_backend
+    return DockerCliBackend(executable)
@@ -0,0 +1,275 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Runs commands of the databroker CLI in a single session.
+
+The CLI only reads its commands from a terminal, so it is run under a pseudo
+terminal, and a command is considered done once the CLI prompts for the next
+one. The CLI can be kept running in a detached container, which later
+invocations attach to, saving the container startup and the connect to the
+databroker. Like run-vehicledatabroker-cli.py, only standard libs are used.
+"""
+
+import codecs
+import os
+import re
+import select
+import subprocess
+import time
+from typing import Iterable, List, NamedTuple, Optional, Pattern, TextIO
+
+SESSION_CONTAINER_NAME = "vehicledatabroker-cli"
+# e.g. "kuksa.val.v1 > " or "sdv.databroker.v1 > "
+DEFAULT_PROMPT = re.compile(r"\S+ > $")
+# escape sequences of colors and cursor movements as well as the markers of
+# invisible prompt characters, which do not belong to the output
+TERMINAL_CONTROL = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]|\x1b[=>]|[\x01\x02\r]")
+DETACH_KEYS = b"\x10\x11"  # ctrl-p ctrl-q
+END_OF_INPUT = b"\x04"  # ctrl-d
+CLOSE_TIMEOUT_SEC = 5
+# the CLI answers input it has queued right after prompting
+QUIET_SEC = 0.5
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class CommandResult(NamedTuple):
+    command: str
+    output: str
+    latency_sec: float
+
+
+class CliSession:
+    """A databroker CLI run under a pseudo terminal."""
+
+    def __init__(
+        self,
+        args: List[str],
+        prompt: Pattern[str] = DEFAULT_PROMPT,
+        close_keys: bytes = END_OF_INPUT,
+    ):
+        """
+        Args:
+            args: The command running the CLI, e.g. 'docker run -it ...'.
+            prompt: Matches the end of the output when the CLI waits for
+                the next command.
+            close_keys: Input which lets the CLI (or the attached client)
+                exit, e.g. DETACH_KEYS for 'docker attach'.
+        """
+        self.prompt = prompt
+        self.close_keys = close_keys
+        self._fd, terminal = os.openpty()
+        try:
+            self._process = subprocess.Popen(
+                args,
+                stdin=terminal,
+                stdout=terminal,
+                stderr=terminal,
+                start_new_session=True,
+            )
+        except BaseException:
+            os.close(self._fd)
+            raise
+        finally:
+            os.close(terminal)
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._output = ""
+
+    def wait_for_prompt(self, timeout_sec: float) -> str:
+        """Wait for the CLI to prompt for the next command.
+
+        Returns:
+            str: The output up to the prompt, without terminal controls.
+
+        Raises:
+            RuntimeError: If the CLI terminated or the timeout was reached.
+        """
+        deadline = time.monotonic() + timeout_sec
+        while (match := self.prompt.search(self._output)) is None:
+            remaining_sec = deadline - time.monotonic()
+            if remaining_sec <= 0:
+                raise RuntimeError(
+                    f"Timeout reached after {timeout_sec} seconds, "
+                    "the databroker CLI did not prompt for the next command"
+                )
+            if not select.select([self._fd], [], [], remaining_sec)[0]:
+                continue
+            try:
+                chunk = os.read(self._fd, READ_CHUNK_SIZE)
+            except OSError:
+                # EIO once the CLI closed its side of the terminal
+                chunk = b""
+            if not chunk:
+                raise RuntimeError("Databroker CLI unexpectedly terminated")
+            self._output += TERMINAL_CONTROL.sub("", self._decoder.decode(chunk))
+
+        output = self._output[: match.start()]
+        self._output = self._output[match.end() :]
+        return output
+
+    def drain(self, quiet_sec: float = QUIET_SEC) -> None:
+        """Discard the output until the CLI was quiet for the given time, e.g.
+        the prompts answering input sent before the CLI prompted first."""
+        while select.select([self._fd], [], [], quiet_sec)[0]:
+            try:
+                if not os.read(self._fd, READ_CHUNK_SIZE):
+                    break
+            except OSError:
+                break
+        self._decoder.reset()
+        self._output = ""
+
+    def run(self, command: str, timeout_sec: float) -> CommandResult:
+        """Run a command once the CLI prompted for it and wait for the CLI to
+        prompt for the next one.
+
+        Output the CLI prints asynchronously, e.g. the updates of a
+        subscription, becomes part of the output of a later command.
+
+        Raises:
+            RuntimeError: If the CLI terminated or the timeout was reached.
+        """
+        start = time.monotonic()
+        os.write(self._fd, command.encode("utf-8") + b"\r")
+        output = self.wait_for_prompt(timeout_sec)
+        latency_sec = time.monotonic() - start
+
+        # the terminal echoes the command
+        echo, _, output = output.partition("\n")
+        if command not in echo:
+            output = f"{echo}\n{output}"
+        return CommandResult(command, output.rstrip("\n"), latency_sec)
+
+    def close(self) -> None:
+        """Let the CLI exit, killing it if it does not in time."""
+        try:
+            os.write(self._fd, self.close_keys)
+            self._process.wait(CLOSE_TIMEOUT_SEC)
+        except (OSError, subprocess.TimeoutExpired):
+            self._process.kill()
+            self._process.wait()
+        finally:
+            os.close(self._fd)
+
+    def __enter__(self) -> "CliSession":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def get_run_args(executable: str, image: str) -> List[str]:
+    """Return the command running the CLI in a new container, which is
+    removed once the CLI exits."""
+    return [executable, "run", "-it", "--rm", "--network", "host", image]
+
+
+def get_attach_args(executable: str, name: str = SESSION_CONTAINER_NAME) -> List[str]:
+    """Return the command attaching to the CLI kept running in the session
+    container. The client detaches on DETACH_KEYS."""
+    return [executable, "attach", "--detach-keys", "ctrl-p,ctrl-q", name]
+
+
+def is_session_running(executable: str, name: str = SESSION_CONTAINER_NAME) -> bool:
+    """Return whether the CLI session container is running."""
+    result = subprocess.run(
+        [executable, "inspect", "--format", "{{.State.Running}}", name],
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+    )
+    return result.returncode == 0 and result.stdout.strip() == "true"
+
+
+def start_session(
+    executable: str, image: str, name: str = SESSION_CONTAINER_NAME
+) -> bool:
+    """Start the CLI in a detached container, unless it is already running.
+
+    Returns:
+        bool: True if the container was started, False if it was running.
+    """
+    if is_session_running(executable, name):
+        return False
+    # a container left behind, e.g. after the CLI exited
+    stop_session(executable, name)
+    subprocess.check_call(
+        [executable, "run", "-dit", "--name", name, "--network", "host", image],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+    )
+    return True
+
+
+def stop_session(executable: str, name: str = SESSION_CONTAINER_NAME) -> bool:
+    """Remove the CLI session container, if there is one.
+
+    Returns:
+        bool: True if the container was removed, False if there was none.
+    """
+    result = subprocess.run(
+        [executable, "rm", "--force", name],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return result.returncode == 0
+
+
+def parse_script(lines: Iterable[str]) -> List[str]:
+    """Return the CLI commands of a script, one per line. Empty lines and
+    lines starting with '#' are skipped."""
+    commands = (line.strip() for line in lines)
+    return [command for command in commands if command and not command.startswith("#")]
+
+
+def run_batch(
+    session: CliSession,
+    commands: List[str],
+    timeout_sec: float,
+    out: Optional[TextIO] = None,
+) -> List[CommandResult]:
+    """Run the commands one after another in the session.
+
+    Args:
+        session: The session, whose CLI already prompted for a command.
+        commands: The CLI commands, e.g. 'get Vehicle.Speed'.
+        timeout_sec: Timeout [in seconds] of each command.
+        out: If given, each command, its latency and output is printed to it.
+
+    Raises:
+        RuntimeError: If the CLI terminated or a command timed out.
+    """
+    results: List[CommandResult] = []
+    for command in commands:
+        result = session.run(command, timeout_sec)
+        results.append(result)
+        if out is not None:
+            print(f"> {command} ({result.latency_sec * 1000:.1f} ms)", file=out)
+            if result.output:
+                print(result.output, file=out)
+            out.flush()
+    return results
+
+
+def get_summary(results: List[CommandResult]) -> str:
+    """Return the number of commands and their total, mean and max latency."""
+    if not results:
+        return "No commands run"
+    latencies_ms = [result.latency_sec * 1000 for result in results]
+    return (
+        f"{len(results)} commands in {sum(latencies_ms) / 1000:.2f} s "
+        f"(mean {sum(latencies_ms) / len(results):.1f} ms, "
+        f"max {max(latencies_ms):.1f} ms)"
+    )
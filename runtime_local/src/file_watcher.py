@@ -0,0 +1,218 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (
+    IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+)
+EVENT_HEADER = struct.Struct("iIII")
+READ_SIZE = 64 * 1024
+POLL_INTERVAL_SEC = 0.5
+
+IGNORED_DIRS = {"__pycache__", "node_modules"}
+IGNORED_SUFFIXES = (".pyc", ".swp", ".swx", ".tmp", "~")
+
+
+def is_ignored(name: str) -> bool:
+    """Return whether changes of the file or directory with the given name
+    are irrelevant to the app, e.g. bytecode, editor swap files or VCS data."""
+    return (
+        name.startswith(".") or name in IGNORED_DIRS or name.endswith(IGNORED_SUFFIXES)
+    )
+
+
+class FileWatcher:
+    """Watches directory trees for changed files.
+
+    On Linux, inotify notifies about changes without scanning the trees.
+    Elsewhere, or if inotify is unavailable (e.g. its watch limit is
+    reached), the modification times of the files are polled.
+    """
+
+    def __init__(self, paths: List[str]):
+        """
+        Args:
+            paths: The directories to watch recursively.
+        """
+        self._paths = [os.path.abspath(path) for path in paths]
+        self._watches: Dict[int, str] = {}
+        self._fd: Optional[int] = None
+        self._snapshot: Dict[str, Tuple[int, int]] = {}
+        try:
+            self._fd = self._init_inotify()
+        except OSError:
+            self._fd = None
+            self._snapshot = self._scan()
+
+    def __enter__(self) -> "FileWatcher":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop watching."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def read_changes(self, timeout_sec: Optional[float]) -> Set[str]:
+        """Wait for changes for at most the given time.
+
+        Returns:
+            Set[str]: The paths changed, empty if the timeout was reached.
+        """
+        if self._fd is None:
+            return self._poll(timeout_sec)
+        ready, _, _ = select.select([self._fd], [], [], timeout_sec)
+        if not ready:
+            return set()
+        return self._read_events()
+
+    def wait_for_changes(
+        self, debounce_sec: float, timeout_sec: Optional[float]
+    ) -> Set[str]:
+        """Wait for a burst of changes to settle.
+
+        After the first change, changes are collected until none occurred for
+        the debounce time, e.g. while an editor saves several files or a
+        formatter rewrites them.
+
+        Args:
+            debounce_sec: Time [in seconds] without changes ending the burst.
+            timeout_sec: Time [in seconds] to wait for the first change.
+
+        Returns:
+            Set[str]: The paths changed, empty if the timeout was reached.
+        """
+        changes = self.read_changes(timeout_sec)
+        while changes and (more := self.read_changes(debounce_sec)):
+            changes |= more
+        return changes
+
+    def _init_inotify(self) -> int:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch_function = libc.inotify_add_watch
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._fd = fd
+        try:
+            for path in self._paths:
+                self._add_watches(path)
+        except OSError:
+            os.close(fd)
+            raise
+        return fd
+
+    def _add_watches(self, root: str) -> None:
+        """Watch the directory and all its subdirectories not ignored."""
+        for directory, subdirectories, _ in os.walk(root):
+            subdirectories[:] = [
+                name for name in subdirectories if not is_ignored(name)
+            ]
+            watch = self._add_watch_function(
+                self._fd, os.fsencode(directory), WATCH_MASK
+            )
+            if watch < 0:
+                raise OSError(ctypes.get_errno(), f"Cannot watch {directory!r}")
+            self._watches[watch] = directory
+
+    def _read_events(self) -> Set[str]:
+        assert self._fd is not None
+        changes: Set[str] = set()
+        try:
+            data = os.read(self._fd, READ_SIZE)
+        except BlockingIOError:
+            return changes
+
+        offset = 0
+        while offset < len(data):
+            watch, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # events were lost, so anything may have changed
+                changes.update(self._paths)
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(watch, None)
+                continue
+            directory = self._watches.get(watch)
+            if directory is None or not name or is_ignored(name):
+                continue
+            path = os.path.join(directory, name)
+            changes.add(path)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                try:
+                    self._add_watches(path)
+                except OSError:
+                    # e.g. removed again meanwhile
+                    pass
+        return changes
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot: Dict[str, Tuple[int, int]] = {}
+        for root in self._paths:
+            for directory, subdirectories, files in os.walk(root):
+                subdirectories[:] = [
+                    name for name in subdirectories if not is_ignored(name)
+                ]
+                for name in files:
+                    if is_ignored(name):
+                        continue
+                    path = os.path.join(directory, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _poll(self, timeout_sec: Optional[float]) -> Set[str]:
+        deadline = None if timeout_sec is None else time.monotonic() + timeout_sec
+        while True:
+            snapshot = self._scan()
+            changes = {
+                path
+                for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+            if changes:
+                return changes
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            delay = POLL_INTERVAL_SEC
+            if deadline is not None:
+                delay = min(delay, max(deadline - time.monotonic(), 0))
+            time.sleep(delay)
@@ -0,0 +1,105 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Callable, Dict, List, Tuple
+
+from container_backend import ContainerBackend, PullProgress
+from velocitas_lib.services import Service
+
+MAX_PARALLEL_PULLS = 4
+
+COMPLETED_LAYER_STATES = ("Pull complete", "Already exists")
+
+
+class PrefetchProgress:
+    """Aggregates the layer progress of concurrently pulled images."""
+
+    def __init__(self, images: List[str]):
+        self._images = images
+        self._layers: Dict[Tuple[str, str], PullProgress] = {}
+        self._lock = Lock()
+
+    def update(self, image: str, progress: PullProgress) -> None:
+        """Record a progress update of a layer of the image."""
+        if not progress.layer:
+            return
+        with self._lock:
+            self._layers[(image, progress.layer)] = progress
+
+    def summary(self) -> str:
+        """Return a one line summary of the progress of all pulls."""
+        with self._lock:
+            layers = list(self._layers.values())
+        completed = sum(layer.status in COMPLETED_LAYER_STATES for layer in layers)
+        text = f"Pulling {len(self._images)} image(s): {completed}/{len(layers)} layers"
+        total = sum(layer.total for layer in layers)
+        if total > 0:
+            current = sum(layer.current for layer in layers)
+            text += f", {current / 1e6:.1f}/{total / 1e6:.1f} MB"
+        return text
+
+
+def get_missing_images(services: List[Service], backend: ContainerBackend) -> List[str]:
+    """Return the images of the services which are not present locally.
+
+    Args:
+        services: The services.
+        backend: The backend managing the containers.
+    """
+    images = list(dict.fromkeys(service.config.image for service in services))
+    return [image for image in images if backend.get_image_id(image) is None]
+
+
+def prefetch_images(
+    services: List[Service],
+    backend: ContainerBackend,
+    on_progress: Callable[[str], None],
+    max_parallel_pulls: int = MAX_PARALLEL_PULLS,
+) -> List[str]:
+    """Pull the missing images of the services concurrently.
+
+    Args:
+        services: The services whose images are required.
+        backend: The backend managing the containers.
+        on_progress: Called with a summary of the progress whenever the
+            state of a layer changes.
+        max_parallel_pulls: Maximum number of images pulled at the same time.
+
+    Raises:
+        RuntimeError: If any of the images could not be pulled.
+
+    Returns:
+        List[str]: The images which have been pulled.
+    """
+    images = get_missing_images(services, backend)
+    if not images:
+        return []
+
+    progress = PrefetchProgress(images)
+    on_progress(progress.summary())
+
+    def pull(image: str) -> None:
+        def update(layer_progress: PullProgress) -> None:
+            progress.update(image, layer_progress)
+            on_progress(progress.summary())
+
+        backend.pull_image(image, update)
+
+    with ThreadPoolExecutor(max_workers=min(len(images), max_parallel_pulls)) as pool:
+        # consume all results to propagate the first error
+        list(pool.map(pull, images))
+
+    return images
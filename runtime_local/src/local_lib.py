@@ -12,86 +12,281 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 
+import codecs
+import hashlib
+import json
+import os
 import subprocess
 import time
-from io import TextIOWrapper
-from itertools import filterfalse
+from functools import partial
+from io import TextIOBase
 from re import Pattern, compile
-from threading import Timer
-from typing import List, Optional
+from threading import Event
+from typing import IO, Callable, List, Optional, TypeVar
 
-from velocitas_lib import create_log_file
+from container_backend import (
+    ContainerBackend,
+    ServiceProcess,
+    create_container_backend,
+)
+from log_sink import create_log_sink
+from output_pump import get_output_pump
+from readiness_probes import ReadinessProbe, get_readiness_probes, wait_until_ready
+from service_config import get_service_config_values
+from spinner import create_spinner
+from startup_patterns import StartupPatternMatcher
+from startup_trace import READY, get_startup_trace
+from supervisor import Supervisor
+from velocitas_lib import create_log_file, get_log_file_name
 from velocitas_lib.services import Service
 
+ProcessType = TypeVar("ProcessType", bound=ServiceProcess)
+
+FINGERPRINT_LABEL = "org.eclipse.velocitas.fingerprint"
+
+_container_backend: Optional[ContainerBackend] = None
+
 
 def get_container_runtime_executable() -> str:
     """Return the current container runtime executable. E.g. docker."""
     return "docker"
 
 
-def run_service(service: Service) -> subprocess.Popen:
+def get_container_backend() -> ContainerBackend:
+    """Return the backend used to manage the containers of the services.
+
+    The backend is selected by the 'containerBackend' variable: 'api' talks to
+    the Docker Engine API via its unix socket, 'cli' invokes the docker CLI
+    and 'auto' (default) prefers the API if the daemon is reachable.
+    """
+    global _container_backend
+    if _container_backend is None:
+        _container_backend = create_container_backend(
+            os.getenv("containerBackend", "auto"),
+            get_container_runtime_executable(),
+        )
+    return _container_backend
+
+
+def run_service(service: Service, keep_log: bool = False) -> ServiceProcess:
     """Run a single service.
 
     Args:
         service: The service.
+        keep_log: Whether to append to the log of the service instead of
+            truncating it, e.g. to keep the output of a crash.
 
     Returns:
-       The Popen object representing the root process running the required service
+       The process representing the container running the required service
     """
-    log = create_log_file(service.id, "runtime_local")
+    log = create_log_sink(service.id, "runtime_local", append=keep_log)
     log.write(f"Starting {service.id!r}\n")
 
-    env_vars = dict[str, Optional[str]]()
-    env_vars.update(service.config.env_vars)
-    patterns: List[Pattern[str]] = [
-        compile(pattern) for pattern in service.config.startup_log_patterns
-    ]
-
-    port_forward_args = []
-    for port_forward in service.config.port_forwards:
-        port_forward_args.append("-p")
-        port_forward_args.append(port_forward)
-
-    mount_args = []
-    for mount in service.config.mounts:
-        mount_args.append("-v")
-        mount_args.append(mount)
-
-    env_forward_args = []
-    for key, value in env_vars.items():
-        env_forward_args.append("-e")
-        if value:
-            env_forward_args.append(f"{key}={value}")
-        else:
-            env_forward_args.append(f"{key}")
-
-    docker_args = [
-        get_container_runtime_executable(),
-        "run",
-        "--rm",
-        "--init",
-        "--name",
-        service.id,
-        *env_forward_args,
-        *port_forward_args,
-        *mount_args,
-        "--network",
-        "host",
-        service.config.image,
-        *service.config.args,
-    ]
-
-    return spawn_process(docker_args, log, patterns, startup_timeout_sec=60)
+    # readiness probes supersede the start patterns
+    probes = get_readiness_probes(service)
+    patterns: List[Pattern[str]] = []
+    if not probes:
+        patterns = [compile(pattern) for pattern in service.config.startup_log_patterns]
+
+    trace = get_startup_trace()
+    with trace.phase(service.id, "spawn"):
+        process, output = get_container_backend().start_container(
+            service, log, {FINGERPRINT_LABEL: get_service_fingerprint(service)}
+        )
+    with trace.phase(service.id, "startup"):
+        process = monitor_startup(
+            process,
+            output,
+            log,
+            patterns,
+            startup_timeout_sec=60,
+            probes=probes,
+            on_event=partial(trace.instant, service.id),
+        )
+    trace.instant(service.id, READY)
+    return process
+
+
+def restart_service(service: Service, keep_log: bool = False) -> ServiceProcess:
+    """(Re)start the given service after stopping a possibly remaining container.
+
+    Args:
+        service: The service to restart.
+        keep_log: Whether to append to the log of the service, see run_service.
+            The supervisor does, so the log still explains a crash.
+
+    Returns:
+        ServiceProcess: See run_service.
+    """
+    with get_startup_trace().phase(service.id, "stop previous"):
+        stop_service(service, keep_log)
+    return run_service(service, keep_log)
+
+
+def get_service_fingerprint(service: Service) -> str:
+    """Return a fingerprint of the container configuration of the service.
+
+    Args:
+        service: The service.
+    """
+    config = {
+        "image": service.config.image,
+        "args": service.config.args,
+        "env": service.config.env_vars,
+        "mounts": service.config.mounts,
+        "port_forwards": service.config.port_forwards,
+    }
+    return hashlib.sha256(
+        json.dumps(config, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def adopt_service(service: Service) -> Optional[ServiceProcess]:
+    """Adopt the running container of the service, if it is up to date.
+
+    The container is up to date if it was started with the same configuration
+    as the one of the service and from the image the service's image
+    reference currently points to.
+
+    Args:
+        service: The service.
+
+    Returns:
+        The process representing the adopted container or None, if there is
+        no up to date container running.
+    """
+    backend = get_container_backend()
+    state = backend.inspect_container(service.id)
+    if (
+        state is None
+        or not state.running
+        or state.labels.get(FINGERPRINT_LABEL) != get_service_fingerprint(service)
+        or state.image_id != backend.get_image_id(service.config.image)
+    ):
+        return None
+
+    log = create_log_sink(service.id, "runtime_local")
+    log.write(f"Adopting running container {state.id} of {service.id!r}\n\n")
+    trace = get_startup_trace()
+    with trace.phase(service.id, "adopt"):
+        process, output = backend.attach_container(service.id)
+        process = monitor_startup(process, output, log, [], startup_timeout_sec=60)
+    trace.instant(service.id, READY)
+    return process
+
+
+def detach_process(process: ServiceProcess) -> None:
+    """Stop managing the process of a service, but keep its container running.
+
+    Args:
+        process: The process of the service.
+    """
+    if isinstance(process, subprocess.Popen):
+        # the container outlives the client process of the CLI
+        process.kill()
+
+
+class StartupMonitor:
+    """Tees the output of a spawned process into its log file and matches
+    the output lines against the startup patterns of the process."""
+
+    def __init__(
+        self,
+        log: TextIOBase,
+        patterns: List[Pattern[str]],
+        on_event: Callable[[str], None] = lambda _: None,
+    ):
+        """
+        Args:
+            log: Log file to tee the outputs into.
+            patterns: Startup patterns which are yet to match.
+            on_event: Called on the first output and each pattern match.
+        """
+        self._log = log
+        self._matcher = StartupPatternMatcher(patterns)
+        self._on_event = on_event
+        self._has_output = False
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial_line = ""
+        self._event = Event()
+        self._closed = Event()
+        self.terminated = False
+        if self._matcher.is_done():
+            self._event.set()
+
+    def wait(self, timeout_sec: float) -> bool:
+        """Block until all patterns matched or the output was closed.
+
+        Args:
+            timeout_sec: Timeout [in seconds] to wait for.
+
+        Returns:
+            bool: False if the timeout was reached, True otherwise.
+        """
+        return self._event.wait(timeout_sec)
+
+    def wait_closed(self, timeout_sec: float) -> bool:
+        """Block until the output was closed.
+
+        Args:
+            timeout_sec: Timeout [in seconds] to wait for.
+
+        Returns:
+            bool: True if the output was closed, False if the timeout was reached.
+        """
+        return self._closed.wait(timeout_sec)
+
+    def is_started(self) -> bool:
+        """Return whether all patterns have been matched."""
+        return self._matcher.is_done()
+
+    def feed(self, chunk: bytes) -> None:
+        """Process a chunk of output of the process."""
+        self._process(self._decoder.decode(chunk))
+
+    def close(self) -> None:
+        """Process the end of the output of the process."""
+        self._process(self._decoder.decode(b"", final=True), final=True)
+        self.terminated = True
+        self._log.close()
+        self._event.set()
+        self._closed.set()
+
+    def _process(self, text: str, final: bool = False) -> None:
+        if text:
+            self._log.write(text)
+            self._log.flush()
+            if not self._has_output:
+                self._has_output = True
+                self._on_event("first output")
+        if self._event.is_set():
+            return
+
+        lines = (self._partial_line + text).splitlines(keepends=True)
+        self._partial_line = ""
+        if lines and not final and not lines[-1].endswith("\n"):
+            self._partial_line = lines.pop()
+
+        for line in lines:
+            for pattern in self._matcher.feed_line(line):
+                self._on_event(f"matched {pattern.pattern!r}")
+            if self._matcher.is_done():
+                self._event.set()
+                break
 
 
 def spawn_process(
     args: List[str],
-    log: TextIOWrapper,
+    log: TextIOBase,
     patterns: List[Pattern[str]],
     startup_timeout_sec: int,
 ) -> subprocess.Popen:
     """Spawn the process defined by the passed args.
 
+    The outputs of the process are read through a pipe, written to the log
+    and matched against the patterns as soon as they arrive. They keep being
+    drained into the log after the startup.
+
     Args:
         args:
             The executable name to be spawned and its arguments
@@ -110,36 +305,63 @@ def spawn_process(
     Returns:
        The created Popen object
     """
-    with open(log.name, "r", encoding="utf-8") as monitor:
-        log.write(" ".join(args) + "\n\n")
-        log.flush()
-        process = subprocess.Popen(
-            args,
-            start_new_session=True,
-            stderr=subprocess.STDOUT,
-            stdout=log,
-        )
+    log.write(" ".join(args) + "\n\n")
+    log.flush()
+    process = subprocess.Popen(
+        args,
+        start_new_session=True,
+        stderr=subprocess.STDOUT,
+        stdout=subprocess.PIPE,
+    )
 
-        timer: Timer = Timer(startup_timeout_sec, process.kill)
-        timer.start()
-        for line in iter(monitor.readline, b""):
-            if not timer.is_alive():
-                raise RuntimeError(
-                    """Timeout reached after {startup_timeout_sec}
-                    seconds, service killed!"""
-                )
-            if process.poll() is not None:
-                raise RuntimeError("Service unexpectedly terminated")
-            if line == "":
-                time.sleep(0.1)
-                continue
-            patterns[:] = filterfalse(
-                lambda pattern: pattern.search(line),
-                patterns,
-            )
-            if len(patterns) == 0:
-                timer.cancel()
-                break
+    assert process.stdout is not None
+    return monitor_startup(process, process.stdout, log, patterns, startup_timeout_sec)
+
+
+def monitor_startup(
+    process: ProcessType,
+    output: IO[bytes],
+    log: TextIOBase,
+    patterns: List[Pattern[str]],
+    startup_timeout_sec: int,
+    probes: Optional[List[ReadinessProbe]] = None,
+    on_event: Callable[[str], None] = lambda _: None,
+) -> ProcessType:
+    """Wait for the started process to match all its startup patterns
+    and to pass all its readiness probes.
+
+    Args:
+        process: The started process.
+        output: Readable end of the pipe delivering the outputs of the process.
+        log: Log file to tee the outputs into.
+        patterns: Startup patterns, see spawn_process.
+        startup_timeout_sec: Startup timeout, see spawn_process.
+        probes: Readiness probes to run after all patterns matched.
+        on_event: Called with the startup milestones of the process, e.g.
+            the match of a pattern.
+
+    Returns:
+        The passed process.
+    """
+    if probes is None:
+        probes = []
+    deadline = time.monotonic() + startup_timeout_sec
+    monitor = StartupMonitor(log, patterns, on_event)
+    get_output_pump().register(output, monitor.feed, monitor.close)
+
+    is_ready = monitor.wait(startup_timeout_sec) and (
+        monitor.terminated
+        or wait_until_ready(probes, deadline - time.monotonic(), monitor.wait_closed)
+    )
+    if monitor.terminated:
+        raise RuntimeError("Service unexpectedly terminated")
+    if not is_ready:
+        process.kill()
+        raise RuntimeError(
+            f"Timeout reached after {startup_timeout_sec} seconds, service killed!"
+        )
+    if probes:
+        on_event("probes passed")
 
     return process
 
@@ -151,19 +373,135 @@ def stop_container(service_id, log=None):
         service_id: The service_id of the container to stop.
         log: Log stream to forward the outputs to.
     """
-    subprocess.call(
-        [get_container_runtime_executable(), "stop", service_id],
-        stderr=subprocess.STDOUT,
-        stdout=log,
-    )
+    get_container_backend().stop_container(service_id, log)
+
+
+def get_stop_timeout(service: Service) -> Optional[int]:
+    """Return the grace period [in seconds] of the service between SIGTERM and
+    SIGKILL when being stopped, as declared by its 'stop-timeout' config entry
+    in runtime.json, or None for the default of the container engine.
 
+    Args:
+        service: The service.
 
-def stop_service(service: Service):
+    Raises:
+        ValueError: If the stop timeout is not a non-negative integer.
+    """
+    values = get_service_config_values(service.id, "stop-timeout")
+    if not values:
+        return None
+    if not values[-1].isdigit():
+        raise ValueError(
+            f"Invalid stop-timeout {values[-1]!r} of service {service.id!r}"
+        )
+    return int(values[-1])
+
+
+def stop_service(service: Service, keep_log: bool = False):
     """Stop the given service.
 
     Args:
         service (Service): The service to stop.
+        keep_log: Whether to append to the log of the service instead of
+            truncating it.
+    """
+    log = (
+        open(get_log_file_name(service.id, "runtime_local"), "a", encoding="utf-8")
+        if keep_log
+        else create_log_file(service.id, "runtime_local")
+    )
+    with log:
+        log.write(f"Stopping {service.id!r}\n")
+        log.flush()
+        get_container_backend().stop_container(
+            service.id, log, get_stop_timeout(service)
+        )
+
+
+def stop_services(services: List[Service]) -> List[Service]:
+    """Stop all running containers of the given services concurrently.
+
+    The running containers are queried once, services which are not running
+    are skipped.
+
+    Args:
+        services: The services to stop.
+
+    Returns:
+        List[Service]: The services which have been stopped.
     """
-    log = create_log_file(service.id, "runtime_local")
-    log.write(f"Stopping {service.id!r}\n")
-    stop_container(service.id, log)
+    backend = get_container_backend()
+    running = set(backend.list_running_containers())
+    services = [service for service in services if service.id in running]
+    if not services:
+        return []
+
+    with create_log_file("runtime-down", "runtime_local") as log:
+        for service in services:
+            log.write(f"Stopping {service.id!r}\n")
+        log.flush()
+        backend.stop_containers(
+            {service.id: get_stop_timeout(service) for service in services}, log
+        )
+    return services
+
+
+def create_supervisor(
+    on_event: Callable[[str], None] = lambda event: print(f"> {event}"),
+) -> Supervisor:
+    """Return a supervisor restarting failed services according to their
+    restart policies, appending to their logs.
+
+    Args:
+        on_event: Called with a message whenever a service exited or got
+            restarted.
+    """
+    return Supervisor(partial(restart_service, keep_log=True), on_event)
+
+
+def supervise_services(
+    supervisor: Supervisor,
+    keep_alive: bool,
+    on_stopped: Callable[[], None] = lambda: None,
+) -> None:
+    """Supervise the started services in the foreground, if no runtime daemon
+    owns them, until all of them exited or the supervisor was shut down,
+    e.g. by a signal.
+
+    Afterwards the remaining services are stopped or, in keep-alive mode,
+    kept running.
+
+    Args:
+        supervisor: The supervisor of the started services.
+        keep_alive: Whether to keep the services running.
+        on_stopped: Called once the supervision stopped, while the services
+            are still running.
+    """
+    supervisor.run()
+    on_stopped()
+    if keep_alive:
+        detach_supervised_services(supervisor)
+    elif supervisor.processes:
+        terminate_supervised_services(supervisor)
+
+
+def terminate_supervised_services(supervisor: Supervisor) -> None:
+    """Terminate the processes of the supervised services and stop their
+    containers."""
+    with create_spinner("Stopping services...") as spinner:
+        while len(supervisor.processes) > 0:
+            (service_id, (_, process)) = supervisor.processes.popitem()
+            process.terminate()
+            stop_container(service_id, subprocess.DEVNULL)
+            spinner.write(
+                f"> {[process.args][0]!r} (service_id={service_id!r}) terminated"
+            )
+        spinner.ok("✅")
+
+
+def detach_supervised_services(supervisor: Supervisor) -> None:
+    """Stop supervising the services, but keep their containers running."""
+    while len(supervisor.processes) > 0:
+        (service_id, (_, process)) = supervisor.processes.popitem()
+        detach_process(process)
+        print(f"> {service_id} kept running")
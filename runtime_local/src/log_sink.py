@@ -0,0 +1,259 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import io
+import os
+import shutil
+import time
+from collections import deque
+from threading import Lock, Thread
+from typing import Deque, Dict, List, Optional
+
+from velocitas_lib import get_log_file_name
+
+DEFAULT_MAX_SIZE_MB = 10
+DEFAULT_MAX_AGE_HOURS = 24
+DEFAULT_BACKUP_COUNT = 5
+TAIL_LINES = 100
+# a partial line longer than this is put into the tail as it is
+MAX_PARTIAL_LINE_CHARS = 64 * 1024
+
+
+class RotatingLogSink(io.TextIOBase):
+    """A log file which is rotated once it exceeds a size or an age.
+
+    Rotated segments are compressed in the background and kept as
+    <path>.1.gz (the latest) up to <path>.<backup_count>.gz. The last lines
+    written are kept in a bounded ring buffer, which stays readable after
+    the sink has been closed. Safe to be written from multiple threads.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int,
+        max_age_sec: Optional[float] = None,
+        backup_count: int = DEFAULT_BACKUP_COUNT,
+        tail_lines: int = TAIL_LINES,
+        append: bool = False,
+    ):
+        """
+        Args:
+            path: Path of the log file, which is truncated unless appending.
+            max_bytes: Size of the log file after which it is rotated, 0 for
+                no rotation by size.
+            max_age_sec: Age of the log file after which it is rotated.
+            backup_count: Number of rotated segments to keep.
+            tail_lines: Number of lines to keep in memory.
+            append: Whether to append to the log file and to keep its rotated
+                segments, e.g. to keep the output of a crashed service.
+        """
+        super().__init__()
+        self.path = path
+        self._max_bytes = max_bytes
+        self._max_age_sec = max_age_sec
+        self._backup_count = backup_count
+        self._tail: Deque[str] = deque(maxlen=tail_lines)
+        self._partial_line = ""
+        self._lock = Lock()
+        self._compression: Optional[Thread] = None
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if append:
+            self._tail.extend(_read_tail(path, tail_lines))
+        else:
+            # segments of a previous run, like the truncated log file itself
+            for index in range(1, backup_count + 1):
+                _remove(self._get_segment_path(index))
+        self._open(append)
+
+    def _open(self, append: bool = False) -> None:
+        self._file = open(self.path, "a" if append else "w", encoding="utf-8")
+        self._size = self._file.tell()
+        self._opened_at = time.monotonic()
+
+    def _get_segment_path(self, index: int) -> str:
+        return f"{self.path}.{index}.gz"
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        data_size = len(text.encode("utf-8"))
+        with self._lock:
+            if self.closed:
+                raise ValueError("I/O operation on closed log")
+            if self._size > 0 and self._needs_rotation(data_size):
+                self._rotate()
+            self._file.write(text)
+            self._size += data_size
+            self._append_to_tail(text)
+        return len(text)
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+        super().close()
+
+    def tail(self) -> List[str]:
+        """Return the last lines written, the last one possibly incomplete."""
+        with self._lock:
+            lines = list(self._tail)
+            if self._partial_line:
+                lines.append(self._partial_line)
+            return lines[-(self._tail.maxlen or 0) :]
+
+    def wait_for_compression(self) -> None:
+        """Block until the last rotated segment has been compressed."""
+        compression = self._compression
+        if compression is not None:
+            compression.join()
+
+    def _needs_rotation(self, data_size: int) -> bool:
+        if self._max_bytes and self._size + data_size > self._max_bytes:
+            return True
+        return (
+            self._max_age_sec is not None
+            and time.monotonic() - self._opened_at > self._max_age_sec
+        )
+
+    def _rotate(self) -> None:
+        self._file.close()
+        # the segments must not be shifted while the last one is compressed
+        self.wait_for_compression()
+        _remove(self._get_segment_path(self._backup_count))
+        for index in range(self._backup_count - 1, 0, -1):
+            if os.path.exists(self._get_segment_path(index)):
+                os.replace(
+                    self._get_segment_path(index), self._get_segment_path(index + 1)
+                )
+        rotated_path = f"{self.path}.1"
+        os.replace(self.path, rotated_path)
+        self._open()
+
+        if self._backup_count > 0:
+            self._compression = Thread(
+                target=_compress, args=(rotated_path,), daemon=True
+            )
+            self._compression.start()
+        else:
+            os.remove(rotated_path)
+
+    def _append_to_tail(self, text: str) -> None:
+        lines = (self._partial_line + text).splitlines(keepends=True)
+        self._partial_line = ""
+        if lines and not lines[-1].endswith("\n"):
+            self._partial_line = lines.pop()
+            if len(self._partial_line) > MAX_PARTIAL_LINE_CHARS:
+                lines.append(self._partial_line)
+                self._partial_line = ""
+        self._tail.extend(lines)
+
+
+def _compress(path: str) -> None:
+    # only imported once a log is rotated
+    import gzip
+
+    with open(path, "rb") as source, gzip.open(f"{path}.gz", "wb") as target:
+        shutil.copyfileobj(source, target)
+    os.remove(path)
+
+
+def _read_tail(path: str, lines: int) -> List[str]:
+    """Return the last lines of the file, without loading it as a whole."""
+    try:
+        with open(path, encoding="utf-8", errors="replace") as log:
+            return list(deque(log, maxlen=lines))
+    except FileNotFoundError:
+        return []
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _get_limit(variable: str, default: int) -> int:
+    value = os.getenv(variable, str(default))
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = -1
+    if limit < 0:
+        raise ValueError(f"Invalid value {value!r} of {variable!r}")
+    return limit
+
+
+_log_sinks: Dict[str, RotatingLogSink] = {}
+
+
+def create_log_sink(
+    service_id: str, runtime_id: str, append: bool = False
+) -> RotatingLogSink:
+    """Create the rotating log of the given service and runtime.
+
+    The limits are configured by the 'logMaxSizeMb', 'logMaxAgeHours'
+    (0 disables the rotation by size or age) and 'logBackupCount' variables.
+
+    Args:
+        service_id: The ID of the service to log.
+        runtime_id: The ID of the runtime to log.
+        append: Whether to append to the existing log instead of truncating
+            it and removing its rotated segments.
+    """
+    max_age_hours = _get_limit("logMaxAgeHours", DEFAULT_MAX_AGE_HOURS)
+    sink = RotatingLogSink(
+        get_log_file_name(service_id, runtime_id),
+        max_bytes=_get_limit("logMaxSizeMb", DEFAULT_MAX_SIZE_MB) * 1024 * 1024,
+        max_age_sec=max_age_hours * 3600 if max_age_hours > 0 else None,
+        backup_count=_get_limit("logBackupCount", DEFAULT_BACKUP_COUNT),
+        append=append,
+    )
+    _log_sinks[f"{runtime_id}/{service_id}"] = sink
+    return sink
+
+
+def get_log_tail(service_id: str, runtime_id: str) -> List[str]:
+    """Return the last lines of the log of the given service and runtime.
+
+    They are taken from the log sink created by this process, if any, or
+    else read from the log file without loading it as a whole.
+
+    Args:
+        service_id: The ID of the logged service.
+        runtime_id: The ID of the runtime.
+    """
+    sink = _log_sinks.get(f"{runtime_id}/{service_id}")
+    if sink is not None:
+        return sink.tail()
+    return _read_tail(get_log_file_name(service_id, runtime_id), TAIL_LINES)
+
+
+def print_log_tail(service_id: str, runtime_id: str) -> None:
+    """Print the last lines of the log of the given service and runtime."""
+    lines = get_log_tail(service_id, runtime_id)
+    print(
+        f">>>> Last {len(lines)} lines of the log of {service_id} "
+        ">>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>"
+    )
+    print("".join(lines), end="" if not lines or lines[-1].endswith("\n") else "\n")
+    print(f"<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<< End log of {service_id} <<<<")
+    print(f"Full log: {get_log_file_name(service_id, runtime_id)}")
@@ -0,0 +1,130 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import selectors
+import sys
+import traceback
+from threading import Lock, Thread
+from typing import IO, Callable, List, NamedTuple, Optional
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class _Registration(NamedTuple):
+    stream: IO[bytes]
+    on_data: Callable[[bytes], None]
+    on_eof: Callable[[], None]
+
+
+class OutputPump:
+    """Drains the output streams of spawned processes.
+
+    A single background thread waits for any of the registered streams to
+    become readable and forwards each chunk read to the stream's callback.
+    Streams are drained until EOF, so a child process never blocks on a full
+    pipe, no matter whether anybody is still interested in its output.
+
+    A callback raising an exception only detaches its own stream: the error
+    is reported, the stream is closed and the pump keeps serving the others.
+    """
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._lock = Lock()
+        self._pending: List[_Registration] = []
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        os.set_blocking(self._wakeup_read, False)
+        self._selector.register(self._wakeup_read, selectors.EVENT_READ)
+        self._thread = Thread(target=self._run, name="output-pump", daemon=True)
+        self._thread.start()
+
+    def register(
+        self,
+        stream: IO[bytes],
+        on_data: Callable[[bytes], None],
+        on_eof: Callable[[], None],
+    ) -> None:
+        """Start draining the given stream.
+
+        Args:
+            stream: The readable end of a pipe, e.g. Popen.stdout.
+            on_data: Called from the pump thread for each chunk read.
+            on_eof: Called from the pump thread once the stream is closed
+                by the writer. The stream is closed afterwards.
+        """
+        os.set_blocking(stream.fileno(), False)
+        with self._lock:
+            self._pending.append(_Registration(stream, on_data, on_eof))
+        os.write(self._wakeup_write, b"\0")
+
+    def _register_pending(self) -> None:
+        try:
+            os.read(self._wakeup_read, READ_CHUNK_SIZE)
+        except BlockingIOError:
+            pass
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for registration in pending:
+            self._selector.register(
+                registration.stream, selectors.EVENT_READ, registration
+            )
+
+    def _read(self, registration: _Registration) -> None:
+        try:
+            chunk = os.read(registration.stream.fileno(), READ_CHUNK_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            chunk = b""
+
+        if chunk and self._call(registration.on_data, chunk):
+            return
+
+        self._selector.unregister(registration.stream)
+        registration.stream.close()
+        self._call(registration.on_eof)
+
+    @staticmethod
+    def _call(callback: Callable[..., None], *args) -> bool:
+        """Run a callback, reporting instead of raising its exceptions, which
+        would otherwise end the pump thread shared by all processes."""
+        try:
+            callback(*args)
+        except Exception:
+            print(f"Output pump callback {callback!r} failed:", file=sys.stderr)
+            traceback.print_exc()
+            return False
+        return True
+
+    def _run(self) -> None:
+        while True:
+            for key, _ in self._selector.select():
+                if key.data is None:
+                    self._register_pending()
+                else:
+                    self._read(key.data)
+
+
+_output_pump: Optional[OutputPump] = None
+_output_pump_lock = Lock()
+
+
+def get_output_pump() -> OutputPump:
+    """Return the output pump shared by all processes of this runtime."""
+    global _output_pump
+    with _output_pump_lock:
+        if _output_pump is None:
+            _output_pump = OutputPump()
+        return _output_pump
@@ -0,0 +1,312 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import random
+import socket
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, NamedTuple
+
+from service_config import get_service_config_values, get_service_specs
+from velocitas_lib.services import Service
+
+if TYPE_CHECKING:
+    # only the asyncio API needs it, which the CLI commands do not import
+    import asyncio
+
+PROBE_HOST = "127.0.0.1"
+PROBE_CONNECT_TIMEOUT_SEC = 1.0
+INITIAL_BACKOFF_SEC = 0.01
+MAX_BACKOFF_SEC = 1.0
+
+GRPC_HEALTH_CHECK_PATH = "/grpc.health.v1.Health/Check"
+HTTP2_PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
+HTTP2_DATA = 0x0
+HTTP2_HEADERS = 0x1
+HTTP2_RST_STREAM = 0x3
+HTTP2_SETTINGS = 0x4
+HTTP2_GOAWAY = 0x7
+HTTP2_FLAG_END_STREAM = 0x1
+HTTP2_FLAG_ACK = 0x1
+HTTP2_FLAG_END_HEADERS = 0x4
+
+MQTT_CLIENT_ID = b"velocitas-readiness-probe"
+MQTT_CONNACK = 0x20
+MQTT_DISCONNECT = b"\xe0\x00"
+
+
+class ReadinessProbe(NamedTuple):
+    kind: str
+    port: int
+    path: str = ""
+
+
+def receive_exactly(sock: socket.socket, size: int) -> bytes:
+    """Receive exactly the given number of bytes from the socket.
+
+    Raises:
+        ConnectionError: If the connection was closed before.
+    """
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed by peer")
+        data += chunk
+    return data
+
+
+def probe_tcp(probe: ReadinessProbe) -> bool:
+    """Return whether the port accepts TCP connections."""
+    with socket.create_connection((PROBE_HOST, probe.port), PROBE_CONNECT_TIMEOUT_SEC):
+        return True
+
+
+def hpack_integer(value: int, prefix_bits: int, flags: int = 0) -> bytes:
+    """Encode an integer as defined by HPACK (RFC 7541, section 5.1)."""
+    max_prefix = (1 << prefix_bits) - 1
+    if value < max_prefix:
+        return bytes([flags | value])
+    encoded = [flags | max_prefix]
+    value -= max_prefix
+    while value >= 128:
+        encoded.append((value % 128) + 128)
+        value //= 128
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def hpack_string(value: str) -> bytes:
+    """Encode a string literal as defined by HPACK, without Huffman coding."""
+    data = value.encode("ascii")
+    return hpack_integer(len(data), 7) + data
+
+
+def http2_frame(frame_type: int, flags: int, stream_id: int, payload: bytes) -> bytes:
+    """Encode an HTTP/2 frame."""
+    return (
+        len(payload).to_bytes(3, "big")
+        + bytes([frame_type, flags])
+        + stream_id.to_bytes(4, "big")
+        + payload
+    )
+
+
+def probe_grpc(probe: ReadinessProbe) -> bool:
+    """Return whether the port serves gRPC.
+
+    Calls the probe's method with an empty request via HTTP/2 with prior
+    knowledge. Any response headers, even of an error status, prove that the
+    server is serving requests.
+    """
+    header_block = (
+        b"\x83"  # :method: POST
+        + b"\x86"  # :scheme: http
+        + hpack_integer(4, 4)  # :path
+        + hpack_string(probe.path)
+        + hpack_integer(1, 4)  # :authority
+        + hpack_string(f"{PROBE_HOST}:{probe.port}")
+        + hpack_integer(31, 4)  # content-type
+        + hpack_string("application/grpc")
+        + b"\x00"
+        + hpack_string("te")
+        + hpack_string("trailers")
+    )
+    empty_message = b"\x00" + (0).to_bytes(4, "big")
+    request = (
+        HTTP2_PREFACE
+        + http2_frame(HTTP2_SETTINGS, 0, 0, b"")
+        + http2_frame(HTTP2_HEADERS, HTTP2_FLAG_END_HEADERS, 1, header_block)
+        + http2_frame(HTTP2_DATA, HTTP2_FLAG_END_STREAM, 1, empty_message)
+    )
+
+    with socket.create_connection(
+        (PROBE_HOST, probe.port), PROBE_CONNECT_TIMEOUT_SEC
+    ) as sock:
+        sock.sendall(request)
+        while True:
+            header = receive_exactly(sock, 9)
+            length = int.from_bytes(header[0:3], "big")
+            frame_type, flags = header[3], header[4]
+            stream_id = int.from_bytes(header[5:9], "big") & 0x7FFFFFFF
+            receive_exactly(sock, length)
+
+            if frame_type == HTTP2_SETTINGS and not flags & HTTP2_FLAG_ACK:
+                sock.sendall(http2_frame(HTTP2_SETTINGS, HTTP2_FLAG_ACK, 0, b""))
+            elif frame_type == HTTP2_HEADERS and stream_id == 1:
+                return True
+            elif frame_type in (HTTP2_RST_STREAM, HTTP2_GOAWAY):
+                return False
+
+
+def probe_mqtt(probe: ReadinessProbe) -> bool:
+    """Return whether the port accepts MQTT connections.
+
+    Performs an MQTT 3.1.1 CONNECT and checks the CONNACK for success.
+    """
+    variable_header = b"\x00\x04MQTT\x04\x02\x00\x3c"
+    payload = len(MQTT_CLIENT_ID).to_bytes(2, "big") + MQTT_CLIENT_ID
+    remaining = variable_header + payload
+    connect = b"\x10" + bytes([len(remaining)]) + remaining
+
+    with socket.create_connection(
+        (PROBE_HOST, probe.port), PROBE_CONNECT_TIMEOUT_SEC
+    ) as sock:
+        sock.sendall(connect)
+        connack = receive_exactly(sock, 4)
+        sock.sendall(MQTT_DISCONNECT)
+    return connack[0] == MQTT_CONNACK and connack[3] == 0
+
+
+PROBES: Dict[str, Callable[[ReadinessProbe], bool]] = {
+    "tcp": probe_tcp,
+    "grpc": probe_grpc,
+    "mqtt": probe_mqtt,
+}
+
+
+def get_grpc_probe_path(service: Service) -> str:
+    """Return the path of the gRPC method to probe the service with.
+
+    This is the first gRPC interface declared by the service in runtime.json,
+    or the standard gRPC health check if it does not declare any.
+    """
+    for service_spec in get_service_specs():
+        if service_spec["id"] != service.id:
+            continue
+        for interface in service_spec.get("interfaces", []):
+            if interface.startswith("grpc://"):
+                return "/" + interface.removeprefix("grpc://")
+    return GRPC_HEALTH_CHECK_PATH
+
+
+def get_readiness_probes(service: Service) -> List[ReadinessProbe]:
+    """Return the readiness probes of the service.
+
+    They are declared by 'readiness-probe' config entries in runtime.json,
+    with the values 'tcp', 'grpc' or 'mqtt', optionally followed by the port
+    to probe, e.g. 'tcp:1883'. By default the first port of the service is
+    probed.
+
+    Args:
+        service: The service.
+
+    Raises:
+        ValueError: If a probe is invalid.
+    """
+    probes: List[ReadinessProbe] = []
+    for value in get_service_config_values(service.id, "readiness-probe"):
+        kind, _, port = value.partition(":")
+        if kind not in PROBES:
+            raise ValueError(
+                f"Unsupported readiness probe {value!r} of service {service.id!r}"
+            )
+        if not port:
+            if not service.config.ports:
+                raise ValueError(
+                    f"Readiness probe {value!r} of service {service.id!r} "
+                    "requires a port"
+                )
+            port = service.config.ports[0]
+        path = get_grpc_probe_path(service) if kind == "grpc" else ""
+        probes.append(ReadinessProbe(kind, int(port), path))
+    return probes
+
+
+def run_probe(probe: ReadinessProbe) -> bool:
+    """Run the probe once and return whether it succeeded."""
+    try:
+        return PROBES[probe.kind](probe)
+    except OSError:
+        return False
+
+
+def wait_until_ready(
+    probes: List[ReadinessProbe],
+    timeout_sec: float,
+    sleep: Callable[[float], bool],
+) -> bool:
+    """Run the probes until all of them succeeded.
+
+    Failed probes are retried with exponential backoff and jitter.
+
+    Args:
+        probes: The probes to run.
+        timeout_sec: Timeout [in seconds] after which probing is given up.
+        sleep: Sleeps for the given time, returns True to abort probing
+            early, e.g. because the probed process terminated.
+
+    Returns:
+        bool: True if all probes succeeded, False otherwise.
+    """
+    deadline = time.monotonic() + timeout_sec
+    pending = list(probes)
+    backoff = INITIAL_BACKOFF_SEC
+    while True:
+        pending = [probe for probe in pending if not run_probe(probe)]
+        if not pending:
+            return True
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        if sleep(get_retry_delay(backoff, remaining)):
+            return False
+        backoff = min(backoff * 2, MAX_BACKOFF_SEC)
+
+
+async def wait_until_ready_async(
+    probes: List[ReadinessProbe],
+    timeout_sec: float,
+    abort: "asyncio.Event",
+) -> bool:
+    """Run the probes until all of them succeeded, see wait_until_ready.
+
+    The probes are run in the default executor of the event loop.
+
+    Args:
+        probes: The probes to run.
+        timeout_sec: Timeout [in seconds] after which probing is given up.
+        abort: Aborts probing early once set, e.g. because the probed
+            process terminated.
+
+    Returns:
+        bool: True if all probes succeeded, False otherwise.
+    """
+    import asyncio
+
+    deadline = time.monotonic() + timeout_sec
+    pending = list(probes)
+    backoff = INITIAL_BACKOFF_SEC
+    while True:
+        results = await asyncio.gather(
+            *(asyncio.to_thread(run_probe, probe) for probe in pending)
+        )
+        pending = [probe for probe, ready in zip(pending, results) if not ready]
+        if not pending:
+            return True
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or abort.is_set():
+            return False
+        try:
+            await asyncio.wait_for(abort.wait(), get_retry_delay(backoff, remaining))
+            return False
+        except asyncio.TimeoutError:
+            backoff = min(backoff * 2, MAX_BACKOFF_SEC)
+
+
+def get_retry_delay(backoff: float, remaining: float) -> float:
+    """Return the delay before the next attempt, the backoff with jitter,
+    but at most the remaining time."""
+    return min(backoff / 2 + random.uniform(0, backoff / 2), remaining)
@@ -0,0 +1,356 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import csv
+import os
+import time
+from collections import deque
+from threading import Event, Lock, Thread
+from typing import Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from local_lib import get_container_backend
+from velocitas_lib import get_workspace_dir
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+CGROUP_FILES = ("cpu.stat", "memory.current", "io.stat")
+READ_SIZE = 64 * 1024
+DEFAULT_CAPACITY = 3600
+
+
+class ResourceSample(NamedTuple):
+    time: float
+    service_id: str
+    # cumulative CPU time [in microseconds] of the container
+    cpu_usec: int
+    memory_bytes: int
+    # cumulative over all devices
+    io_read_bytes: int
+    io_write_bytes: int
+
+
+class ResourcePeaks(NamedTuple):
+    cpu_percent: float
+    memory_bytes: int
+    io_read_bytes_per_sec: float
+    io_write_bytes_per_sec: float
+
+
+def get_resource_samples_path(extension: str) -> str:
+    """Return the path of the exported resource samples of the last run.
+
+    Args:
+        extension: 'csv' or 'prom'.
+    """
+    return os.path.join(
+        get_workspace_dir(), "logs", "runtime_local", f"resources.{extension}"
+    )
+
+
+def get_cgroup_dir(pid: int) -> Optional[str]:
+    """Return the cgroup v2 directory of the process with the given pid.
+
+    Returns:
+        Optional[str]: The directory, None if the process does not exist or
+            is not in a cgroup v2 hierarchy.
+    """
+    try:
+        with open(f"/proc/{pid}/cgroup", encoding="utf-8") as cgroup_file:
+            for line in cgroup_file:
+                # the unified hierarchy, e.g. "0::/system.slice/docker-<id>.scope"
+                if line.startswith("0::"):
+                    path = line[3:].strip()
+                    return os.path.join(CGROUP_ROOT, path.lstrip("/"))
+    except OSError:
+        pass
+    return None
+
+
+def locate_container_cgroup(service_id: str) -> Optional[str]:
+    """Return the cgroup v2 directory of the running container of a service.
+
+    Returns:
+        Optional[str]: The directory, None if the container is not running.
+    """
+    state = get_container_backend().inspect_container(service_id)
+    if state is None or not state.running or not state.pid:
+        return None
+    return get_cgroup_dir(state.pid)
+
+
+def parse_cgroup_stats(
+    cpu_stat: str, memory_current: str, io_stat: str
+) -> Tuple[int, int, int, int]:
+    """Parse the contents of the cgroup files of interest.
+
+    Returns:
+        Tuple[int, int, int, int]: The CPU time [in microseconds], the memory
+            usage, the bytes read and the bytes written.
+    """
+    cpu_usec = 0
+    for line in cpu_stat.splitlines():
+        key, _, value = line.partition(" ")
+        if key == "usage_usec":
+            cpu_usec = int(value)
+            break
+
+    read_bytes = write_bytes = 0
+    # one line per device, e.g. "8:0 rbytes=1 wbytes=2 rios=3 wios=4 ..."
+    for line in io_stat.splitlines():
+        for field in line.split()[1:]:
+            key, _, value = field.partition("=")
+            if key == "rbytes":
+                read_bytes += int(value)
+            elif key == "wbytes":
+                write_bytes += int(value)
+
+    return cpu_usec, int(memory_current.strip() or 0), read_bytes, write_bytes
+
+
+class _CgroupReader:
+    """Reads the files of a cgroup, keeping them open between samples."""
+
+    def __init__(self, cgroup_dir: str):
+        self.cgroup_dir = cgroup_dir
+        self._fds: List[int] = []
+        try:
+            for name in CGROUP_FILES:
+                self._fds.append(os.open(os.path.join(cgroup_dir, name), os.O_RDONLY))
+        except OSError:
+            self.close()
+            raise
+
+    def read(self) -> Tuple[int, int, int, int]:
+        # reading from offset 0 makes the kernel regenerate the content
+        contents = [os.pread(fd, READ_SIZE, 0).decode("ascii") for fd in self._fds]
+        return parse_cgroup_stats(*contents)
+
+    def close(self) -> None:
+        for fd in self._fds:
+            os.close(fd)
+        self._fds = []
+
+
+class ResourceSampler:
+    """Samples the CPU, memory and I/O usage of service containers.
+
+    The statistics are read directly from the cgroup v2 files of each
+    container, which is much cheaper than 'docker stats'. The samples are
+    kept in a ring of fixed size.
+    """
+
+    def __init__(
+        self,
+        service_ids: List[str],
+        interval_sec: float = 1.0,
+        capacity: int = DEFAULT_CAPACITY,
+        locate_cgroup: Callable[[str], Optional[str]] = locate_container_cgroup,
+        textfile_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            service_ids: The services to sample.
+            interval_sec: Time [in seconds] between samples.
+            capacity: Maximum number of samples kept, the oldest are dropped.
+            locate_cgroup: Returns the cgroup directory of the container of a
+                service, None if not running. Retried at each sample until a
+                cgroup is found, e.g. for a container which is restarted.
+            textfile_path: Prometheus textfile to update after each sample.
+        """
+        self.service_ids = service_ids
+        self.interval_sec = interval_sec
+        self.locate_cgroup = locate_cgroup
+        self.textfile_path = textfile_path
+        self._samples: Deque[ResourceSample] = deque(maxlen=capacity)
+        self._readers: Dict[str, _CgroupReader] = {}
+        self._lock = Lock()
+        self._stopped = Event()
+        self._thread: Optional[Thread] = None
+
+    def start(self) -> None:
+        """Start sampling in a background thread."""
+        self._thread = Thread(target=self._run, name="resource-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and release the cgroup files."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        for reader in self._readers.values():
+            reader.close()
+        self._readers.clear()
+
+    def sample(self) -> List[ResourceSample]:
+        """Take a sample of each service whose container is running.
+
+        Returns:
+            List[ResourceSample]: The samples taken.
+        """
+        samples: List[ResourceSample] = []
+        for service_id in self.service_ids:
+            reader = self._get_reader(service_id)
+            if reader is None:
+                continue
+            try:
+                stats = reader.read()
+            except OSError:
+                # the cgroup is gone with its container
+                reader.close()
+                del self._readers[service_id]
+                continue
+            samples.append(ResourceSample(time.time(), service_id, *stats))
+        with self._lock:
+            self._samples.extend(samples)
+        return samples
+
+    def get_samples(self) -> List[ResourceSample]:
+        """Return the samples in the ring, oldest first."""
+        with self._lock:
+            return list(self._samples)
+
+    def get_peaks(self) -> Dict[str, ResourcePeaks]:
+        """Return the peak usage of each service within the sampled period.
+
+        CPU and I/O rates are derived from consecutive samples of a service.
+        """
+        peaks: Dict[str, ResourcePeaks] = {}
+        previous: Dict[str, ResourceSample] = {}
+        for sample in self.get_samples():
+            peak = peaks.get(sample.service_id, ResourcePeaks(0.0, 0, 0.0, 0.0))
+            cpu_percent, read_rate, write_rate = peak[0], peak[2], peak[3]
+            last = previous.get(sample.service_id)
+            elapsed_sec = 0.0 if last is None else sample.time - last.time
+            # counters restart along with the container
+            if (
+                last is not None
+                and elapsed_sec > 0
+                and sample.cpu_usec >= last.cpu_usec
+            ):
+                cpu_sec = (sample.cpu_usec - last.cpu_usec) / 1e6
+                cpu_percent = max(cpu_percent, cpu_sec / elapsed_sec * 100)
+                read_rate = max(
+                    read_rate,
+                    (sample.io_read_bytes - last.io_read_bytes) / elapsed_sec,
+                )
+                write_rate = max(
+                    write_rate,
+                    (sample.io_write_bytes - last.io_write_bytes) / elapsed_sec,
+                )
+            peaks[sample.service_id] = ResourcePeaks(
+                cpu_percent,
+                max(peak.memory_bytes, sample.memory_bytes),
+                read_rate,
+                write_rate,
+            )
+            previous[sample.service_id] = sample
+        return peaks
+
+    def summary(self) -> List[str]:
+        """Return a line per service summarizing its peak usage."""
+        return [
+            f"{service_id}: CPU {peaks.cpu_percent:.1f} %, "
+            f"memory {peaks.memory_bytes / 2**20:.1f} MiB, "
+            f"read {peaks.io_read_bytes_per_sec / 2**20:.1f} MiB/s, "
+            f"write {peaks.io_write_bytes_per_sec / 2**20:.1f} MiB/s"
+            for service_id, peaks in self.get_peaks().items()
+        ]
+
+    def write_csv(self, path: str) -> None:
+        """Write all samples in the ring to a CSV file."""
+        with open(path, "w", encoding="utf-8", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(ResourceSample._fields)
+            writer.writerows(self.get_samples())
+
+    def write_prometheus_textfile(self, path: str) -> None:
+        """Write the latest sample and the peak memory usage of each service
+        in the Prometheus text format, e.g. for the textfile collector of the
+        node exporter.
+
+        The file is replaced atomically, so it may be written while being
+        scraped.
+        """
+        latest: Dict[str, ResourceSample] = {}
+        for sample in self.get_samples():
+            latest[sample.service_id] = sample
+        peaks = self.get_peaks()
+
+        metrics = [
+            (
+                "cpu_usage_seconds_total",
+                "counter",
+                "CPU time used.",
+                lambda sample: sample.cpu_usec / 1e6,
+            ),
+            (
+                "memory_bytes",
+                "gauge",
+                "Memory used.",
+                lambda sample: sample.memory_bytes,
+            ),
+            (
+                "memory_peak_bytes",
+                "gauge",
+                "Peak memory used while sampled.",
+                lambda sample: peaks[sample.service_id].memory_bytes,
+            ),
+            (
+                "io_read_bytes_total",
+                "counter",
+                "Bytes read from block devices.",
+                lambda sample: sample.io_read_bytes,
+            ),
+            (
+                "io_written_bytes_total",
+                "counter",
+                "Bytes written to block devices.",
+                lambda sample: sample.io_write_bytes,
+            ),
+        ]
+        lines: List[str] = []
+        for name, kind, description, get_value in metrics:
+            lines.append(f"# HELP velocitas_service_{name} {description}")
+            lines.append(f"# TYPE velocitas_service_{name} {kind}")
+            for service_id, sample in latest.items():
+                lines.append(
+                    f'velocitas_service_{name}{{service="{service_id}"}} '
+                    f"{get_value(sample)}"
+                )
+
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as textfile:
+            textfile.write("\n".join(lines) + "\n")
+        os.replace(temp_path, path)
+
+    def _get_reader(self, service_id: str) -> Optional[_CgroupReader]:
+        reader = self._readers.get(service_id)
+        if reader is None:
+            cgroup_dir = self.locate_cgroup(service_id)
+            if cgroup_dir is None:
+                return None
+            try:
+                reader = _CgroupReader(cgroup_dir)
+            except OSError:
+                # e.g. a cgroup v1 hierarchy or a controller not enabled
+                return None
+            self._readers[service_id] = reader
+        return reader
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            started = time.monotonic()
+            self.sample()
+            if self.textfile_path is not None:
+                self.write_prometheus_textfile(self.textfile_path)
+            self._stopped.wait(max(self.interval_sec - (time.monotonic() - started), 0))
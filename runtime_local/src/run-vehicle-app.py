@@ -13,34 +13,71 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import argparse
+import os
+import signal
 import subprocess
+from typing import Dict, List, Optional
 
+from app_reloader import AppReloader, get_python_script, watch_app
+from service_config import get_service_port
 from velocitas_lib.middleware import MiddlewareType, get_middleware_type
-from velocitas_lib.services import get_service_port
+
+stopping = False
+
+
+def get_middleware_env(envs: Optional[List[str]]) -> Dict[str, str]:
+    """Return the environment of the app, configuring the middleware.
+
+    Args:
+        envs: Additional environment variables, as 'NAME=VALUE'.
+    """
+    if get_middleware_type() != MiddlewareType.NATIVE:
+        raise NotImplementedError("Unsupported middleware type!")
+
+    vdb_address = "grpc://127.0.0.1"
+    vdb_port = get_service_port("vehicledatabroker")
+    mqtt_address = "mqtt://127.0.0.1"
+    mqtt_port = get_service_port("mqtt-broker")
+
+    middleware_config = {
+        "SDV_MIDDLEWARE_TYPE": "native",
+        "SDV_VEHICLEDATABROKER_ADDRESS": f"{vdb_address}:{vdb_port}",
+        "SDV_MQTT_ADDRESS": f"{mqtt_address}:{mqtt_port}",
+    }
+    if envs:
+        middleware_config.update({env.split("=")[0]: env.split("=")[1] for env in envs})
+    return middleware_config
 
 
 def run_app(executable_path: str, args: list[str], envs: list[str]):
     program_args = [executable_path, *args]
+    subprocess.check_call(program_args, env=get_middleware_env(envs))
 
-    if get_middleware_type() == MiddlewareType.NATIVE:
-        vdb_address = "grpc://127.0.0.1"
-        vdb_port = get_service_port("vehicledatabroker")
-        mqtt_address = "mqtt://127.0.0.1"
-        mqtt_port = get_service_port("mqtt-broker")
-
-        middleware_config = {
-            "SDV_MIDDLEWARE_TYPE": "native",
-            "SDV_VEHICLEDATABROKER_ADDRESS": f"{vdb_address}:{vdb_port}",
-            "SDV_MQTT_ADDRESS": f"{mqtt_address}:{mqtt_port}",
-        }
-        if envs:
-            middleware_config.update(
-                {env.split("=")[0]: env.split("=")[1] for env in envs}
-            )
-
-        subprocess.check_call(program_args, env=middleware_config)
-    else:
-        raise NotImplementedError("Unsupported middleware type!")
+
+def watch(
+    executable_path: str,
+    args: List[str],
+    envs: List[str],
+    paths: List[str],
+    preload: List[str],
+) -> None:
+    """Run the app and restart it whenever files within the paths change.
+
+    The environment of the app is only computed once.
+    """
+    program_args = [executable_path, *args]
+    if not paths:
+        # the directory of the Python script or the executable
+        script = get_python_script(program_args) or program_args
+        paths = [os.path.dirname(os.path.abspath(script[0]))]
+    reloader = AppReloader(program_args, get_middleware_env(envs), preload)
+    print(f"Watching {', '.join(paths)} for changes")
+    watch_app(reloader, paths, is_stopping=lambda: stopping)
+
+
+def handler(_signum, _frame):  # noqa: U101 unused arguments
+    global stopping
+    stopping = True
 
 
 if __name__ == "__main__":
@@ -55,5 +92,31 @@ if __name__ == "__main__":
         "-e", "--env", help="Environment variable to pass to the app.", action="append"
     )
 
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Restart the app whenever its files change.",
+    )
+    parser.add_argument(
+        "--watch-path",
+        action="append",
+        default=[],
+        help="Directory to watch for changes (default: the one of the app).",
+    )
+    parser.add_argument(
+        "--preload",
+        action="append",
+        default=[],
+        help="Module a warm interpreter imports ahead of restarts of a Python "
+        "app, e.g. 'velocitas_sdk.vehicle_app'.",
+    )
+
     args = parser.parse_args()
-    run_app(args.executable_path, args.app_args, args.env)
+    if args.watch:
+        signal.signal(signal.SIGINT, handler)
+        signal.signal(signal.SIGTERM, handler)
+        watch(
+            args.executable_path, args.app_args, args.env, args.watch_path, args.preload
+        )
+    else:
+        run_app(args.executable_path, args.app_args, args.env)
@@ -18,8 +18,23 @@
 
 # from local_lib import get_container_runtime_executable
 # from velocitas_lib import require_env
+import argparse
 import os
 import subprocess
+import sys
+from typing import Optional
+
+from databroker_cli import (
+    DETACH_KEYS,
+    CliSession,
+    get_attach_args,
+    get_run_args,
+    get_summary,
+    parse_script,
+    run_batch,
+    start_session,
+    stop_session,
+)
 
 
 def require_env(name: str) -> str:
@@ -48,19 +63,107 @@ def get_container_runtime_executable() -> str:
 # Workaround fix end: Databroker CLI is not reactive if started via CLI in Python venv
 
 
-def run_databroker_cli():
+def run_databroker_cli(session: bool) -> None:
+    """Run the CLI interactively.
+
+    Args:
+        session: Attach to the CLI kept running in the session container,
+            starting it if needed, instead of running a new container.
+    """
+    executable = get_container_runtime_executable()
+    databroker_cli_image = require_env("vehicleDatabrokerCliImage")
+    if not session:
+        subprocess.check_call(get_run_args(executable, databroker_cli_image))
+        return
+
+    start_session(executable, databroker_cli_image)
+    print(
+        "Attached to the databroker CLI session, press enter for the prompt "
+        "and ctrl-p ctrl-q to detach"
+    )
+    subprocess.call(get_attach_args(executable))
+
+
+def run_databroker_cli_batch(
+    script_path: str, session: bool, timeout_sec: float
+) -> bool:
+    """Run the CLI commands of a script in a single CLI and print the output
+    and latency of each command.
+
+    Args:
+        script_path: The script, '-' for stdin.
+        session: Run the commands in the CLI kept running in the session
+            container, starting it if needed, instead of a new container.
+        timeout_sec: Timeout [in seconds] of each command.
+
+    Returns:
+        bool: True if all commands were run, False otherwise.
+    """
+    if script_path == "-":
+        commands = parse_script(sys.stdin)
+    else:
+        with open(script_path, encoding="utf-8") as script:
+            commands = parse_script(script)
+
+    executable = get_container_runtime_executable()
     databroker_cli_image = require_env("vehicleDatabrokerCliImage")
-    program_args = [
-        get_container_runtime_executable(),
-        "run",
-        "-it",
-        "--rm",
-        "--network",
-        "host",
-        databroker_cli_image,
-    ]
-    subprocess.check_call(program_args)
+    cli: Optional[CliSession] = None
+    try:
+        if session:
+            started = start_session(executable, databroker_cli_image)
+            cli = CliSession(get_attach_args(executable), close_keys=DETACH_KEYS)
+            # a prompt printed before attaching is not repeated, an empty line
+            # prints it again
+            cli.run("", max(timeout_sec, 60))
+            if started:
+                # the first prompt of the CLI may have been printed after
+                # attaching, then the one answering the empty line follows
+                cli.drain()
+        else:
+            cli = CliSession(get_run_args(executable, databroker_cli_image))
+            # covers the container startup and the connect to the databroker
+            cli.wait_for_prompt(max(timeout_sec, 60))
+        results = run_batch(cli, commands, timeout_sec, sys.stdout)
+    except RuntimeError as error:
+        print(error, file=sys.stderr)
+        return False
+    finally:
+        if cli is not None:
+            cli.close()
+    print(get_summary(results))
+    return True
 
 
 if __name__ == "__main__":
-    run_databroker_cli()
+    parser = argparse.ArgumentParser(
+        description="Runs the CLI of the vehicle databroker."
+    )
+    parser.add_argument(
+        "--session",
+        action="store_true",
+        help="Keep the CLI running in a container and attach to it.",
+    )
+    parser.add_argument(
+        "--stop-session",
+        action="store_true",
+        help="Remove the container the CLI is kept running in.",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="SCRIPT",
+        help="Run the CLI commands of the script, one per line ('-' for stdin).",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=10,
+        help="Timeout [in seconds] of each command of the batch.",
+    )
+    args = parser.parse_args()
+    if args.stop_session:
+        stop_session(get_container_runtime_executable())
+    elif args.batch:
+        if not run_databroker_cli_batch(args.batch, args.session, args.timeout):
+            sys.exit(1)
+    else:
+        run_databroker_cli(args.session)
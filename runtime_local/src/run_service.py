@@ -14,69 +14,80 @@
 
 import argparse
 import signal
-import subprocess
 import sys
-import time
-from typing import Dict, Optional
+from typing import Optional
+
+from image_prefetch import prefetch_images
+from local_lib import (
+    ServiceProcess,
+    adopt_service,
+    create_supervisor,
+    get_container_backend,
+    restart_service,
+    supervise_services,
+    terminate_supervised_services,
+)
+from log_sink import print_log_tail
+from runtime_daemon import is_daemon_running, start_in_daemon
+from service_config import get_services, get_specific_service
+from spinner import create_spinner
+from velocitas_lib.services import Service
+from vss_subset import apply_vss_subset
+
+supervisor = create_supervisor()
+keep_alive = False
 
-from local_lib import run_service, stop_container, stop_service
-from velocitas_lib import get_log_file_name
-from velocitas_lib.services import Service, get_services, get_specific_service
-from yaspin import yaspin
 
-spawned_processes: Dict[str, subprocess.Popen] = {}
+def run_specific_service(service: Service) -> None:
+    """Run specified service.
 
+    In keep-alive mode an up to date container of the service which is
+    already running is adopted instead of being restarted.
+    """
 
-def run_specific_service(service: Service) -> None:
-    """Run specified service."""
+    with create_spinner(f"Starting service {service.id}") as spinner:
+
+        def update_pull_progress(summary: str):
+            spinner.text = summary
 
-    with yaspin(text=f"Starting service {service.id}", color="cyan") as spinner:
         try:
-            stop_service(service)
-            spawned_processes[service.id] = run_service(service)
+            pulled_images = prefetch_images(
+                [service], get_container_backend(), update_pull_progress
+            )
+        except RuntimeError as error:
+            spinner.write(error.args)
+            spinner.fail("💥")
+            return
+        for image in pulled_images:
+            spinner.write(f"> {image} pulled")
+        spinner.text = f"Starting service {service.id}"
+
+        try:
+            process: Optional[ServiceProcess] = None
+            if keep_alive:
+                process = adopt_service(service)
+            if process is None:
+                process = restart_service(service)
+            else:
+                spinner.write(f"> {service.id} kept running")
+            supervisor.supervise(service, process)
             spinner.ok("✅")
         except RuntimeError as error:
             spinner.write(error.args)
             spinner.fail("💥")
-            terminate_spawned_processes()
+            terminate_supervised_services(supervisor)
             print(f"Starting {service.id=} failed")
-            with open(
-                get_log_file_name(service.id, "runtime_local"),
-                mode="r",
-                encoding="utf-8",
-            ) as log:
-                print(f">>>> Start log of {service.id} >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>")
-                print(log.read(), end="")
-                print(f"<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<< End log of {service.id} <<<<")
-
-
-def wait_while_processes_are_running():
-    while len(spawned_processes) > 0:
-        time.sleep(1)
-        for process in spawned_processes.values():
-            process.poll()
-
-
-def terminate_spawned_processes():
-    with yaspin(text="Stopping service", color="cyan") as spinner:
-        while len(spawned_processes) > 0:
-            (service_id, process) = spawned_processes.popitem()
-            process.terminate()
-            stop_container(service_id, subprocess.DEVNULL)
-            spinner.write(
-                f"> {[process.args][0]!r} (service-id='{service_id}') terminated"
-            )
-        spinner.ok("✅")
+            print_log_tail(service.id, "runtime_local")
 
 
 def handler(_signum, _frame):  # noqa: U101 unused arguments
-    terminate_spawned_processes()
+    supervisor.shutdown()
 
 
 def main(service_id: str) -> bool:
     service: Optional[Service] = None
     try:
-        service = get_specific_service(service_id)
+        service = apply_vss_subset([get_specific_service(service_id)])[0]
     except RuntimeError as e:
         print(f"Error: {e.__str__()}")
         print("Available services:")
@@ -84,8 +95,13 @@ def main(service_id: str) -> bool:
             print(f" * {service.id!r}")
         return False
 
+    if is_daemon_running():
+        # the daemon owns the service, so there is nothing to supervise here
+        with create_spinner() as spinner:
+            return start_in_daemon([service.id], spinner)
+
     run_specific_service(service)
-    wait_while_processes_are_running()
+    supervise_services(supervisor, keep_alive)
     return True
 
 
@@ -99,7 +115,14 @@ if __name__ == "__main__":
         type=str,
         help="Id of the service to start - refers to 'id' key in runtime.json",
     )
+    parser.add_argument(
+        "--keep-alive",
+        action="store_true",
+        help="Adopt the running service if its configuration did not change "
+        "instead of restarting it and keep the service running on exit.",
+    )
     args = parser.parse_args()
+    keep_alive = args.keep_alive
 
     signal.signal(signal.SIGINT, handler)
     signal.signal(signal.SIGTERM, handler)
@@ -0,0 +1,115 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import argparse
+import signal
+import sys
+from datetime import datetime
+
+from runtime_daemon import (
+    DaemonError,
+    RuntimeDaemon,
+    call_daemon,
+    get_daemon_socket_path,
+    serve,
+)
+
+daemon = None
+
+
+def handler(_signum, _frame):  # noqa: U101 unused arguments
+    if daemon is not None:
+        daemon.supervisor.shutdown()
+
+
+def run_daemon(keep_alive: bool) -> None:
+    """Run the daemon in the foreground until it gets shut down."""
+    global daemon
+    daemon = RuntimeDaemon(keep_alive, lambda event: print(f"> {event}", flush=True))
+    path = get_daemon_socket_path()
+    serve(
+        daemon, path, lambda: print(f"Runtime daemon listening on {path}", flush=True)
+    )
+    for service_id in daemon.close():
+        print(f"> {service_id} {'kept running' if keep_alive else 'stopped'}")
+
+
+def print_status() -> None:
+    status = call_daemon("status")
+    print(f"Runtime daemon (pid {status['pid']}):")
+    for service in status["services"]:
+        details = [service["state"]]
+        if service["pid"] is not None:
+            details.append(f"pid {service['pid']}")
+        if service["started_at"] is not None:
+            started_at = datetime.fromtimestamp(service["started_at"])
+            details.append(f"since {started_at:%H:%M:%S}")
+        if service["time_to_ready_sec"] is not None:
+            details.append(f"ready after {service['time_to_ready_sec']:.2f} s")
+        print(f" * {service['id']}: {', '.join(details)}")
+    if status["events"]:
+        print("Latest events:")
+        for event in status["events"]:
+            print(f"  {event}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Long-lived owner of the services of the local runtime, "
+        "controlled via a unix socket. While it runs, up, down and run-service "
+        "delegate to it."
+    )
+    commands = parser.add_subparsers(dest="command")
+    serve_parser = commands.add_parser("serve", help="Run the daemon (default).")
+    serve_parser.add_argument(
+        "--keep-alive",
+        action="store_true",
+        help="Adopt running services whose configuration did not change instead "
+        "of restarting them and keep the services running on exit.",
+    )
+    commands.add_parser("status", help="Show the state of the services.")
+    logs_parser = commands.add_parser("logs", help="Show the log of a service.")
+    logs_parser.add_argument("service_id", help="Id of the service.")
+    logs_parser.add_argument(
+        "-n", "--lines", type=int, default=100, help="Number of lines to show."
+    )
+    restart_parser = commands.add_parser("restart", help="Restart a service.")
+    restart_parser.add_argument("service_id", help="Id of the service.")
+    commands.add_parser("shutdown", help="Stop the services and the daemon.")
+    parser.set_defaults(command="serve", keep_alive=False)
+    args = parser.parse_args()
+
+    try:
+        if args.command == "serve":
+            signal.signal(signal.SIGINT, handler)
+            signal.signal(signal.SIGTERM, handler)
+            run_daemon(args.keep_alive)
+        elif args.command == "status":
+            print_status()
+        elif args.command == "logs":
+            print(
+                "".join(call_daemon("logs", service=args.service_id, lines=args.lines)),
+                end="",
+            )
+        elif args.command == "restart":
+            call_daemon("restart", service=args.service_id)
+            print(f"> {args.service_id} restarted")
+        else:
+            call_daemon("shutdown")
+    except (DaemonError, RuntimeError) as error:
+        print(f"Error: {error}")
+        sys.exit(1)
+    except OSError as error:
+        print(f"Error: the runtime daemon is not reachable ({error})")
+        sys.exit(1)
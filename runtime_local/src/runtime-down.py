@@ -12,25 +12,35 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 
-from local_lib import stop_service
-from velocitas_lib.services import get_services
-from yaspin import yaspin
+from databroker_cli import SESSION_CONTAINER_NAME, stop_session
+from local_lib import get_container_runtime_executable, stop_services
+from runtime_daemon import call_daemon, is_daemon_running
+from service_config import get_services
+from spinner import create_spinner
 
 
 def runtime_down():
     """Stop the local runtime."""
 
     print("Hint: Log files can be found in your workspace's logs directory")
-    with yaspin(text="Stopping local runtime...", color="cyan") as spinner:
-        for service in get_services():
-            try:
-                spinner.text = f"Stopping {service.id}..."
-                stop_service(service)
-                spinner.write(f"> {service.id} stopped")
-            except Exception as error:
-                spinner.write(error.args)
-                spinner.fail("💥")
-                print(f"Stopping {service.id} failed")
+    with create_spinner("Stopping local runtime...") as spinner:
+        try:
+            if is_daemon_running():
+                # stopping the services of the daemon keeps them from being
+                # restarted by it
+                stopped = call_daemon("stop")["stopped"]
+            else:
+                stopped = [service.id for service in stop_services(get_services())]
+            for service_id in stopped:
+                spinner.write(f"> {service_id} stopped")
+            # its CLI stays connected to the stopped databroker otherwise
+            if stop_session(get_container_runtime_executable()):
+                spinner.write(f"> {SESSION_CONTAINER_NAME} stopped")
+        except Exception as error:
+            spinner.write(error.args)
+            spinner.fail("💥")
+            print("Stopping local runtime failed")
+            return
 
         spinner.text = "Stopped local runtime!"
         spinner.ok("✅")
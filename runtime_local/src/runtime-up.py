@@ -12,77 +12,231 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 
+import argparse
+import os
 import signal
-import subprocess
+import sys
 import time
-from typing import Dict
+from threading import Lock
+from typing import TYPE_CHECKING, Dict, Optional
 
-from local_lib import run_service, stop_container, stop_service
-from velocitas_lib import get_log_file_name
-from velocitas_lib.services import get_services
-from yaspin import yaspin
+from local_lib import (
+    ServiceProcess,
+    adopt_service,
+    create_supervisor,
+    get_container_backend,
+    restart_service,
+    supervise_services,
+    terminate_supervised_services,
+)
+from log_sink import print_log_tail
+from service_config import get_services
+from spinner import create_spinner
+from startup_trace import get_startup_trace, get_startup_trace_path, write_startup_trace
+from velocitas_lib.services import Service
 
-spawned_processes: Dict[str, subprocess.Popen] = {}
+if TYPE_CHECKING:
+    from resource_sampler import ResourceSampler
 
+supervisor = create_supervisor()
+keep_alive = False
 
-def run_services() -> None:
-    """Run all required services."""
+
+def run_services(ready_budget_sec: Optional[float] = None) -> bool:
+    """Run all required services.
+
+    In keep-alive mode, services whose up to date container is already
+    running are adopted instead of being restarted.
+
+    A trace of the startup is written to the logs directory and the critical
+    path of the startup is summarized.
+
+    Args:
+        ready_budget_sec: Time [in seconds] all services need to be ready in,
+            otherwise the startup fails.
+
+    Returns:
+        bool: True if all services are running, False otherwise.
+    """
+    # only needed if no daemon owns the services
+    from image_prefetch import prefetch_images
+    from startup_scheduler import (
+        DependencyError,
+        ServiceStartupError,
+        build_dependency_graph,
+        start_services,
+    )
+    from vss_subset import apply_vss_subset
 
     print("Hint: Log files can be found in your workspace's logs directory")
-    with yaspin(text="Starting runtime...", color="cyan") as spinner:
+    trace = get_startup_trace()
+    with create_spinner("Starting runtime...") as spinner:
+        starting: Dict[str, None] = {}
+        lock = Lock()
+
+        def update_pull_progress(summary: str):
+            spinner.text = summary
+
+        def update_spinner_text():
+            spinner.text = f"Starting {', '.join(starting)}..."
+
+        def on_starting(service: Service):
+            with lock:
+                starting[service.id] = None
+                update_spinner_text()
+
+        adopted: Dict[str, None] = {}
+
+        def start(service: Service) -> ServiceProcess:
+            if supervisor.stopping:
+                raise RuntimeError("Startup interrupted")
+            process: Optional[ServiceProcess] = None
+            if keep_alive:
+                process = adopt_service(service)
+            if process is not None:
+                adopted[service.id] = None
+                return process
+            return restart_service(service)
+
+        def on_started(service: Service, process: ServiceProcess):
+            supervisor.supervise(service, process)
+            with lock:
+                del starting[service.id]
+                state = "kept running" if service.id in adopted else "running"
+                spinner.write(f"> {service.id} {state}")
+                update_spinner_text()
+
+        services = apply_vss_subset(get_services())
+        try:
+            graph = build_dependency_graph(services)
+        except DependencyError as error:
+            spinner.write(str(error))
+            spinner.fail("💥")
+            return False
+
+        prefetch_start = time.monotonic()
         try:
-            for service in get_services():
-                stop_service(service)
-                spinner.text = f"Starting {service.id}..."
-                spawned_processes[service.id] = run_service(service)
-                spinner.write(f"> {service.id} running")
-            spinner.text = "Runtime is ready to use!"
-            spinner.ok("✅")
+            pulled_images = prefetch_images(
+                services, get_container_backend(), update_pull_progress
+            )
         except RuntimeError as error:
             spinner.write(error.args)
             spinner.fail("💥")
-            terminate_spawned_processes()
-            print(f"Starting {service.id} failed")
-            with open(
-                get_log_file_name(service.id, "runtime_local"),
-                mode="r",
-                encoding="utf-8",
-            ) as log:
-                print(f">>>> Start log of {service.id} >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>")
-                print(log.read(), end="")
-                print(f"<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<< End log of {service.id} <<<<")
-
-
-def wait_while_processes_are_running():
-    while len(spawned_processes) > 0:
-        time.sleep(1)
-        for name, process in spawned_processes.items():
-            poll_result = process.poll()
-
-            if isinstance(poll_result, int):
-                print(f"Process terminated: {name!r} result: {poll_result}")
-                del spawned_processes[name]
-                break
-
-
-def terminate_spawned_processes():
-    with yaspin(text="Stopping runtime...", color="cyan") as spinner:
-        while len(spawned_processes) > 0:
-            (service_id, process) = spawned_processes.popitem()
-            process.terminate()
-            stop_container(service_id, subprocess.DEVNULL)
+            return False
+        for service in services:
+            trace.add_span(
+                service.id, "image resolve", prefetch_start, time.monotonic()
+            )
+        for image in pulled_images:
+            spinner.write(f"> {image} pulled")
+
+        try:
+            start_services(services, start, on_started, on_starting)
+        except ServiceStartupError as error:
+            spinner.write(error.args)
+            spinner.fail("💥")
+            terminate_supervised_services(supervisor)
+            print(f"Starting {error.service_id} failed")
+            print_log_tail(error.service_id, "runtime_local")
+            return False
+        finally:
+            write_startup_trace(trace)
+
+        time_to_ready = max(trace.get_ready_times().values(), default=0.0)
+        summary = trace.summary(graph)
+        if ready_budget_sec is not None and time_to_ready > ready_budget_sec:
             spinner.write(
-                f"> {[process.args][0]!r} (service_id={service_id!r}) terminated"
+                f"Time to ready of {time_to_ready:.2f} s exceeds the budget of "
+                f"{ready_budget_sec} s"
             )
+            spinner.fail("💥")
+            print("\n".join(summary))
+            terminate_supervised_services(supervisor)
+            return False
+
+        spinner.text = "Runtime is ready to use!"
         spinner.ok("✅")
+    print("\n".join(summary))
+    print(f"Startup trace: {get_startup_trace_path()}")
+    return True
+
+
+def start_resource_sampler(interval_sec: float) -> "ResourceSampler":
+    """Start sampling the resource usage of the running services, keeping
+    the Prometheus textfile up to date."""
+    # only needed if the resources are sampled
+    from resource_sampler import ResourceSampler, get_resource_samples_path
+
+    textfile_path = get_resource_samples_path("prom")
+    os.makedirs(os.path.dirname(textfile_path), exist_ok=True)
+    sampler = ResourceSampler(
+        list(supervisor.processes), interval_sec, textfile_path=textfile_path
+    )
+    sampler.start()
+    return sampler
+
+
+def stop_resource_sampler(sampler: "ResourceSampler") -> None:
+    """Stop sampling, export the samples and summarize the peak usage."""
+    from resource_sampler import get_resource_samples_path
+
+    sampler.stop()
+    csv_path = get_resource_samples_path("csv")
+    sampler.write_csv(csv_path)
+    if not sampler.get_samples():
+        print("No resource samples, cgroup v2 is required")
+        return
+    print("Peak resource usage:")
+    for line in sampler.summary():
+        print(f"  {line}")
+    print(f"Resource samples: {csv_path}")
 
 
 def handler(_signum, _frame):  # noqa: U101 unused arguments
-    terminate_spawned_processes()
+    supervisor.shutdown()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Start all services as defined in runtime.json."
+    )
+    parser.add_argument(
+        "--keep-alive",
+        action="store_true",
+        help="Adopt running services whose configuration did not change instead "
+        "of restarting them and keep the services running on exit.",
+    )
+    parser.add_argument(
+        "--ready-budget",
+        type=float,
+        metavar="SECONDS",
+        help="Fail if not all services are ready within the given time.",
+    )
+    parser.add_argument(
+        "--sample-resources",
+        type=float,
+        metavar="SECONDS",
+        help="Sample the CPU, memory and I/O usage of the services at the given "
+        "interval and summarize their peak usage on exit.",
+    )
+    args = parser.parse_args()
+    keep_alive = args.keep_alive
+
+    from runtime_daemon import is_daemon_running, start_in_daemon
+
+    if is_daemon_running():
+        # the daemon owns the services, so there is nothing to supervise here
+        with create_spinner() as spinner:
+            sys.exit(0 if start_in_daemon(None, spinner) else 1)
+
     signal.signal(signal.SIGINT, handler)
     signal.signal(signal.SIGTERM, handler)
-    run_services()
-    wait_while_processes_are_running()
+    if not run_services(args.ready_budget):
+        sys.exit(1)
+    if args.sample_resources:
+        sampler = start_resource_sampler(args.sample_resources)
+        supervise_services(
+            supervisor, keep_alive, on_stopped=lambda: stop_resource_sampler(sampler)
+        )
+    else:
+        supervise_services(supervisor, keep_alive)
@@ -0,0 +1,436 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""Long-lived owner of the service processes of the local runtime.
+
+The daemon keeps the resolved services and the state of their processes in
+memory and is controlled via JSON-RPC 2.0 over a unix socket, one request
+and one response per line.
+"""
+
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import time
+from collections import deque
+from threading import Lock, Thread
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from local_lib import (
+    ServiceProcess,
+    adopt_service,
+    create_supervisor,
+    detach_process,
+    restart_service,
+    stop_services,
+)
+from log_sink import get_log_tail
+from service_config import get_services
+from spinner import Spinner
+from startup_scheduler import (
+    DependencyError,
+    ServiceStartupError,
+    build_dependency_graph,
+    start_services,
+)
+from startup_trace import get_startup_trace
+from velocitas_lib import get_workspace_dir
+from velocitas_lib.services import Service
+from vss_subset import apply_vss_subset
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+RELEASE_TIMEOUT_SEC = 120
+CLIENT_TIMEOUT_SEC = 300
+MAX_EVENTS = 100
+
+
+class DaemonError(Exception):
+    """An error response of the runtime daemon."""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+def get_daemon_socket_path() -> str:
+    """Return the path of the control socket of the daemon of the workspace.
+
+    It can be set by the 'runtimeDaemonSocket' variable. By default it is
+    located in the temp directory, as the length of socket paths is limited.
+    """
+    path = os.getenv("runtimeDaemonSocket")
+    if path:
+        return path
+    workspace_hash = hashlib.sha256(get_workspace_dir().encode("utf-8")).hexdigest()
+    return os.path.join(
+        tempfile.gettempdir(), f"velocitas-runtime-local-{workspace_hash[:12]}.sock"
+    )
+
+
+class RuntimeDaemon:
+    """Starts, stops and supervises the services on behalf of its clients."""
+
+    def __init__(
+        self, keep_alive: bool = False, on_event: Callable[[str], None] = print
+    ):
+        """
+        Args:
+            keep_alive: Whether to adopt running, up to date containers and to
+                keep the services running when the daemon shuts down.
+            on_event: Called with a message whenever services got started or
+                stopped, exited or got restarted.
+        """
+        self.keep_alive = keep_alive
+        self._on_event_callback = on_event
+        self.services: Dict[str, Service] = {
+            service.id: service
+            for service in apply_vss_subset(get_services(verbose=False))
+        }
+        self.supervisor = create_supervisor(self._on_event)
+        self.events: Deque[str] = deque(maxlen=MAX_EVENTS)
+        self._started_at: Dict[str, float] = {}
+        # commands changing the services are executed one after the other
+        self._lock = Lock()
+        self.methods: Dict[str, Callable[..., Any]] = {
+            "start": self.start,
+            "stop": self.stop,
+            "restart": self.restart,
+            "status": self.status,
+            "logs": self.logs,
+            "shutdown": self.shutdown,
+        }
+
+    def _on_event(self, event: str) -> None:
+        self.events.append(f"{time.strftime('%H:%M:%S')} {event}")
+        self._on_event_callback(event)
+
+    def _get_services(self, service_ids: Optional[List[str]]) -> List[Service]:
+        if service_ids is None:
+            return list(self.services.values())
+        unknown = [sid for sid in service_ids if sid not in self.services]
+        if unknown:
+            raise DaemonError(INVALID_PARAMS, f"Unknown services: {', '.join(unknown)}")
+        return [self.services[service_id] for service_id in service_ids]
+
+    def _start(self, service: Service) -> Optional[ServiceProcess]:
+        if self.supervisor.stopping:
+            raise RuntimeError("Daemon is shutting down")
+        process = adopt_service(service) if self.keep_alive else None
+        return process if process is not None else restart_service(service)
+
+    def start(self, services: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """Start the given services (default: all) and the services they
+        depend on, unless they are running already.
+
+        Returns:
+            Dict[str, List[str]]: The IDs of the 'started' services and of
+                those which were 'running' already.
+        """
+        with self._lock:
+            requested = self._get_services(services)
+            running = self.supervisor.get_states()
+            # services which are running already are part of the startup to
+            # resolve the dependencies of the others
+            started: List[str] = []
+
+            def start(service: Service) -> Optional[ServiceProcess]:
+                if service.id in running:
+                    return None
+                return self._start(service)
+
+            def on_started(service: Service, process: Optional[ServiceProcess]):
+                if process is not None:
+                    self.supervisor.supervise_threadsafe(service, process)
+                    self._started_at[service.id] = time.time()
+                    started.append(service.id)
+                    self._on_event(f"{service.id} started")
+
+            try:
+                start_services(self._with_dependencies(requested), start, on_started)
+            except DependencyError as error:
+                raise DaemonError(SERVER_ERROR, str(error)) from error
+            except ServiceStartupError as error:
+                log = "".join(get_log_tail(error.service_id, "runtime_local"))
+                raise DaemonError(
+                    SERVER_ERROR,
+                    f"Starting {error.service_id} failed: {error}\n{log}",
+                ) from error
+            except RuntimeError as error:
+                raise DaemonError(SERVER_ERROR, str(error)) from error
+            return {
+                "started": started,
+                "running": [s.id for s in requested if s.id in running],
+            }
+
+    def _with_dependencies(self, services: List[Service]) -> List[Service]:
+        """Return the services and all services they transitively depend on."""
+        graph = build_dependency_graph(list(self.services.values()))
+        required = {service.id for service in services}
+        pending = list(required)
+        while pending:
+            for dependency in graph[pending.pop()]:
+                if dependency not in required:
+                    required.add(dependency)
+                    pending.append(dependency)
+        return [service for service in self.services.values() if service.id in required]
+
+    def stop(self, services: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """Stop the given services (default: all).
+
+        Returns:
+            Dict[str, List[str]]: The IDs of the 'stopped' services.
+        """
+        with self._lock:
+            return {"stopped": self._stop(self._get_services(services))}
+
+    def _stop(self, services: List[Service]) -> List[str]:
+        releases = [self.supervisor.release(service.id) for service in services]
+        for release in releases:
+            process = release.result(RELEASE_TIMEOUT_SEC)
+            if process is not None:
+                process.terminate()
+        for service in services:
+            self._started_at.pop(service.id, None)
+        stopped = [service.id for service in stop_services(services)]
+        for service_id in stopped:
+            self._on_event(f"{service_id} stopped")
+        return stopped
+
+    def restart(self, service: str) -> Dict[str, List[str]]:
+        """Restart a single service."""
+        with self._lock:
+            target = self._get_services([service])
+            self._stop(target)
+        return self.start([service])
+
+    def status(self) -> Dict[str, Any]:
+        """Return the state of all services and the latest supervision events."""
+        states = self.supervisor.get_states()
+        ready_times = get_startup_trace().get_ready_times()
+        services = []
+        for service_id, service in self.services.items():
+            process = self.supervisor.processes.get(service_id, (None, None))[1]
+            services.append(
+                {
+                    "id": service_id,
+                    "image": service.config.image,
+                    "state": states.get(service_id, "stopped"),
+                    "pid": getattr(process, "pid", None),
+                    "started_at": self._started_at.get(service_id),
+                    "time_to_ready_sec": ready_times.get(service_id),
+                }
+            )
+        return {"pid": os.getpid(), "services": services, "events": list(self.events)}
+
+    def logs(self, service: str, lines: int = 100) -> List[str]:
+        """Return the last lines of the log of the service."""
+        self._get_services([service])
+        return get_log_tail(service, "runtime_local")[-lines:]
+
+    def shutdown(self) -> Dict[str, Any]:
+        """Shut the daemon down after responding."""
+        self.supervisor.shutdown()
+        return {}
+
+    def close(self) -> List[str]:
+        """Stop all services, or detach from them in keep-alive mode.
+
+        Returns:
+            List[str]: The IDs of the stopped or detached services.
+        """
+        with self._lock:
+            processes = dict(self.supervisor.processes)
+            self.supervisor.processes.clear()
+            if self.keep_alive:
+                for _, process in processes.values():
+                    detach_process(process)
+                return list(processes)
+            for _, process in processes.values():
+                process.terminate()
+            return [
+                service.id
+                for service in stop_services(
+                    [service for service, _ in processes.values()]
+                )
+            ]
+
+    def handle(self, request: Any) -> Optional[Dict[str, Any]]:
+        """Execute a JSON-RPC request.
+
+        Returns:
+            The response or None, if the request is a notification.
+        """
+        request_id = request.get("id") if isinstance(request, dict) else None
+        try:
+            if (
+                not isinstance(request, dict)
+                or request.get("jsonrpc") != "2.0"
+                or not isinstance(request.get("method"), str)
+            ):
+                raise DaemonError(INVALID_REQUEST, "Invalid request")
+            method = self.methods.get(request["method"])
+            if method is None:
+                raise DaemonError(
+                    METHOD_NOT_FOUND, f"Unknown method {request['method']!r}"
+                )
+            params = request.get("params", {})
+            try:
+                if isinstance(params, list):
+                    result = method(*params)
+                else:
+                    result = method(**params)
+            except TypeError as error:
+                raise DaemonError(INVALID_PARAMS, str(error)) from error
+        except DaemonError as error:
+            response: Dict[str, Any] = {
+                "error": {"code": error.code, "message": str(error)}
+            }
+        except Exception as error:
+            response = {"error": {"code": SERVER_ERROR, "message": str(error)}}
+        else:
+            response = {"result": result}
+        if isinstance(request, dict) and "id" not in request:
+            return None
+        return {"jsonrpc": "2.0", "id": request_id, **response}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: "DaemonServer"
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError:
+                response: Optional[Dict[str, Any]] = {
+                    "jsonrpc": "2.0",
+                    "id": None,
+                    "error": {"code": PARSE_ERROR, "message": "Parse error"},
+                }
+            else:
+                response = self.server.daemon.handle(request)
+            if response is not None:
+                self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+                self.wfile.flush()
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves the JSON-RPC requests to the daemon, each connection in its own
+    thread."""
+
+    daemon_threads = True
+
+    def __init__(self, path: str, daemon: RuntimeDaemon):
+        self.daemon = daemon
+        if os.path.exists(path):
+            if is_daemon_running(path):
+                raise RuntimeError(f"A runtime daemon is already listening on {path}")
+            os.remove(path)
+        # only the user may connect
+        umask = os.umask(0o177)
+        try:
+            super().__init__(path, _RequestHandler)
+        finally:
+            os.umask(umask)
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.remove(self.server_address)  # type: ignore[arg-type]
+        except FileNotFoundError:
+            pass
+
+
+def serve(daemon: RuntimeDaemon, path: str, on_ready: Callable[[], None]) -> None:
+    """Serve requests until the daemon gets shut down, e.g. by the shutdown
+    method or by calling daemon.supervisor.shutdown from a signal handler.
+
+    Args:
+        daemon: The daemon to serve.
+        path: Path of the control socket.
+        on_ready: Called once the socket accepts requests.
+    """
+    with DaemonServer(path, daemon) as server:
+        Thread(target=server.serve_forever, daemon=True).start()
+        on_ready()
+        try:
+            daemon.supervisor.run(until_idle=False)
+        finally:
+            server.shutdown()
+
+
+def is_daemon_running(path: Optional[str] = None) -> bool:
+    """Return whether a daemon is listening on the control socket."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path or get_daemon_socket_path())
+        except OSError:
+            return False
+    return True
+
+
+def call_daemon(method: str, path: Optional[str] = None, **params) -> Any:
+    """Call a method of the daemon.
+
+    Raises:
+        DaemonError: If the daemon responded with an error.
+        OSError: If the daemon is not reachable.
+    """
+    request = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CLIENT_TIMEOUT_SEC)
+        sock.connect(path or get_daemon_socket_path())
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as responses:
+            line = responses.readline()
+    if not line:
+        raise DaemonError(SERVER_ERROR, "The daemon closed the connection")
+    response = json.loads(line)
+    if "error" in response:
+        raise DaemonError(response["error"]["code"], response["error"]["message"])
+    return response["result"]
+
+
+def start_in_daemon(service_ids: Optional[List[str]], spinner: Spinner) -> bool:
+    """Let the daemon start the given services (default: all) and report
+    the progress using the given spinner.
+
+    Returns:
+        bool: True if all services are running, False otherwise.
+    """
+    spinner.text = "Starting services via the runtime daemon..."
+    try:
+        result = call_daemon("start", services=service_ids)
+    except (DaemonError, OSError) as error:
+        spinner.write(str(error))
+        spinner.fail("💥")
+        return False
+    for service_id in result["started"]:
+        spinner.write(f"> {service_id} running")
+    for service_id in result["running"]:
+        spinner.write(f"> {service_id} kept running")
+    spinner.text = "Runtime is ready to use!"
+    spinner.ok("✅")
+    return True
@@ -0,0 +1,318 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from velocitas_lib import (
+    get_cache_data,
+    get_package_path,
+    get_project_cache_dir,
+    get_workspace_dir,
+    require_env,
+)
+from velocitas_lib.services import (
+    Service,
+    ServiceSpecConfig,
+    parse_service_config,
+    resolve_functions,
+)
+from velocitas_lib.variables import ProjectVariables, json_obj_to_flat_map
+
+CACHE_VERSION = 1
+VARIABLE = re.compile(r"\${{\s*(.*?)\s*}}")
+FUNCTION = re.compile(r"\$\w+\(")
+# a runtime file modified this close to writing the cache may have been
+# modified again within the resolution of its mtime, see git's "racy clean"
+RACY_INTERVAL_NS = 2_000_000_000
+
+
+class ResolvedRuntime(NamedTuple):
+    """The service models resolved from a runtime file, along with what they
+    depend on besides its content."""
+
+    path: str
+    mtime_ns: int
+    size: int
+    sha256: str
+    written_ns: int
+    # values of the variables referenced by the runtime file, None if unset
+    variables: Dict[str, Optional[str]]
+    # results of the function calls, by their calls with substituted variables
+    functions: Dict[str, str]
+    # the service specifications with resolved config values
+    specs: List[Dict[str, Any]]
+    services: List[Service]
+    # raised by get_services, if the specifications are incomplete
+    error: Optional[str]
+
+
+_resolved: Optional[ResolvedRuntime] = None
+
+
+def get_runtime_file_path() -> Path:
+    """Return the path of the runtime.json in use.
+
+    Mirrors the lookup done by velocitas_lib.services.get_services: the
+    'runtimeFilePath' variable redirects to a file relative to the workspace,
+    if it exists. Otherwise the runtime.json of the package is used.
+    """
+    path = Path(f"{get_package_path()}/runtime.json")
+    overwritten_path = Path(require_env("runtimeFilePath"))
+    if not overwritten_path.is_absolute():
+        overwritten_path = Path(get_workspace_dir()).joinpath(overwritten_path)
+    if overwritten_path.exists():
+        path = overwritten_path
+    return path
+
+
+def get_service_specs() -> List[Dict[str, Any]]:
+    """Return the service specifications of the runtime.json in use, with
+    variables and functions within their config values resolved."""
+    return get_resolved_runtime().specs
+
+
+def get_service_config_values(service_id: str, key: str) -> List[str]:
+    """Return all values of the given config key of a service.
+
+    velocitas_lib only parses the config keys it knows about. This gives
+    access to the keys specific to this runtime, e.g. 'depends-on'.
+    Variables and functions within the values are resolved.
+
+    Args:
+        service_id: The ID of the service.
+        key: The config key to look up.
+
+    Returns:
+        List[str]: The values in the order of their definition.
+    """
+    values: List[str] = []
+    for service_spec in get_service_specs():
+        if service_spec["id"] != service_id:
+            continue
+        for config_entry in service_spec.get("config", []):
+            if config_entry["key"] == key:
+                values.append(str(config_entry["value"]))
+    return values
+
+
+def get_services(verbose: bool = True) -> List[Service]:
+    """Return all enabled services, see velocitas_lib.services.get_services.
+
+    The services are resolved from the cache, if possible.
+
+    Args:
+        verbose: Whether to print a redirected path of the runtime.json.
+    """
+    resolved = get_resolved_runtime()
+    if resolved.error is not None:
+        raise KeyError(resolved.error)
+    if verbose and resolved.path != f"{get_package_path()}/runtime.json":
+        print(f"runtime.json path redirected to {resolved.path}")
+    return list(resolved.services)
+
+
+def get_specific_service(service_id: str) -> Service:
+    """Return the enabled service with the given ID.
+
+    Args:
+        service_id: The ID of the service.
+
+    Raises:
+        RuntimeError: If there is no or more than one service with the ID.
+    """
+    services = [service for service in get_services() if service.id == service_id]
+    if len(services) == 0:
+        raise RuntimeError(f"Service with id '{service_id}' not defined")
+    if len(services) > 1:
+        raise RuntimeError(
+            f"Multiple service definitions of id '{service_id}' found, which to take?"
+        )
+    return services[0]
+
+
+def get_service_port(service_id: str) -> str:
+    """Return the first port of the enabled service with the given ID."""
+    return get_specific_service(service_id).config.ports[0]
+
+
+def get_resolved_runtime() -> ResolvedRuntime:
+    """Return the resolved runtime.json in use.
+
+    Parsing and resolving the variables and functions of a large runtime file
+    is costly, so the result is kept in memory and in the project cache
+    directory. It is reused as long as the runtime file is unchanged, i.e.
+    its path, mtime and size (or, if modified around the time the cache was
+    written, its content) match, and the values of the variables and the
+    results of the functions it references did not change.
+    """
+    global _resolved
+
+    path = str(get_runtime_file_path())
+    candidates = [_resolved, _read_cache()] if _resolved else [_read_cache()]
+    for candidate in candidates:
+        if candidate is not None and _is_up_to_date(candidate, path):
+            _resolved = candidate
+            return candidate
+
+    _resolved = _resolve(path)
+    _write_cache(_resolved)
+    return _resolved
+
+
+def _is_up_to_date(resolved: ResolvedRuntime, path: str) -> bool:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    if (resolved.path, resolved.mtime_ns, resolved.size) != (
+        path,
+        stat.st_mtime_ns,
+        stat.st_size,
+    ):
+        return False
+    if resolved.written_ns - stat.st_mtime_ns < RACY_INTERVAL_NS:
+        with open(path, "rb") as runtime_file:
+            if hashlib.sha256(runtime_file.read()).hexdigest() != resolved.sha256:
+                return False
+
+    if _get_variable_values(resolved.variables) != resolved.variables:
+        return False
+    for call, result in resolved.functions.items():
+        try:
+            if resolve_functions(call) != result:
+                return False
+        except RuntimeError:
+            return False
+    return True
+
+
+def _resolve(path: str) -> ResolvedRuntime:
+    written_ns = time.time_ns()
+    with open(path, "rb") as runtime_file:
+        content = runtime_file.read()
+        stat = os.fstat(runtime_file.fileno())
+    specs: List[Dict[str, Any]] = json.loads(content)
+
+    variables = ProjectVariables(env=dict(os.environ))
+    functions: Dict[str, str] = {}
+    for spec in specs:
+        for config_entry in spec.get("config", []):
+            value = config_entry["value"]
+            if not isinstance(value, str):
+                continue
+            value = variables.replace_occurrences(value)
+            if FUNCTION.search(value):
+                functions[value] = resolve_functions(value)
+                value = functions[value]
+            config_entry["value"] = value
+
+    services: List[Service] = []
+    error: Optional[str] = None
+    try:
+        for spec in specs:
+            if "config" not in spec:
+                raise KeyError(f"Service {spec['id']!r} does not have a config entry!")
+            # the values are resolved already, so velocitas_lib finds no
+            # variables or functions left to resolve
+            config = parse_service_config(spec["id"], spec["config"])
+            if config.is_enabled:
+                services.append(Service(spec["id"], config))
+    except KeyError as key_error:
+        services, error = [], key_error.args[0]
+
+    return ResolvedRuntime(
+        path=path,
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+        sha256=hashlib.sha256(content).hexdigest(),
+        written_ns=written_ns,
+        variables=_get_variable_values(
+            {name: None for name in VARIABLE.findall(content.decode("utf-8"))}
+        ),
+        functions=functions,
+        specs=specs,
+        services=services,
+        error=error,
+    )
+
+
+def _get_variable_values(
+    variables: Dict[str, Optional[str]],
+) -> Dict[str, Optional[str]]:
+    """Return the current values of the given variables."""
+    values: Dict[str, Optional[str]] = {}
+    cache_values: Optional[Dict[str, str]] = None
+    for name in variables:
+        if name == "builtin.package_dir":
+            values[name] = get_package_path()
+        elif name in os.environ:
+            values[name] = os.environ[name]
+        elif name.startswith("builtin.cache."):
+            if cache_values is None:
+                cache_values = json_obj_to_flat_map(get_cache_data(), "builtin.cache")
+            value = cache_values.get(name)
+            values[name] = None if value is None else str(value)
+        else:
+            values[name] = None
+    return values
+
+
+def _get_cache_file_path() -> Optional[str]:
+    try:
+        cache_dir = get_project_cache_dir()
+    except ValueError:
+        return None
+    return os.path.join(cache_dir, "runtime_local", "services.json")
+
+
+def _read_cache() -> Optional[ResolvedRuntime]:
+    cache_file_path = _get_cache_file_path()
+    if cache_file_path is None:
+        return None
+    try:
+        with open(cache_file_path, encoding="utf-8") as cache_file:
+            cache = json.load(cache_file)
+        if cache.pop("version") != CACHE_VERSION:
+            return None
+        cache["services"] = [
+            Service(service_id, ServiceSpecConfig(*config))
+            for service_id, config in cache["services"]
+        ]
+        return ResolvedRuntime(**cache)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write_cache(resolved: ResolvedRuntime) -> None:
+    cache_file_path = _get_cache_file_path()
+    if cache_file_path is None:
+        return
+    cache = {"version": CACHE_VERSION, **resolved._asdict()}
+    cache["services"] = [[service.id, service.config] for service in resolved.services]
+    try:
+        os.makedirs(os.path.dirname(cache_file_path), exist_ok=True)
+        temp_path = f"{cache_file_path}.{os.getpid()}"
+        with open(temp_path, "w", encoding="utf-8") as cache_file:
+            json.dump(cache, cache_file, separators=(",", ":"))
+        # atomically, as concurrent commands may read the cache
+        os.replace(temp_path, cache_file_path)
+    except OSError:
+        # the cache is an optimization only, e.g. for read-only workspaces
+        pass
@@ -0,0 +1,63 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import sys
+from typing import TYPE_CHECKING, Any, Union
+
+if TYPE_CHECKING:
+    from yaspin.core import Yaspin
+
+
+class PlainSpinner:
+    """Stands in for the yaspin spinner if stdout is no TTY, e.g. in scripts
+    and CI. There is nothing to animate there, so only the messages and the
+    final state are printed, and yaspin is not even imported."""
+
+    def __init__(self, text: str = ""):
+        self.text = text
+
+    def __enter__(self) -> "PlainSpinner":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        pass
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def write(self, text: Any) -> None:
+        print(text, flush=True)
+
+    def ok(self, text: str = "OK") -> None:
+        print(f"{text} {self.text}", flush=True)
+
+    def fail(self, text: str = "FAIL") -> None:
+        print(f"{text} {self.text}", flush=True)
+
+
+Spinner = Union["Yaspin", PlainSpinner]
+
+
+def create_spinner(text: str = "") -> Spinner:
+    """Return a spinner showing the given text, which is only animated if
+    stdout is a TTY."""
+    if not sys.stdout.isatty():
+        return PlainSpinner(text)
+
+    from yaspin import yaspin
+
+    return yaspin(text=text, color="cyan")
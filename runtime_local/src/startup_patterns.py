@@ -0,0 +1,208 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import re
+from collections import deque
+from typing import Deque, List, Optional, Pattern, Tuple
+
+# shorter literals hardly rule out any line
+MIN_LITERAL_LENGTH = 3
+NEWLINE = re.compile(r"\n|\\n")
+QUANTIFIER = re.compile(r"[*+?]|\{\d*(?:,\d*)?\}")
+# escapes standing for a single character, a character class, an anchor or
+# a group reference, including their arguments
+ESCAPE = re.compile(
+    r"\\(?:x[0-9a-fA-F]{2}|u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8}|N\{[^}]*\}"
+    r"|0[0-7]{0,2}|[0-7]{3}|[1-9][0-9]?|.)",
+    re.DOTALL,
+)
+
+
+class StartupPatternMatcher:
+    """Matches output lines against the startup patterns of a service.
+
+    Each line is scanned once for the literal fragments the remaining
+    patterns require (e.g. "mosquitto version " of ".*mosquitto version
+    \\d+..."), all of them compiled into one alternation. Only if one of them
+    occurs, the patterns requiring it are run. Patterns without such a
+    fragment are run on every line.
+
+    Patterns which require newlines (besides a trailing one) are matched
+    against a window of the latest lines, so they can span line boundaries.
+    """
+
+    def __init__(self, patterns: List[Pattern[str]]):
+        """
+        Args:
+            patterns: The startup patterns, which all need to match once.
+        """
+        self.remaining = list(patterns)
+        self._window: Deque[str] = deque(
+            maxlen=max(map(_count_inner_newlines, patterns), default=0) + 1
+        )
+        self._compile()
+
+    def is_done(self) -> bool:
+        """Return whether all patterns have been matched."""
+        return len(self.remaining) == 0
+
+    def feed_line(self, line: str) -> List[Pattern[str]]:
+        """Match the next output line, including its line ending.
+
+        Returns:
+            List[Pattern[str]]: The patterns which matched for the first time.
+        """
+        matched: List[Pattern[str]] = []
+        if self._multiline:
+            self._window.append(line)
+            window = "".join(self._window)
+            matched += [
+                pattern for pattern in self._multiline if pattern.search(window)
+            ]
+
+        matched += [pattern for pattern in self._unfiltered if pattern.search(line)]
+        if self._prefilter is not None and self._prefilter.search(line):
+            matched += [
+                pattern
+                for literal, pattern in self._filtered
+                if literal in line and pattern.search(line)
+            ]
+
+        if matched:
+            for pattern in matched:
+                self.remaining.remove(pattern)
+            self._compile()
+        return matched
+
+    def _compile(self) -> None:
+        self._multiline: List[Pattern[str]] = []
+        self._unfiltered: List[Pattern[str]] = []
+        self._filtered: List[Tuple[str, Pattern[str]]] = []
+        for pattern in self.remaining:
+            literal = get_required_literal(pattern)
+            if _count_inner_newlines(pattern):
+                self._multiline.append(pattern)
+            elif literal is None:
+                self._unfiltered.append(pattern)
+            else:
+                self._filtered.append((literal, pattern))
+
+        self._prefilter: Optional[Pattern[str]] = None
+        if self._filtered:
+            literals = sorted({literal for literal, _ in self._filtered}, key=len)
+            self._prefilter = re.compile(
+                "|".join(re.escape(literal) for literal in reversed(literals))
+            )
+
+
+def get_required_literal(pattern: Pattern[str]) -> Optional[str]:
+    """Return the longest literal text any match of the pattern contains.
+
+    The pattern source is scanned conservatively: only literal characters
+    outside of groups, character classes and alternatives count, without
+    those which are quantified.
+
+    Returns:
+        Optional[str]: The literal or None, if the pattern has no literal
+            long enough to be worth a prefilter, e.g. if it ignores case or
+            cannot be scanned.
+    """
+    if pattern.flags & (re.IGNORECASE | re.VERBOSE):
+        return None
+    source = pattern.pattern
+    longest = current = ""
+    index = 0
+    try:
+        while index < len(source):
+            quantifier = QUANTIFIER.match(source, index)
+            if quantifier:
+                # the quantified item may be missing
+                current = current[:-1]
+                literal = None
+                index = quantifier.end()
+            elif source[index] == "|":
+                return None
+            elif source[index] == "\\":
+                escape = ESCAPE.match(source, index)
+                if escape is None:
+                    return None
+                text = escape.group()[1:]
+                literal = text if len(text) == 1 and not text.isalnum() else None
+                index = escape.end()
+            elif source[index] == "[":
+                literal = None
+                index = _find_class_end(source, index)
+            elif source[index] == "(":
+                literal = None
+                index = _find_group_end(source, index)
+            elif source[index] in ".^$":
+                literal = None
+                index += 1
+            else:
+                literal = source[index]
+                index += 1
+
+            if literal is None:
+                longest = max(longest, current, key=len)
+                current = ""
+            else:
+                current += literal
+    except ValueError:
+        return None
+    longest = max(longest, current, key=len)
+    return longest if len(longest) >= MIN_LITERAL_LENGTH else None
+
+
+def _find_class_end(source: str, index: int) -> int:
+    """Return the index after the character class starting at the index."""
+    index += 1
+    if source.startswith("^", index):
+        index += 1
+    if source.startswith("]", index):
+        index += 1
+    while index < len(source):
+        if source[index] == "\\":
+            index += 2
+        elif source[index] == "]":
+            return index + 1
+        else:
+            index += 1
+    raise ValueError(f"Unterminated character class in {source!r}")
+
+
+def _find_group_end(source: str, index: int) -> int:
+    """Return the index after the group starting at the index."""
+    depth = 0
+    while index < len(source):
+        if source[index] == "\\":
+            index += 2
+            continue
+        if source[index] == "[":
+            index = _find_class_end(source, index)
+            continue
+        if source[index] == "(":
+            depth += 1
+        elif source[index] == ")":
+            depth -= 1
+            if depth == 0:
+                return index + 1
+        index += 1
+    raise ValueError(f"Unbalanced group in {source!r}")
+
+
+def _count_inner_newlines(pattern: Pattern[str]) -> int:
+    """Return the number of newlines the pattern requires to match, not
+    counting a trailing one, which is part of the matched line."""
+    source = pattern.pattern.removesuffix("\n").removesuffix("\\n")
+    return len(NEWLINE.findall(source))
@@ -0,0 +1,181 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import re
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Set, TypeVar
+
+from service_config import get_service_config_values
+from velocitas_lib.services import Service
+
+T = TypeVar("T")
+
+# Matches addresses of services reachable via the host network,
+# e.g. "127.0.0.1:55555", "localhost:55555" or "grpc://127.0.0.1:55555"
+LOCAL_ADDRESS_PATTERN = re.compile(
+    r"(?:localhost|127\.0\.0\.1|0\.0\.0\.0|\[::1\]):(\d+)(?!\d)"
+)
+
+
+class ServiceStartupError(RuntimeError):
+    """Raised if a service could not be started by the scheduler."""
+
+    def __init__(self, service_id: str, *args):
+        super().__init__(*args)
+        self.service_id = service_id
+
+
+class DependencyError(ServiceStartupError):
+    """Raised if the startup dependencies of the services are invalid."""
+
+
+def get_explicit_dependencies(service: Service) -> Set[str]:
+    """Return the IDs of the services the given service explicitly depends on,
+    as declared via 'depends-on' config entries in runtime.json.
+
+    Args:
+        service: The service.
+    """
+    dependencies: Set[str] = set()
+    for value in get_service_config_values(service.id, "depends-on"):
+        dependencies.update(dep.strip() for dep in value.split(",") if dep.strip())
+    return dependencies
+
+
+def get_inferred_dependencies(service: Service, services: List[Service]) -> Set[str]:
+    """Return the IDs of the services the given service connects to, inferred
+    from local addresses within its environment variables pointing at a port
+    declared by another service.
+
+    Args:
+        service: The service.
+        services: All services of the runtime.
+    """
+    port_owners: Dict[str, str] = {}
+    for other in services:
+        if other.id == service.id:
+            continue
+        for port in other.config.ports:
+            port_owners[port] = other.id
+
+    dependencies: Set[str] = set()
+    for value in service.config.env_vars.values():
+        if not value:
+            continue
+        for port in LOCAL_ADDRESS_PATTERN.findall(value):
+            if port in port_owners:
+                dependencies.add(port_owners[port])
+    return dependencies
+
+
+def build_dependency_graph(services: List[Service]) -> Dict[str, Set[str]]:
+    """Build the startup dependency graph of the given services.
+
+    Args:
+        services: The services to start.
+
+    Raises:
+        DependencyError: If a service depends on a service which is not
+            started or the dependencies contain a cycle.
+
+    Returns:
+        Dict[str, Set[str]]: Maps each service ID to the IDs of the services
+            which need to be ready before it can be started.
+    """
+    service_ids = {service.id for service in services}
+    graph: Dict[str, Set[str]] = {}
+    for service in services:
+        explicit = get_explicit_dependencies(service)
+        unknown = explicit - service_ids
+        if unknown:
+            raise DependencyError(
+                service.id,
+                f"Service {service.id!r} depends on services which are not "
+                f"enabled: {', '.join(sorted(unknown))}",
+            )
+        graph[service.id] = explicit | get_inferred_dependencies(service, services)
+
+    remaining = {service_id: set(deps) for service_id, deps in graph.items()}
+    while remaining:
+        ready = [service_id for service_id, deps in remaining.items() if not deps]
+        if not ready:
+            raise DependencyError(
+                min(remaining),
+                "Cyclic service dependencies: " + ", ".join(sorted(remaining)),
+            )
+        for service_id in ready:
+            del remaining[service_id]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+    return graph
+
+
+def start_services(
+    services: List[Service],
+    start: Callable[[Service], T],
+    on_started: Callable[[Service, T], None],
+    on_starting: Callable[[Service], None] = lambda _: None,
+) -> None:
+    """Start the given services concurrently, honoring their dependencies.
+
+    A service is started as soon as all services it depends on are started.
+    After the first failure no further services are started, but services
+    which are already starting are awaited.
+
+    Args:
+        services: The services to start.
+        start: Starts a service and blocks until it is ready. Called from
+            worker threads.
+        on_started: Called with the result of 'start' for each started service.
+        on_starting: Called right before a service gets started.
+
+    Raises:
+        ServiceStartupError: If a service failed to start.
+    """
+    graph = build_dependency_graph(services)
+    services_by_id = {service.id: service for service in services}
+    pending = {service_id: set(deps) for service_id, deps in graph.items()}
+    error: Optional[ServiceStartupError] = None
+
+    with ThreadPoolExecutor(max_workers=max(len(services), 1)) as executor:
+        running: Dict[Future, Service] = {}
+
+        def submit_ready_services():
+            ready = [service_id for service_id, deps in pending.items() if not deps]
+            for service_id in ready:
+                del pending[service_id]
+                service = services_by_id[service_id]
+                on_starting(service)
+                running[executor.submit(start, service)] = service
+
+        submit_ready_services()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                service = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as err:
+                    if error is None:
+                        error = ServiceStartupError(service.id, *err.args)
+                    continue
+                on_started(service, result)
+                for deps in pending.values():
+                    deps.discard(service.id)
+            if error is None:
+                submit_ready_services()
+
+    if error is not None:
+        raise error
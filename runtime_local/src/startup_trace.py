@@ -0,0 +1,187 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set
+
+from velocitas_lib import get_workspace_dir
+
+READY = "ready"
+
+
+class TraceEvent(NamedTuple):
+    track: str
+    name: str
+    start: float
+    # None for instant events
+    end: Optional[float] = None
+
+
+class StartupTrace:
+    """Records the startup phases of the services of a runtime.
+
+    Each service has its own track of phases (spans) and instant events,
+    e.g. the match of a start pattern. Safe to be used from multiple threads.
+    """
+
+    def __init__(self):
+        self.origin = time.monotonic()
+        self._events: List[TraceEvent] = []
+        self._lock = Lock()
+
+    @property
+    def events(self) -> List[TraceEvent]:
+        with self._lock:
+            return list(self._events)
+
+    def add_span(self, track: str, name: str, start: float, end: float) -> None:
+        """Record a phase with the given monotonic start and end times."""
+        with self._lock:
+            self._events.append(TraceEvent(track, name, start, end))
+
+    @contextmanager
+    def phase(self, track: str, name: str) -> Iterator[None]:
+        """Record the execution of the block as a phase of the track."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_span(track, name, start, time.monotonic())
+
+    def instant(self, track: str, name: str, at: Optional[float] = None) -> None:
+        """Record an instant event on the track, by default happening now."""
+        with self._lock:
+            self._events.append(
+                TraceEvent(track, name, time.monotonic() if at is None else at)
+            )
+
+    def get_ready_times(self) -> Dict[str, float]:
+        """Return the time each track got ready, relative to the origin."""
+        ready_times: Dict[str, float] = {}
+        for event in self.events:
+            if event.name == READY and event.end is None:
+                ready_times.setdefault(event.track, event.start - self.origin)
+        return ready_times
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Return the trace in the Chrome trace event format, which can be
+        viewed e.g. with chrome://tracing or https://ui.perfetto.dev."""
+        thread_ids: Dict[str, int] = {}
+        trace_events: List[Dict[str, Any]] = []
+        for event in self.events:
+            if event.track not in thread_ids:
+                thread_ids[event.track] = len(thread_ids) + 1
+                trace_events.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": 1,
+                        "tid": thread_ids[event.track],
+                        "args": {"name": event.track},
+                    }
+                )
+            trace_event = {
+                "name": event.name,
+                "cat": "startup",
+                "pid": 1,
+                "tid": thread_ids[event.track],
+                "ts": round((event.start - self.origin) * 1e6),
+            }
+            if event.end is None:
+                trace_event.update(ph="i", s="t")
+            else:
+                trace_event.update(ph="X", dur=round((event.end - event.start) * 1e6))
+            trace_events.append(trace_event)
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def get_critical_path(self, graph: Dict[str, Set[str]]) -> List[str]:
+        """Return the chain of services which gated the readiness of the runtime.
+
+        It ends with the service which got ready last and leads back along
+        the dependencies which got ready last.
+
+        Args:
+            graph: The dependency graph of the services, see
+                startup_scheduler.build_dependency_graph.
+        """
+        ready_times = self.get_ready_times()
+        if not ready_times:
+            return []
+        path = [max(ready_times, key=ready_times.__getitem__)]
+        while True:
+            dependencies = [
+                dependency
+                for dependency in graph.get(path[0], set())
+                if dependency in ready_times
+            ]
+            if not dependencies:
+                return path
+            path.insert(0, max(dependencies, key=ready_times.__getitem__))
+
+    def summary(self, graph: Dict[str, Set[str]]) -> List[str]:
+        """Return a short, human readable summary of the critical path.
+
+        Args:
+            graph: The dependency graph of the services.
+        """
+        ready_times = self.get_ready_times()
+        path = self.get_critical_path(graph)
+        if not path:
+            return []
+
+        lines = [f"Time to ready: {ready_times[path[-1]]:.2f} s, critical path:"]
+        previous_ready = 0.0
+        for service_id in path:
+            phases = ", ".join(
+                f"{event.name} {event.end - event.start:.2f} s"
+                for event in self.events
+                if event.track == service_id and event.end is not None
+            )
+            lines.append(
+                f"  {service_id}: +{ready_times[service_id] - previous_ready:.2f} s"
+                + (f" ({phases})" if phases else "")
+            )
+            previous_ready = ready_times[service_id]
+        return lines
+
+
+def get_startup_trace_path() -> str:
+    """Return the path of the startup trace of the last run."""
+    return os.path.join(
+        get_workspace_dir(), "logs", "runtime_local", "startup-trace.json"
+    )
+
+
+def write_startup_trace(trace: StartupTrace) -> str:
+    """Write the trace in the Chrome trace event format and return its path."""
+    path = get_startup_trace_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as trace_file:
+        json.dump(trace.to_chrome_trace(), trace_file)
+    return path
+
+
+_startup_trace: Optional[StartupTrace] = None
+
+
+def get_startup_trace() -> StartupTrace:
+    """Return the trace of the current startup of the runtime."""
+    global _startup_trace
+    if _startup_trace is None:
+        _startup_trace = StartupTrace()
+    return _startup_trace
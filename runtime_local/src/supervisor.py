@@ -0,0 +1,316 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import selectors
+import subprocess
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from queue import Empty, SimpleQueue
+from threading import Thread
+from typing import Callable, Dict, NamedTuple, Optional, Tuple, Union
+
+from container_backend import ServiceProcess
+from service_config import get_service_config_values
+from velocitas_lib.services import Service
+
+INITIAL_RESTART_BACKOFF_SEC = 0.1
+MAX_RESTART_BACKOFF_SEC = 30.0
+DEFAULT_MAX_RESTART_RETRIES = 5
+# a restarted service which keeps running for this long after it got ready
+# has recovered, so a later failure starts with a fresh restart budget
+RESTART_RESET_AFTER_SEC = 60.0
+
+
+class RestartPolicy(NamedTuple):
+    on_failure: bool = False
+    max_retries: int = 0
+
+
+def get_restart_policy(service: Service) -> RestartPolicy:
+    """Return the restart policy of the service.
+
+    It is declared by a 'restart' config entry in runtime.json with the value
+    'never' (default) or 'on-failure', optionally followed by the maximum
+    number of restarts, e.g. 'on-failure:3'.
+
+    Args:
+        service: The service.
+
+    Raises:
+        ValueError: If the restart policy is invalid.
+    """
+    values = get_service_config_values(service.id, "restart")
+    if not values or values[-1] == "never":
+        return RestartPolicy()
+    policy, _, max_retries = values[-1].partition(":")
+    if policy != "on-failure" or (max_retries and not max_retries.isdigit()):
+        raise ValueError(
+            f"Unsupported restart policy {values[-1]!r} of service {service.id!r}"
+        )
+    return RestartPolicy(
+        True, int(max_retries) if max_retries else DEFAULT_MAX_RESTART_RETRIES
+    )
+
+
+class Supervisor:
+    """Supervises the processes of running services.
+
+    Blocks until a process exits instead of polling: processes spawned locally
+    are watched via their pidfd, all others by a thread waiting for them.
+    Services which failed are restarted according to their restart policy,
+    with exponential backoff between consecutive restarts. The restarts are
+    counted from the last time the service ran stable.
+    """
+
+    def __init__(
+        self,
+        restart: Callable[[Service], ServiceProcess],
+        on_event: Callable[[str], None] = lambda _: None,
+    ):
+        """
+        Args:
+            restart: Restarts a service and blocks until it is ready. Called
+                from worker threads.
+            on_event: Called with a message whenever a service exited or got
+                restarted.
+        """
+        self.processes: Dict[str, Tuple[Service, ServiceProcess]] = {}
+        self._restart = restart
+        self._on_event = on_event
+        self._policies: Dict[str, RestartPolicy] = {}
+        self._retries: Dict[str, int] = {}
+        self._restarted_at: Dict[str, float] = {}
+        self._scheduled: Dict[str, Tuple[float, Service]] = {}
+        self._restarting: Dict[str, Service] = {}
+        self._releases: Dict[str, Future] = {}
+        self._notifications: SimpleQueue = SimpleQueue()
+        self._stopping = False
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        os.set_blocking(self._wakeup_read, False)
+        os.set_blocking(self._wakeup_write, False)
+        self._selector.register(self._wakeup_read, selectors.EVENT_READ)
+        self._executor = ThreadPoolExecutor(thread_name_prefix="restart")
+
+    @property
+    def stopping(self) -> bool:
+        """Whether a shutdown was requested."""
+        return self._stopping
+
+    def _notify(self, *notification) -> None:
+        self._notifications.put(notification)
+        try:
+            os.write(self._wakeup_write, b"\0")
+        except BlockingIOError:
+            # the pipe is full, so the loop is going to wake up anyway
+            pass
+
+    def supervise(self, service: Service, process: ServiceProcess) -> None:
+        """Start supervising the process of the service.
+
+        Must be called from the thread running the supervisor or before it
+        got started.
+        """
+        self.processes[service.id] = (service, process)
+        if service.id not in self._policies:
+            self._policies[service.id] = get_restart_policy(service)
+
+        if isinstance(process, subprocess.Popen):
+            try:
+                pidfd = os.pidfd_open(process.pid)
+            except ProcessLookupError:
+                self._notify("exited", service.id, process)
+                return
+            except (AttributeError, OSError):
+                pass
+            else:
+                self._selector.register(
+                    pidfd, selectors.EVENT_READ, (service.id, process)
+                )
+                return
+
+        def wait_for_exit():
+            process.wait()
+            self._notify("exited", service.id, process)
+
+        Thread(target=wait_for_exit, daemon=True).start()
+
+    def supervise_threadsafe(self, service: Service, process: ServiceProcess) -> None:
+        """Start supervising the process of the service, see supervise.
+        Safe to be called from other threads."""
+        self._notify("supervise", service.id, (service, process))
+
+    def release(self, service_id: str) -> "Future[Optional[ServiceProcess]]":
+        """Stop supervising the service, e.g. to stop it. Safe to be called
+        from other threads, while the supervisor is running.
+
+        Returns:
+            Future[Optional[ServiceProcess]]: Resolves to the process of the
+                service, if it is running, once it is no longer supervised.
+                A restart in flight is awaited.
+        """
+        future: Future[Optional[ServiceProcess]] = Future()
+        self._notify("release", service_id, future)
+        return future
+
+    def get_states(self) -> Dict[str, str]:
+        """Return the state of each supervised service: 'running', 'restart
+        scheduled' or 'restarting'. Safe to be called from other threads."""
+        states = {
+            service_id: "restart scheduled" for service_id in list(self._scheduled)
+        }
+        states.update(
+            {service_id: "restarting" for service_id in list(self._restarting)}
+        )
+        states.update({service_id: "running" for service_id in list(self.processes)})
+        return states
+
+    def shutdown(self) -> None:
+        """Request the supervisor to stop. Safe to be called from signal
+        handlers and other threads."""
+        self._stopping = True
+        try:
+            os.write(self._wakeup_write, b"\0")
+        except BlockingIOError:
+            pass
+
+    def run(self, until_idle: bool = True) -> None:
+        """Supervise the processes until all of them exited for good or a
+        shutdown was requested.
+
+        Args:
+            until_idle: Whether to return once there are no processes left
+                to supervise, otherwise only a shutdown ends supervising.
+        """
+        while not self._stopping and (
+            not until_idle or self.processes or self._scheduled or self._restarting
+        ):
+            timeout: Optional[float] = None
+            if self._scheduled:
+                due = min(due for due, _ in self._scheduled.values())
+                timeout = max(due - time.monotonic(), 0)
+
+            for key, _ in self._selector.select(timeout):
+                if key.fd == self._wakeup_read:
+                    self._handle_notifications()
+                else:
+                    self._selector.unregister(key.fd)
+                    os.close(key.fd)
+                    self._handle_exit(*key.data)
+
+            self._start_scheduled_restarts()
+
+        if self._stopping:
+            # hand processes of restarts still in flight over for cleanup
+            self._executor.shutdown(wait=True)
+            self._handle_notifications()
+
+    def _handle_notifications(self) -> None:
+        try:
+            while os.read(self._wakeup_read, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+        while True:
+            try:
+                kind, service_id, result = self._notifications.get_nowait()
+            except Empty:
+                return
+            if kind == "exited":
+                self._handle_exit(service_id, result)
+            elif kind == "restarted":
+                self._handle_restart(service_id, result)
+            elif kind == "supervise":
+                self.supervise(*result)
+            else:
+                self._handle_release(service_id, result)
+
+    def _handle_exit(self, service_id: str, process: ServiceProcess) -> None:
+        entry = self.processes.get(service_id)
+        if entry is None or entry[1] is not process:
+            return
+        del self.processes[service_id]
+        service = entry[0]
+        returncode = process.wait()
+        self._on_event(f"{service_id} exited with code {returncode}")
+        restarted_at = self._restarted_at.pop(service_id, None)
+        if (
+            restarted_at is not None
+            and time.monotonic() - restarted_at >= RESTART_RESET_AFTER_SEC
+        ):
+            self._retries.pop(service_id, None)
+        if returncode != 0 and not self._stopping:
+            self._schedule_restart(service)
+
+    def _schedule_restart(self, service: Service) -> None:
+        policy = self._policies[service.id]
+        retries = self._retries.get(service.id, 0)
+        if not policy.on_failure or retries >= policy.max_retries:
+            return
+        backoff = min(INITIAL_RESTART_BACKOFF_SEC * 2**retries, MAX_RESTART_BACKOFF_SEC)
+        self._retries[service.id] = retries + 1
+        self._scheduled[service.id] = (time.monotonic() + backoff, service)
+
+    def _start_scheduled_restarts(self) -> None:
+        now = time.monotonic()
+        for service_id, (due, service) in list(self._scheduled.items()):
+            if due > now or self._stopping:
+                continue
+            del self._scheduled[service_id]
+            self._restarting[service_id] = service
+            retry = self._retries[service_id]
+            self._on_event(f"restarting {service_id} (attempt {retry})")
+
+            def restart(service: Service = service) -> None:
+                result: Union[ServiceProcess, Exception]
+                try:
+                    result = self._restart(service)
+                except Exception as error:
+                    result = error
+                self._notify("restarted", service.id, result)
+
+            self._executor.submit(restart)
+
+    def _handle_restart(
+        self, service_id: str, result: Union[ServiceProcess, Exception]
+    ) -> None:
+        service = self._restarting.pop(service_id)
+        release = self._releases.pop(service_id, None)
+        if release is not None:
+            release.set_result(None if isinstance(result, Exception) else result)
+            return
+        if isinstance(result, Exception):
+            self._on_event(f"restarting {service_id} failed: {result}")
+            if not self._stopping:
+                self._schedule_restart(service)
+            return
+        if self._stopping:
+            self.processes[service_id] = (service, result)
+            return
+        self._on_event(f"{service_id} restarted")
+        # the restart blocks until the service is ready
+        self._restarted_at[service_id] = time.monotonic()
+        self.supervise(service, result)
+
+    def _handle_release(self, service_id: str, future: Future) -> None:
+        self._scheduled.pop(service_id, None)
+        self._retries.pop(service_id, None)
+        self._restarted_at.pop(service_id, None)
+        if service_id in self._restarting:
+            self._releases[service_id] = future
+            return
+        entry = self.processes.pop(service_id, None)
+        future.set_result(entry[1] if entry is not None else None)
@@ -0,0 +1,188 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""Prunes the VSS metadata of the databroker to the datapoints the app
+requires.
+
+Loading the whole specification (hundreds of KB for a VSS release) costs the
+databroker startup time and memory, although most apps only use a handful of
+signals. Opting in via the 'vssSubsetEnabled' variable, the databroker gets a
+subset with only the datapoints required by the AppManifest and their
+ancestor branches.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from velocitas_lib import get_app_manifest, get_cache_data, get_project_cache_dir
+from velocitas_lib.services import Service
+
+# shared with the desired state generator, which is part of the same package
+DESIRED_STATE_GENERATOR_DIR = os.path.abspath(
+    os.path.join(
+        os.path.dirname(__file__), "..", "..", "desired_state_generator", "src"
+    )
+)
+if DESIRED_STATE_GENERATOR_DIR not in sys.path:
+    sys.path.append(DESIRED_STATE_GENERATOR_DIR)
+
+
+def is_vss_subset_enabled() -> bool:
+    """Return whether the databroker shall get the subset of the VSS."""
+    return os.getenv("vssSubsetEnabled", "false").lower() == "true"
+
+
+def get_required_datapoints(app_manifest: Dict[str, Any]) -> List[str]:
+    """Return the paths of the datapoints the app requires.
+
+    Both the vehicle signal interface of AppManifest v3, parsed like the
+    desired state generator does, and the vehicleModel of earlier versions are
+    supported.
+    """
+    # only needed if the VSS subset is enabled
+    import gen_desired_state
+
+    datapoints: List[Dict[str, Any]] = []
+    for interface in app_manifest.get("interfaces", []):
+        if interface.get("type") == gen_desired_state.VELOCITAS_IF_VSI:
+            datapoints += gen_desired_state.get_required_datapoints(interface["config"])
+    vehicle_model = app_manifest.get("vehicleModel", {})
+    datapoints += vehicle_model.get("datapoints", [])
+    return list(dict.fromkeys(str(datapoint["path"]) for datapoint in datapoints))
+
+
+def subset_vss(
+    vss: Dict[str, Any], paths: List[str]
+) -> Tuple[Dict[str, Any], List[str]]:
+    """Return the subset of the VSS tree with the given datapoints.
+
+    The branches along the paths are kept with all their attributes but
+    only the children leading to the datapoints. If a path refers to a
+    branch, its whole subtree is kept.
+
+    Args:
+        vss: The VSS tree in the JSON export format.
+        paths: Paths of the datapoints, e.g. 'Vehicle.Speed'.
+
+    Returns:
+        Tuple[Dict[str, Any], List[str]]: The subset and the paths which are
+            not part of the tree.
+    """
+    subset: Dict[str, Any] = {}
+    missing: List[str] = []
+    for path in paths:
+        names = path.split(".")
+        source, target = vss, subset
+        for depth, name in enumerate(names):
+            node = source.get(name)
+            if node is None:
+                missing.append(path)
+                break
+            if depth == len(names) - 1:
+                target[name] = node
+                break
+            if name not in target:
+                target[name] = dict(node)
+                target[name]["children"] = {}
+            elif target[name] is node:
+                # a branch kept as a whole already contains the datapoint
+                break
+            source = node.get("children", {})
+            target = target[name]["children"]
+    return subset, missing
+
+
+def get_vss_subset_file(vspec_file_path: str, paths: List[str]) -> Optional[str]:
+    """Return the file of the subset of the VSS with the given datapoints.
+
+    Subsets are cached in the project cache directory by the hash of the
+    specification and the datapoints, so they are only built once.
+
+    Returns:
+        Optional[str]: The path of the subset, None if not all datapoints are
+            part of the specification.
+    """
+    with open(vspec_file_path, "rb") as vspec_file:
+        content = vspec_file.read()
+    digest = hashlib.sha256(content)
+    digest.update("\n".join(sorted(paths)).encode("utf-8"))
+    subset_path = os.path.join(
+        get_project_cache_dir(), "vss_subsets", f"{digest.hexdigest()}.json"
+    )
+    if os.path.isfile(subset_path):
+        return subset_path
+
+    subset, missing = subset_vss(json.loads(content), paths)
+    if missing:
+        print(f"Datapoints not in {vspec_file_path}: {', '.join(missing)}")
+        return None
+
+    os.makedirs(os.path.dirname(subset_path), exist_ok=True)
+    temp_path = f"{subset_path}.{os.getpid()}"
+    with open(temp_path, "w", encoding="utf-8") as subset_file:
+        json.dump(subset, subset_file, separators=(",", ":"))
+    os.replace(temp_path, subset_path)
+    return subset_path
+
+
+def get_databroker_vspec_file() -> str:
+    """Return the VSS metadata file for the databroker: the subset with the
+    datapoints required by the app, if enabled and possible, otherwise the
+    whole specification of the 'vspec_file_path' cache variable."""
+    vspec_file_path = str(get_cache_data()["vspec_file_path"])
+    if not is_vss_subset_enabled():
+        return vspec_file_path
+
+    paths = get_required_datapoints(get_app_manifest())
+    if not paths:
+        # an empty tree would leave the databroker without any datapoint
+        return vspec_file_path
+    subset_path = get_vss_subset_file(vspec_file_path, paths)
+    if subset_path is None:
+        print("Using the whole VSS for the databroker")
+        return vspec_file_path
+    return subset_path
+
+
+def apply_vss_subset(services: List[Service]) -> List[Service]:
+    """Return the services with the whole VSS metadata file of the
+    'vspec_file_path' cache variable replaced by the file returned by
+    get_databroker_vspec_file in their env values, args and mounts."""
+    if not is_vss_subset_enabled():
+        return services
+    vspec_file_path = str(get_cache_data()["vspec_file_path"])
+    subset_path = get_databroker_vspec_file()
+    if subset_path == vspec_file_path:
+        return services
+
+    def replace(value: str) -> str:
+        return value.replace(vspec_file_path, subset_path)
+
+    return [
+        Service(
+            service.id,
+            service.config._replace(
+                env_vars={
+                    name: None if value is None else replace(value)
+                    for name, value in service.config.env_vars.items()
+                },
+                args=[replace(arg) for arg in service.config.args],
+                mounts=[replace(mount) for mount in service.config.mounts],
+            ),
+        )
+        for service in services
+    ]
@@ -0,0 +1,274 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""Fake Docker Engine serving the subset of the Docker Engine API used by
+runtime_local via a unix socket."""
+
+import json
+import re
+import socketserver
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler
+from threading import Condition, Thread
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+class FakeContainer:
+    def __init__(self, name: str, config: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.config = config
+        self.output: List[bytes] = []
+        self.running = False
+        self.exit_code: Optional[int] = None
+        self.removed = False
+        self.stop_timeout: Optional[str] = None
+
+
+class FakeDockerEngine:
+    """Fake Docker daemon with in-memory state.
+
+    Started containers print the lines configured for their image in
+    'image_outputs' and keep running until they are stopped or killed.
+    Containers of the images in 'start_errors' fail to start.
+    """
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self.images: Set[str] = set()
+        self.image_outputs: Dict[str, List[str]] = {}
+        # error messages by image, whose containers fail to start
+        self.start_errors: Dict[str, str] = {}
+        self.containers: Dict[str, FakeContainer] = {}
+        self.requests: List[str] = []
+        self.connections = 0
+        self.stop_delay_sec = 0.0
+        self.condition = Condition()
+        engine = self
+
+        class Handler(FakeDockerEngineHandler):
+            fake_engine = engine
+
+        self._server = socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+        self._server.daemon_threads = True
+        self._thread = Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FakeDockerEngine":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def find_container(self, id_or_name: str) -> Optional[FakeContainer]:
+        for container in self.containers.values():
+            if not container.removed and id_or_name in (container.id, container.name):
+                return container
+        return None
+
+    def exit_container(self, container: FakeContainer, exit_code: int) -> None:
+        with self.condition:
+            if not container.running:
+                return
+            container.running = False
+            container.exit_code = exit_code
+            if container.config.get("HostConfig", {}).get("AutoRemove"):
+                container.removed = True
+            self.condition.notify_all()
+
+
+class FakeDockerEngineHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fake_engine: FakeDockerEngine
+
+    def setup(self) -> None:
+        super().setup()
+        self.fake_engine.connections += 1
+
+    def log_message(self, *_) -> None:
+        pass
+
+    def send_json(self, status: int, content: Any = None) -> None:
+        body = json.dumps(content).encode("utf-8") if content is not None else b""
+        self.send_response(status)
+        if content is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def start_stream(self, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def read_body(self) -> Any:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length)) if length else None
+
+    def do_GET(self) -> None:
+        self.dispatch("GET")
+
+    def do_POST(self) -> None:
+        self.dispatch("POST")
+
+    def do_DELETE(self) -> None:
+        self.dispatch("DELETE")
+
+    def dispatch(self, method: str) -> None:
+        url = urlparse(self.path)
+        path = re.sub(r"^/v\d+\.\d+", "", url.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        body = self.read_body()
+        engine = self.fake_engine
+        engine.requests.append(f"{method} {path}")
+
+        if path == "/_ping":
+            self.send_json(200, "OK")
+        elif method == "POST" and path == "/images/create":
+            self.pull_image(query["fromImage"])
+        elif method == "GET" and path.startswith("/images/"):
+            image = unquote(path.removeprefix("/images/").removesuffix("/json"))
+            if image in engine.images:
+                self.send_json(200, {"Id": f"sha256:{image}"})
+            else:
+                self.send_json(404, {"message": f"No such image: {image}"})
+        elif method == "POST" and path == "/containers/create":
+            self.create_container(query.get("name", ""), body)
+        elif method == "GET" and path == "/containers/json":
+            containers = [
+                {"Id": container.id, "Names": [f"/{container.name}"]}
+                for container in engine.containers.values()
+                if container.running
+            ]
+            self.send_json(200, containers)
+        else:
+            match = re.match(r"^/containers/([^/]+)(?:/(\w+))?$", path)
+            container = (
+                engine.find_container(unquote(match.group(1))) if match else None
+            )
+            if not match or container is None:
+                self.send_json(404, {"message": "No such container"})
+                return
+            self.handle_container(method, match.group(2), container, query)
+
+    def pull_image(self, image: str) -> None:
+        self.start_stream("application/json")
+        for status in ("Pulling fs layer", "Download complete", "Pull complete"):
+            progress = {"status": status, "id": "layer0"}
+            self.send_chunk(json.dumps(progress).encode("utf-8") + b"\r\n")
+        self.fake_engine.images.add(image)
+        self.send_chunk(b"")
+
+    def create_container(self, name: str, config: Dict[str, Any]) -> None:
+        engine = self.fake_engine
+        if config["Image"] not in engine.images:
+            self.send_json(404, {"message": f"No such image: {config['Image']}"})
+            return
+        if engine.find_container(name) is not None:
+            self.send_json(409, {"message": f"Conflict. {name!r} is already in use"})
+            return
+        container = FakeContainer(name, config)
+        engine.containers[container.id] = container
+        self.send_json(201, {"Id": container.id, "Warnings": []})
+
+    def handle_container(
+        self,
+        method: str,
+        action: Optional[str],
+        container: FakeContainer,
+        query: Dict[str, str],
+    ) -> None:
+        engine = self.fake_engine
+        if method == "GET" and action == "json":
+            self.send_json(
+                200,
+                {
+                    "Id": container.id,
+                    "Name": f"/{container.name}",
+                    "Image": f"sha256:{container.config['Image']}",
+                    "Config": container.config,
+                    "State": {
+                        "Running": container.running,
+                        "ExitCode": container.exit_code or 0,
+                    },
+                },
+            )
+        elif method == "POST" and action == "start":
+            start_error = engine.start_errors.get(container.config["Image"])
+            if start_error is not None:
+                self.send_json(500, {"message": start_error})
+                return
+            with engine.condition:
+                container.running = True
+                for line in engine.image_outputs.get(container.config["Image"], []):
+                    container.output.append(f"{line}\n".encode("utf-8"))
+                engine.condition.notify_all()
+            self.send_json(204)
+        elif method == "POST" and action in ("stop", "kill"):
+            if action == "stop":
+                container.stop_timeout = query.get("t")
+                time.sleep(engine.stop_delay_sec)
+            if not container.running:
+                self.send_json(304 if action == "stop" else 409)
+                return
+            engine.exit_container(container, 0 if action == "stop" else 137)
+            self.send_json(204)
+        elif method == "POST" and action == "wait":
+            with engine.condition:
+                engine.condition.wait_for(
+                    lambda: container.exit_code is not None
+                    and (query.get("condition") != "removed" or container.removed)
+                )
+            self.send_json(200, {"StatusCode": container.exit_code})
+        elif method == "GET" and action == "logs":
+            self.stream_logs(
+                container, query.get("follow") == "1", int(query.get("since", 0))
+            )
+        elif method == "DELETE" and action is None:
+            engine.exit_container(container, 137)
+            container.removed = True
+            self.send_json(204)
+        else:
+            self.send_json(404, {"message": "page not found"})
+
+    def stream_logs(self, container: FakeContainer, follow: bool, since: int) -> None:
+        engine = self.fake_engine
+        self.start_stream("application/vnd.docker.multiplexed-stream")
+        # the fake does not timestamp its output, so 'since' skips all of it
+        sent = len(container.output) if since else 0
+        while True:
+            with engine.condition:
+                engine.condition.wait_for(
+                    lambda: len(container.output) > sent
+                    or not container.running
+                    or not follow
+                )
+                pending = container.output[sent:]
+                done = not container.running or not follow
+            for line in pending:
+                header = bytes([1, 0, 0, 0]) + len(line).to_bytes(4, "big")
+                self.send_chunk(header + line)
+            sent += len(pending)
+            if done:
+                break
+        self.send_chunk(b"")
@@ -0,0 +1,100 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import sys
+import time
+from threading import Thread
+from typing import List
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from app_reloader import AppReloader, get_python_script, watch_app  # noqa: E402
+
+# appends its pid, argument and whether the preloaded module was imported
+# before the script to the file given as argument, then runs until stopped
+APP = """
+import os, sys, time
+with open(sys.argv[1], "a") as runs:
+    runs.write(f"{os.getpid()} {os.environ['GREETING']} {'wave' in sys.modules}\\n")
+time.sleep(10)
+"""
+
+
+def wait_for_runs(path, count):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        if path.exists() and path.read_text().count("\n") >= count:
+            break
+        time.sleep(0.05)
+    return [line.split() for line in path.read_text().splitlines()]
+
+
+def create_app(tmp_path):
+    app_dir = tmp_path / "app"
+    app_dir.mkdir()
+    (app_dir / "main.py").write_text(APP)
+    (tmp_path / "wave.py").write_text("")
+    return [sys.executable, str(app_dir / "main.py"), str(tmp_path / "runs.txt")]
+
+
+def test_get_python_script():
+    assert get_python_script(["python3", "app/main.py", "-v"]) == ["app/main.py", "-v"]
+    assert get_python_script(["./build/bin/app", "main.py"]) is None
+
+
+def test_restart__warm_interpreter__has_preloaded_modules(tmp_path):
+    program_args = create_app(tmp_path)
+    env = {"GREETING": "hello", "PYTHONPATH": str(tmp_path)}
+    reloader = AppReloader(program_args, env, preload=["wave"])
+    try:
+        reloader.start()
+        first = reloader.process
+        wait_for_runs(tmp_path / "runs.txt", 1)
+        reloader.restart()
+
+        runs = wait_for_runs(tmp_path / "runs.txt", 2)
+    finally:
+        reloader.close()
+
+    assert first is not None and first.returncode is not None
+    assert reloader.process is not None and reloader.process.returncode is not None
+    assert runs == [
+        [str(first.pid), "hello", "False"],
+        [str(reloader.process.pid), "hello", "True"],
+    ]
+
+
+def test_watch_app__file_changed__restarts(tmp_path):
+    program_args = create_app(tmp_path)
+    events: List[str] = []
+    reloader = AppReloader(program_args, {"GREETING": "hi"}, on_event=events.append)
+    stopping = False
+    thread = Thread(
+        target=watch_app,
+        args=(reloader, [str(tmp_path / "app")]),
+        kwargs={"is_stopping": lambda: stopping},
+    )
+    thread.start()
+    try:
+        wait_for_runs(tmp_path / "runs.txt", 1)
+        (tmp_path / "app" / "vehicle.py").write_text("")
+        runs = wait_for_runs(tmp_path / "runs.txt", 2)
+    finally:
+        stopping = True
+        thread.join(5)
+
+    assert len(runs) == 2
+    assert events == ["> 1 file(s) changed, restarting the app"]
+    assert reloader.process is not None and reloader.process.returncode is not None
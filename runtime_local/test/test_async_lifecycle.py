@@ -0,0 +1,145 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import asyncio
+import json
+import os
+import socket
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import async_lifecycle  # noqa: E402
+from velocitas_lib.services import Service, get_services  # noqa: E402
+
+# prints the output given by the RUN_OUTPUT environment variable when run and
+# records the other commands
+FAKE_DOCKER = """#!/bin/sh
+echo "$@" >> "$(dirname "$0")/calls.txt"
+if [ "$1" = run ]; then
+    printf "$RUN_OUTPUT"
+    exec sleep 10
+fi
+"""
+
+
+@pytest.fixture()
+def runtime_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("VELOCITAS_PACKAGE_DIR", str(tmp_path))
+    monkeypatch.setenv("VELOCITAS_WORKSPACE_DIR", str(tmp_path))
+    monkeypatch.setenv("VELOCITAS_CACHE_DATA", "{}")
+    monkeypatch.setenv("runtimeFilePath", "runtime.json")
+    docker = tmp_path / "docker"
+    docker.write_text(FAKE_DOCKER)
+    docker.chmod(0o755)
+    monkeypatch.setattr(
+        async_lifecycle, "get_container_runtime_executable", lambda: str(docker)
+    )
+
+    def create_service(*config) -> Service:
+        spec = {
+            "id": "service",
+            "config": [
+                {"key": "image", "value": "service:latest"},
+                {"key": "start-pattern", "value": "Listening on \\d+"},
+            ]
+            + [{"key": key, "value": value} for key, value in config],
+        }
+        with open(tmp_path / "runtime.json", "w", encoding="utf-8") as runtime_file:
+            json.dump([spec], runtime_file)
+        return get_services(verbose=False)[0]
+
+    return create_service
+
+
+def read_calls(tmp_path):
+    return (tmp_path / "calls.txt").read_text().splitlines()
+
+
+def test_run_service__pattern_matched__is_ready(runtime_env, tmp_path, monkeypatch):
+    monkeypatch.setenv("RUN_OUTPUT", "starting\\nListening on 8080\\n")
+    service = runtime_env()
+
+    async def run():
+        process = await async_lifecycle.run_service(service)
+        assert process.returncode is None
+        process.kill()
+        await process.wait()
+
+    asyncio.run(run())
+
+    assert read_calls(tmp_path)[0].startswith("run --rm --init --name service")
+
+
+def test_run_service__silent_probed_service__is_ready(runtime_env, monkeypatch):
+    monkeypatch.setenv("RUN_OUTPUT", "")
+    with socket.socket() as server:
+        server.bind(("127.0.0.1", 0))
+        server.listen()
+        port = server.getsockname()[1]
+        service = runtime_env(("readiness-probe", f"tcp:{port}"))
+
+        async def run():
+            process = await async_lifecycle.run_service(service, startup_timeout_sec=5)
+            assert process.returncode is None
+            process.kill()
+            await process.wait()
+
+        asyncio.run(run())
+
+
+def test_run_service__timeout__stops_service(runtime_env, tmp_path, monkeypatch):
+    monkeypatch.setenv("RUN_OUTPUT", "starting\\n")
+    service = runtime_env(("stop-timeout", "2"))
+
+    with pytest.raises(RuntimeError, match="Timeout reached after 0.2 seconds"):
+        asyncio.run(async_lifecycle.run_service(service, startup_timeout_sec=0.2))
+
+    assert read_calls(tmp_path)[1:] == ["stop --time 2 service"]
+
+
+def test_run_service__cancelled__stops_service(runtime_env, tmp_path, monkeypatch):
+    monkeypatch.setenv("RUN_OUTPUT", "starting\\n")
+    service = runtime_env()
+
+    async def run():
+        task = asyncio.create_task(async_lifecycle.run_service(service))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # the shielded cleanup outlives the cancelled task
+        while len(read_calls(tmp_path)) < 2:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+
+    assert read_calls(tmp_path)[1:] == ["stop service"]
+
+
+def test_run_service__many_services__from_one_loop(runtime_env, monkeypatch):
+    monkeypatch.setenv("RUN_OUTPUT", "Listening on 1\\n")
+    service = runtime_env()
+
+    async def run():
+        processes = await asyncio.gather(
+            *(async_lifecycle.run_service(service) for _ in range(20))
+        )
+        for process in processes:
+            process.kill()
+            await process.wait()
+
+    asyncio.run(run())
@@ -0,0 +1,241 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import io
+import json
+import time
+import os
+import sys
+from typing import List
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.append(os.path.dirname(__file__))
+
+import container_backend  # noqa: E402
+import local_lib  # noqa: E402
+from container_backend import (  # noqa: E402
+    DockerApiBackend,
+    DockerApiError,
+    DockerCliBackend,
+    create_container_backend,
+)
+from fake_docker_engine import FakeDockerEngine  # noqa: E402
+from image_prefetch import prefetch_images  # noqa: E402
+from velocitas_lib.services import Service, ServiceSpecConfig  # noqa: E402
+
+IMAGE = "eclipse-mosquitto:2.0.14"
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    with FakeDockerEngine(str(tmp_path / "docker.sock")) as engine:
+        engine.image_outputs[IMAGE] = ["mosquitto version 2.0.14 running"]
+        yield engine
+
+
+@pytest.fixture()
+def api_backend(engine, tmp_path, monkeypatch):
+    monkeypatch.setenv("VELOCITAS_PACKAGE_DIR", str(tmp_path))
+    monkeypatch.setenv("VELOCITAS_WORKSPACE_DIR", str(tmp_path))
+    monkeypatch.setenv("VELOCITAS_CACHE_DATA", "{}")
+    monkeypatch.setenv("runtimeFilePath", "runtime.json")
+    (tmp_path / "runtime.json").write_text("[]", encoding="utf-8")
+    backend = DockerApiBackend(engine.socket_path)
+    monkeypatch.setattr(local_lib, "_container_backend", backend)
+    return backend
+
+
+def create_service() -> Service:
+    return Service(
+        "mqtt-broker",
+        ServiceSpecConfig(
+            image=IMAGE,
+            env_vars={"LOG_LEVEL": "info"},
+            args=["mosquitto", "-c", "/mosquitto-no-auth.conf"],
+            port_forwards=["1883:1883"],
+            mounts=["/tmp:/data"],
+            startup_log_patterns=[r".*mosquitto version \d+\.\d+\.\d+ running\n"],
+        ),
+    )
+
+
+def test_run_service__api_backend__pulls_creates_and_starts_container(
+    engine, api_backend
+):
+    process = local_lib.run_service(create_service())
+
+    assert process.poll() is None
+    assert IMAGE in engine.images
+    container = engine.find_container("mqtt-broker")
+    assert container is not None and container.running
+    host_config = container.config["HostConfig"]
+    assert host_config["AutoRemove"] and host_config["Init"]
+    assert host_config["NetworkMode"] == "host"
+    assert host_config["Binds"] == ["/tmp:/data"]
+    assert host_config["PortBindings"] == {"1883/tcp": [{"HostPort": "1883"}]}
+    assert container.config["Cmd"] == ["mosquitto", "-c", "/mosquitto-no-auth.conf"]
+    assert container.config["Env"] == ["LOG_LEVEL=info"]
+
+    local_lib.stop_container("mqtt-broker")
+
+    assert process.wait(timeout=5) == 0
+    assert engine.find_container("mqtt-broker") is None
+
+
+def test_start_container__start_fails__removes_container(engine, api_backend):
+    engine.images.add(IMAGE)
+    engine.start_errors[IMAGE] = "port is already allocated"
+
+    with pytest.raises(DockerApiError, match="port is already allocated"):
+        api_backend.start_container(create_service(), io.StringIO())
+
+    assert engine.find_container("mqtt-broker") is None
+    assert not any(request.endswith("/wait") for request in engine.requests)
+
+    del engine.start_errors[IMAGE]
+    process, _ = api_backend.start_container(create_service(), io.StringIO())
+
+    assert process.poll() is None
+    api_backend.stop_container("mqtt-broker")
+    assert process.wait(timeout=5) == 0
+
+
+def test_restart_service__keep_log__appends_to_log(engine, api_backend, tmp_path):
+    service = create_service()
+    local_lib.run_service(service)
+
+    process = local_lib.restart_service(service, keep_log=True)
+    local_lib.stop_container("mqtt-broker")
+    process.wait(timeout=5)
+
+    log = (tmp_path / "logs" / "runtime_local" / "mqtt-broker.log").read_text()
+    assert log.count("mosquitto version 2.0.14 running") == 2
+    assert "Stopping 'mqtt-broker'" in log
+
+
+def test_api_client__keeps_connections_alive(engine, api_backend):
+    for _ in range(10):
+        api_backend.client.request("GET", "/_ping")
+
+    assert engine.connections == 1
+
+
+def test_stop_container__unknown_container__is_logged(engine, api_backend):
+    log = io.StringIO()
+
+    api_backend.stop_container("foo", log)
+
+    assert "No such container: foo" in log.getvalue()
+
+
+def test_create_container_backend__auto__prefers_reachable_api(engine, monkeypatch):
+    monkeypatch.setenv("DOCKER_HOST", f"unix://{engine.socket_path}")
+
+    assert isinstance(create_container_backend("auto", "docker"), DockerApiBackend)
+
+
+def test_create_container_backend__auto__falls_back_to_cli(tmp_path, monkeypatch):
+    monkeypatch.setenv("DOCKER_HOST", f"unix://{tmp_path / 'missing.sock'}")
+
+    assert isinstance(create_container_backend("auto", "docker"), DockerCliBackend)
+
+
+def test_adopt_service__unchanged_running_service__is_adopted(engine, api_backend):
+    service = create_service()
+    local_lib.run_service(service)
+    requests_before = len(engine.requests)
+
+    process = local_lib.adopt_service(service)
+
+    assert process is not None and process.poll() is None
+    assert not any("start" in request for request in engine.requests[requests_before:])
+
+
+def test_adopt_service__changed_service__is_not_adopted(engine, api_backend):
+    service = create_service()
+    local_lib.run_service(service)
+    changed_config = service.config._replace(env_vars={"LOG_LEVEL": "debug"})
+
+    assert local_lib.adopt_service(service._replace(config=changed_config)) is None
+
+
+def test_adopt_service__stopped_service__is_not_adopted(engine, api_backend):
+    assert local_lib.adopt_service(create_service()) is None
+
+
+def test_prefetch_images__pulls_missing_images_only(engine, api_backend):
+    engine.images.add("present:1.0")
+    services = [
+        create_service(),
+        create_service()._replace(id="a", config=ServiceSpecConfig(image="a:1.0")),
+        create_service()._replace(
+            id="b", config=ServiceSpecConfig(image="present:1.0")
+        ),
+    ]
+    summaries: List[str] = []
+
+    pulled = prefetch_images(services, api_backend, summaries.append)
+
+    assert sorted(pulled) == sorted([IMAGE, "a:1.0"])
+    assert {IMAGE, "a:1.0", "present:1.0"} <= engine.images
+    assert summaries[-1] == "Pulling 2 image(s): 2/2 layers"
+
+
+def test_stop_services__stops_running_containers_concurrently(
+    engine, api_backend, tmp_path
+):
+    runtime_file = tmp_path / "runtime.json"
+    runtime_file.write_text(
+        json.dumps([{"id": "a", "config": [{"key": "stop-timeout", "value": "3"}]}]),
+        encoding="utf-8",
+    )
+    engine.images.add("a:1.0")
+    services = [
+        create_service()._replace(id=name, config=ServiceSpecConfig(image="a:1.0"))
+        for name in ("a", "b", "c", "not-running")
+    ]
+    for service in services[:3]:
+        local_lib.run_service(service)
+    engine.stop_delay_sec = 0.5
+
+    start = time.monotonic()
+    stopped = local_lib.stop_services(services)
+
+    assert time.monotonic() - start < 1.0
+    assert [service.id for service in stopped] == ["a", "b", "c"]
+    assert engine.find_container("a") is None
+    stopped_containers = engine.containers.values()
+    assert {
+        container.name: container.stop_timeout for container in stopped_containers
+    } == {
+        "a": "3",
+        "b": None,
+        "c": None,
+    }
+
+
+def test_stop_container__hanging_stop__escalates_to_kill(
+    engine, api_backend, monkeypatch
+):
+    monkeypatch.setattr(container_backend, "STOP_KILL_GRACE_SEC", 0.2)
+    process = local_lib.run_service(create_service())
+    engine.stop_delay_sec = 2
+    log = io.StringIO()
+
+    api_backend.stop_container("mqtt-broker", log, timeout_sec=0)
+
+    assert "timed out, killing it" in log.getvalue()
+    assert process.wait(timeout=5) == 137
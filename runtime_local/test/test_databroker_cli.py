@@ -0,0 +1,147 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from databroker_cli import (  # noqa: E402
+    CliSession,
+    get_summary,
+    parse_script,
+    run_batch,
+    start_session,
+    stop_session,
+)
+
+# prompts in color like the databroker CLI, answers get and set commands
+FAKE_CLI = """
+import sys, time
+values = {}
+while True:
+    sys.stdout.write("\\x1b[1;32mkuksa.val.v1\\x1b[0m > ")
+    sys.stdout.flush()
+    line = sys.stdin.readline()
+    if not line:
+        break
+    if not line.strip():
+        continue
+    command, *args = line.split()
+    if command == "set":
+        values[args[0]] = args[1]
+        print("[set]  OK")
+    elif command == "get":
+        print(f"[get]  OK\\n{args[0]}: {values.get(args[0], 'NotAvailable')}")
+    elif command == "sleep":
+        time.sleep(float(args[0]))
+    elif command == "quit":
+        break
+"""
+
+# records the calls, the session container is running if RUNNING is set and
+# does not exist if MISSING is set
+FAKE_DOCKER = """#!/bin/sh
+echo "$@" >> "$(dirname "$0")/calls.txt"
+if [ "$1" = inspect ]; then
+    [ -n "$RUNNING" ] && echo true
+    [ -n "$RUNNING" ]
+elif [ "$1" = rm ]; then
+    [ -z "$MISSING" ]
+fi
+"""
+
+
+@pytest.fixture()
+def session():
+    with CliSession([sys.executable, "-c", FAKE_CLI]) as session:
+        session.wait_for_prompt(5)
+        yield session
+
+
+def test_parse_script():
+    script = io.StringIO("# seed\nset Vehicle.Speed 10\n\n  get Vehicle.Speed  \n")
+
+    assert parse_script(script) == ["set Vehicle.Speed 10", "get Vehicle.Speed"]
+
+
+def test_run_batch__runs_commands_in_one_session(session):
+    out = io.StringIO()
+    commands = [f"set Vehicle.Speed {speed}" for speed in range(50)]
+
+    results = run_batch(session, commands + ["get Vehicle.Speed"], 5, out)
+
+    assert [result.command for result in results[:2]] == commands[:2]
+    assert results[0].output == "[set]  OK"
+    assert results[-1].output == "[get]  OK\nVehicle.Speed: 49"
+    assert all(result.latency_sec > 0 for result in results)
+    assert out.getvalue().startswith("> set Vehicle.Speed 0 (")
+    assert get_summary(results).startswith("51 commands in ")
+
+
+def test_drain__skips_prompts_of_queued_input():
+    with CliSession([sys.executable, "-c", FAKE_CLI]) as session:
+        # like attaching to a CLI which did not prompt yet
+        session.run("", 5)
+        session.drain(0.3)
+
+        result = session.run("get Vehicle.Speed", 5)
+
+    assert result.output == "[get]  OK\nVehicle.Speed: NotAvailable"
+
+
+def test_run__timeout(session):
+    with pytest.raises(RuntimeError, match="Timeout reached after 0.2 seconds"):
+        session.run("sleep 1", 0.2)
+
+
+def test_run__terminated(session):
+    with pytest.raises(RuntimeError, match="unexpectedly terminated"):
+        session.run("quit", 5)
+
+
+def test_start_session(tmp_path, monkeypatch):
+    docker = tmp_path / "docker"
+    docker.write_text(FAKE_DOCKER)
+    docker.chmod(0o755)
+
+    assert start_session(str(docker), "cli:latest")
+    monkeypatch.setenv("RUNNING", "1")
+    assert not start_session(str(docker), "cli:latest")
+
+    assert (tmp_path / "calls.txt").read_text().splitlines() == [
+        "inspect --format {{.State.Running}} vehicledatabroker-cli",
+        "rm --force vehicledatabroker-cli",
+        "run -dit --name vehicledatabroker-cli --network host cli:latest",
+        "inspect --format {{.State.Running}} vehicledatabroker-cli",
+    ]
+
+
+def test_stop_session(tmp_path, monkeypatch):
+    docker = tmp_path / "docker"
+    docker.write_text(FAKE_DOCKER)
+    docker.chmod(0o755)
+
+    assert stop_session(str(docker))
+    monkeypatch.setenv("MISSING", "1")
+    assert not stop_session(str(docker))
+
+    assert (tmp_path / "calls.txt").read_text().splitlines() == [
+        "rm --force vehicledatabroker-cli",
+        "rm --force vehicledatabroker-cli",
+    ]
@@ -0,0 +1,83 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import sys
+from threading import Timer
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import file_watcher  # noqa: E402
+from file_watcher import FileWatcher  # noqa: E402
+
+
+@pytest.fixture(params=["inotify", "polling"])
+def watcher(request, tmp_path, monkeypatch):
+    if request.param == "polling":
+        monkeypatch.setattr(file_watcher, "POLL_INTERVAL_SEC", 0.05)
+
+        def init_inotify(_):
+            raise OSError("no inotify")
+
+        monkeypatch.setattr(FileWatcher, "_init_inotify", init_inotify)
+    (tmp_path / "app").mkdir()
+    (tmp_path / "app" / "main.py").write_text("")
+    with FileWatcher([str(tmp_path)]) as watcher:
+        yield watcher
+
+
+def test_read_changes__nothing_changed__timeout(watcher):
+    assert watcher.read_changes(0.1) == set()
+
+
+def test_read_changes__file_modified(watcher, tmp_path):
+    (tmp_path / "app" / "main.py").write_text("print()")
+
+    assert str(tmp_path / "app" / "main.py") in watcher.read_changes(1)
+
+
+def test_read_changes__file_in_new_directory(watcher, tmp_path):
+    (tmp_path / "app" / "vehicle").mkdir()
+    watcher.wait_for_changes(0.1, 1)
+
+    (tmp_path / "app" / "vehicle" / "seat.py").write_text("")
+
+    assert str(tmp_path / "app" / "vehicle" / "seat.py") in watcher.read_changes(1)
+
+
+def test_read_changes__ignored_files(watcher, tmp_path):
+    (tmp_path / "app" / "__pycache__").mkdir()
+    (tmp_path / "app" / "__pycache__" / "main.cpython-311.pyc").write_text("")
+    (tmp_path / "app" / ".main.py.swp").write_text("")
+
+    assert watcher.read_changes(0.2) == set()
+
+
+def test_wait_for_changes__burst__collected(watcher, tmp_path):
+    timers = [
+        Timer(delay, (tmp_path / "app" / f"{delay}.py").write_text, [""])
+        for delay in (0.0, 0.1, 0.2)
+    ]
+    for timer in timers:
+        timer.start()
+
+    changes = watcher.wait_for_changes(0.3, 1)
+
+    assert {os.path.basename(path) for path in changes} == {
+        "0.0.py",
+        "0.1.py",
+        "0.2.py",
+    }
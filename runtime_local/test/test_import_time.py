@@ -0,0 +1,89 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import re
+import subprocess
+import sys
+from typing import Dict
+
+import pytest
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+\d+ \| +(\S+)")
+# imported by every command, but not part of this package
+BASELINE_IMPORTS = "import velocitas_lib.services"
+# only needed if stdout is a TTY, by the asyncio API, on log rotation
+# respectively if the resources are sampled
+DEFERRED_MODULES = ["yaspin", "asyncio", "gzip", "resource_sampler"]
+RUNS = 5
+
+
+def get_import_times(code: str, pycache_dir: str) -> Dict[str, int]:
+    """Return the self import time [in us] of each module imported by the
+    given code, measured with 'python -X importtime'."""
+    env = {
+        name: value
+        for name, value in os.environ.items()
+        if name != "PYTHONDONTWRITEBYTECODE"
+    }
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-X",
+            f"pycache_prefix={pycache_dir}",
+            "-c",
+            code,
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+    return {
+        match.group(2): int(match.group(1))
+        for match in map(IMPORT_TIME_LINE.match, result.stderr.splitlines())
+        if match
+    }
+
+
+@pytest.mark.parametrize(
+    "command, budget_ms",
+    [
+        ("runtime-up", 30),
+        ("runtime-down", 30),
+        ("run_service", 30),
+        ("runtime-daemon", 30),
+        ("run-vehicle-app", 15),
+        ("run-vehicledatabroker-cli", 15),
+    ],
+)
+def test_import_time__within_budget(tmp_path, command, budget_ms):
+    code = f"import sys; sys.path.insert(0, {SRC_DIR!r}); __import__({command!r})"
+    # the first runs populate the bytecode cache, like for installed packages
+    baseline = get_import_times(BASELINE_IMPORTS, str(tmp_path))
+    get_import_times(code, str(tmp_path))
+
+    import_times = [get_import_times(code, str(tmp_path)) for _ in range(RUNS)]
+
+    assert command in import_times[0]
+    for module in DEFERRED_MODULES:
+        assert module not in import_times[0]
+    own_import_ms = min(
+        sum(time for module, time in times.items() if module not in baseline) / 1000
+        for times in import_times
+    )
+    assert own_import_ms <= budget_ms
@@ -0,0 +1,80 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import sys
+import time
+from re import compile
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from local_lib import spawn_process  # noqa: E402
+
+
+def spawn_shell(tmp_path, script, patterns, startup_timeout_sec=5):
+    log = open(tmp_path / "service.log", "w", encoding="utf-8")
+    return spawn_process(
+        ["sh", "-c", script],
+        log,
+        [compile(pattern) for pattern in patterns],
+        startup_timeout_sec,
+    )
+
+
+def wait_for_log(tmp_path, text, timeout_sec=5):
+    deadline = time.monotonic() + timeout_sec
+    while time.monotonic() < deadline:
+        content = (tmp_path / "service.log").read_text(encoding="utf-8")
+        if text in content:
+            return content
+        time.sleep(0.01)
+    raise AssertionError(f"{text!r} not found in log")
+
+
+def test_spawn_process__patterns_match__returns_running_process(tmp_path):
+    process = spawn_shell(
+        tmp_path,
+        "echo 'listening'; echo 'mosquitto version 2.0.14 running'; sleep 5",
+        [r".*listening", r".*mosquitto version \d+\.\d+\.\d+ running\n"],
+    )
+
+    assert process.poll() is None
+    process.kill()
+    process.wait()
+
+
+def test_spawn_process__output_after_startup__is_drained_into_log(tmp_path):
+    process = spawn_shell(
+        tmp_path,
+        "echo started; sleep 0.1; seq 1 100000; echo done; sleep 5",
+        [r"started"],
+    )
+
+    wait_for_log(tmp_path, "done")
+    process.kill()
+    process.wait()
+
+
+def test_spawn_process__process_terminates__raises(tmp_path):
+    with pytest.raises(RuntimeError, match="unexpectedly terminated"):
+        spawn_shell(tmp_path, "echo failed", [r"started"])
+
+    wait_for_log(tmp_path, "failed")
+
+
+def test_spawn_process__timeout__raises(tmp_path):
+    with pytest.raises(RuntimeError, match="Timeout reached after 1 seconds"):
+        spawn_shell(tmp_path, "sleep 5", [r"started"], startup_timeout_sec=1)
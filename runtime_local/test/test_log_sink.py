@@ -0,0 +1,108 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import gzip
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from log_sink import RotatingLogSink, create_log_sink, get_log_tail  # noqa: E402
+
+
+@pytest.fixture()
+def runtime_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("VELOCITAS_WORKSPACE_DIR", str(tmp_path))
+    monkeypatch.setenv("logMaxSizeMb", "1")
+
+
+def test_rotating_log_sink__rotates_and_compresses_segments(tmp_path):
+    path = str(tmp_path / "service.log")
+    sink = RotatingLogSink(path, max_bytes=10, backup_count=2)
+
+    for index in range(4):
+        sink.write(f"line {index}\n")
+        sink.wait_for_compression()
+    sink.close()
+
+    assert (tmp_path / "service.log").read_text() == "line 3\n"
+    with gzip.open(f"{path}.1.gz", "rt") as segment:
+        assert segment.read() == "line 2\n"
+    with gzip.open(f"{path}.2.gz", "rt") as segment:
+        assert segment.read() == "line 1\n"
+    assert sorted(os.listdir(tmp_path)) == [
+        "service.log",
+        "service.log.1.gz",
+        "service.log.2.gz",
+    ]
+
+
+def test_rotating_log_sink__rotates_by_age(tmp_path):
+    sink = RotatingLogSink(str(tmp_path / "service.log"), max_bytes=0, max_age_sec=0)
+
+    sink.write("first\n")
+    sink.write("second\n")
+    sink.wait_for_compression()
+    sink.close()
+
+    assert (tmp_path / "service.log").read_text() == "second\n"
+    assert (tmp_path / "service.log.1.gz").exists()
+
+
+def test_rotating_log_sink__tail__keeps_last_lines_after_close(tmp_path):
+    sink = RotatingLogSink(str(tmp_path / "service.log"), max_bytes=0, tail_lines=2)
+
+    sink.write("one\ntwo\nth")
+    sink.write("ree\nfour")
+    sink.close()
+
+    assert sink.tail() == ["three\n", "four"]
+
+
+def test_rotating_log_sink__append__keeps_log_and_segments(tmp_path):
+    path = str(tmp_path / "service.log")
+    sink = RotatingLogSink(path, max_bytes=10, backup_count=2)
+    sink.write("line 0\n")
+    sink.write("line 1\n")
+    sink.wait_for_compression()
+    sink.close()
+
+    sink = RotatingLogSink(path, max_bytes=100, backup_count=2, append=True)
+    sink.write("restarted\n")
+    sink.close()
+
+    assert (tmp_path / "service.log").read_text() == "line 1\nrestarted\n"
+    with gzip.open(f"{path}.1.gz", "rt") as segment:
+        assert segment.read() == "line 0\n"
+    assert sink.tail() == ["line 1\n", "restarted\n"]
+
+
+def test_get_log_tail__without_sink__reads_end_of_log_file(runtime_env, tmp_path):
+    log_dir = tmp_path / "logs" / "runtime_local"
+    log_dir.mkdir(parents=True)
+    (log_dir / "other.log").write_text("".join(f"{i}\n" for i in range(1000)))
+
+    assert get_log_tail("other", "runtime_local") == [
+        f"{i}\n" for i in range(900, 1000)
+    ]
+
+
+def test_create_log_sink__tail_is_reported(runtime_env):
+    sink = create_log_sink("service", "runtime_local")
+    sink.write("started\n")
+    sink.close()
+
+    assert get_log_tail("service", "runtime_local") == ["started\n"]
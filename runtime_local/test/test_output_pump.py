@@ -0,0 +1,67 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import sys
+import threading
+from typing import List
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from output_pump import OutputPump  # noqa: E402
+
+
+def open_pipe():
+    read_fd, write_fd = os.pipe()
+    return os.fdopen(read_fd, "rb"), write_fd
+
+
+def test_output_pump__forwards_chunks_until_eof():
+    pump = OutputPump()
+    stream, write_fd = open_pipe()
+    chunks: List[bytes] = []
+    closed = threading.Event()
+
+    pump.register(stream, chunks.append, closed.set)
+    os.write(write_fd, b"hello")
+    os.close(write_fd)
+
+    assert closed.wait(5)
+    assert b"".join(chunks) == b"hello"
+    assert stream.closed
+
+
+def test_output_pump__failing_callback__only_detaches_its_stream(capsys):
+    pump = OutputPump()
+    failing_stream, failing_fd = open_pipe()
+    stream, write_fd = open_pipe()
+    failing_closed = threading.Event()
+    chunks: List[bytes] = []
+    closed = threading.Event()
+
+    def fail(_chunk):
+        raise ValueError("boom")
+
+    pump.register(failing_stream, fail, failing_closed.set)
+    pump.register(stream, chunks.append, closed.set)
+    os.write(failing_fd, b"first")
+    assert failing_closed.wait(5)
+    os.write(write_fd, b"second")
+    os.close(write_fd)
+
+    assert closed.wait(5)
+    assert chunks == [b"second"]
+    assert failing_stream.closed
+    assert "ValueError: boom" in capsys.readouterr().err
+    os.close(failing_fd)
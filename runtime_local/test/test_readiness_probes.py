@@ -0,0 +1,195 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import asyncio
+import json
+import os
+import socket
+import sys
+from threading import Thread
+from typing import List
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from readiness_probes import (  # noqa: E402
+    GRPC_HEALTH_CHECK_PATH,
+    HTTP2_HEADERS,
+    HTTP2_PREFACE,
+    HTTP2_SETTINGS,
+    ReadinessProbe,
+    get_readiness_probes,
+    http2_frame,
+    run_probe,
+    wait_until_ready,
+    wait_until_ready_async,
+)
+from velocitas_lib.services import get_services  # noqa: E402
+
+
+def serve_once(reply) -> int:
+    """Accept a single connection on a free local port and answer it."""
+    server = socket.create_server(("127.0.0.1", 0))
+
+    def handle():
+        with server:
+            connection, _ = server.accept()
+            with connection:
+                reply(connection)
+
+    Thread(target=handle, daemon=True).start()
+    return server.getsockname()[1]
+
+
+def free_port() -> int:
+    with socket.create_server(("127.0.0.1", 0)) as server:
+        return server.getsockname()[1]
+
+
+@pytest.fixture()
+def runtime_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("VELOCITAS_PACKAGE_DIR", str(tmp_path))
+    monkeypatch.setenv("VELOCITAS_WORKSPACE_DIR", str(tmp_path))
+    monkeypatch.setenv("VELOCITAS_CACHE_DATA", "{}")
+    monkeypatch.setenv("runtimeFilePath", "runtime.json")
+
+    def create_service(interfaces, *config):
+        spec = {
+            "id": "service",
+            "interfaces": interfaces,
+            "config": [{"key": "image", "value": "service:latest"}]
+            + [{"key": key, "value": value} for key, value in config],
+        }
+        with open(tmp_path / "runtime.json", "w", encoding="utf-8") as runtime_file:
+            json.dump([spec], runtime_file)
+        return get_services(verbose=False)[0]
+
+    return create_service
+
+
+def test_get_readiness_probes__defaults_to_first_port(runtime_env):
+    service = runtime_env(
+        ["grpc://sdv.databroker.v1.Broker/GetDatapoints"],
+        ("port", "55555"),
+        ("port", "9001"),
+        ("readiness-probe", "grpc"),
+        ("readiness-probe", "tcp:9001"),
+    )
+
+    assert get_readiness_probes(service) == [
+        ReadinessProbe("grpc", 55555, "/sdv.databroker.v1.Broker/GetDatapoints"),
+        ReadinessProbe("tcp", 9001),
+    ]
+
+
+def test_get_readiness_probes__grpc_without_interface__uses_health_check(
+    runtime_env,
+):
+    service = runtime_env([], ("port", "50051"), ("readiness-probe", "grpc"))
+
+    assert get_readiness_probes(service)[0].path == GRPC_HEALTH_CHECK_PATH
+
+
+def test_get_readiness_probes__invalid__raises(runtime_env):
+    with pytest.raises(ValueError):
+        get_readiness_probes(runtime_env([], ("readiness-probe", "http")))
+    with pytest.raises(ValueError):
+        get_readiness_probes(runtime_env([], ("readiness-probe", "tcp")))
+
+
+def test_run_probe__tcp():
+    port = serve_once(lambda _: None)
+
+    assert run_probe(ReadinessProbe("tcp", port))
+    assert not run_probe(ReadinessProbe("tcp", free_port()))
+
+
+@pytest.mark.parametrize("return_code, expected", [(0, True), (5, False)])
+def test_run_probe__mqtt__checks_connack(return_code, expected):
+    def reply(connection: socket.socket):
+        connection.recv(1024)
+        connection.sendall(bytes([0x20, 0x02, 0x00, return_code]))
+
+    port = serve_once(reply)
+
+    assert run_probe(ReadinessProbe("mqtt", port)) is expected
+
+
+def test_run_probe__grpc__succeeds_on_response_headers():
+    received: List[bytes] = []
+
+    def reply(connection: socket.socket):
+        received.append(connection.recv(len(HTTP2_PREFACE)))
+        connection.sendall(
+            http2_frame(HTTP2_SETTINGS, 0, 0, b"")
+            + http2_frame(HTTP2_HEADERS, 0x4, 1, b"\x88")
+        )
+        connection.recv(1024)
+
+    port = serve_once(reply)
+
+    assert run_probe(ReadinessProbe("grpc", port, GRPC_HEALTH_CHECK_PATH))
+    assert received == [HTTP2_PREFACE]
+
+
+def test_wait_until_ready__retries_with_backoff():
+    port = free_port()
+    delays: List[float] = []
+
+    def sleep(delay: float) -> bool:
+        delays.append(delay)
+        if len(delays) == 3:
+            listener = socket.create_server(("127.0.0.1", port))
+            Thread(target=listener.accept, daemon=True).start()
+        return False
+
+    assert wait_until_ready([ReadinessProbe("tcp", port)], 5, sleep)
+    assert len(delays) == 3
+    assert delays[0] < delays[2] <= 1.0
+
+
+def test_wait_until_ready__aborted_by_sleep():
+    assert not wait_until_ready([ReadinessProbe("tcp", free_port())], 5, lambda _: True)
+
+
+def test_wait_until_ready__timeout():
+    assert not wait_until_ready(
+        [ReadinessProbe("tcp", free_port())], 0.05, lambda _: False
+    )
+
+
+def test_wait_until_ready_async__succeeds_once_port_listens():
+    port = free_port()
+
+    async def wait() -> bool:
+        probing = asyncio.create_task(
+            wait_until_ready_async([ReadinessProbe("tcp", port)], 5, asyncio.Event())
+        )
+        await asyncio.sleep(0.1)
+        with socket.create_server(("127.0.0.1", port)):
+            return await probing
+
+    assert asyncio.run(wait())
+
+
+def test_wait_until_ready_async__aborted_by_event():
+    async def wait() -> bool:
+        abort = asyncio.Event()
+        asyncio.get_running_loop().call_later(0.1, abort.set)
+        return await wait_until_ready_async(
+            [ReadinessProbe("tcp", free_port())], 5, abort
+        )
+
+    assert not asyncio.run(wait())
@@ -0,0 +1,151 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import csv
+import errno
+import os
+import shutil
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import resource_sampler  # noqa: E402
+from resource_sampler import (  # noqa: E402
+    ResourceSampler,
+    get_cgroup_dir,
+    parse_cgroup_stats,
+)
+
+IO_STAT = "8:0 rbytes={} wbytes={} rios=1 wios=2 dbytes=0 dios=0\n"
+
+
+def write_cgroup(cgroup_dir, cpu_usec, memory_bytes, read_bytes=0, write_bytes=0):
+    cgroup_dir.mkdir(exist_ok=True)
+    (cgroup_dir / "cpu.stat").write_text(
+        f"usage_usec {cpu_usec}\nuser_usec {cpu_usec}\nsystem_usec 0\n"
+    )
+    (cgroup_dir / "memory.current").write_text(f"{memory_bytes}\n")
+    (cgroup_dir / "io.stat").write_text(IO_STAT.format(read_bytes, write_bytes))
+
+
+@pytest.fixture()
+def sampler(tmp_path, monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr(resource_sampler.time, "time", lambda: float(next(clock)))
+    cgroups = {"databroker": tmp_path / "databroker", "mosquitto": None}
+    write_cgroup(tmp_path / "databroker", 0, 100)
+
+    def locate_cgroup(service_id):
+        cgroup_dir = cgroups[service_id]
+        return None if cgroup_dir is None else str(cgroup_dir)
+
+    sampler = ResourceSampler(
+        ["databroker", "mosquitto"], capacity=3, locate_cgroup=locate_cgroup
+    )
+    yield sampler
+    sampler.stop()
+
+
+def test_parse_cgroup_stats():
+    io_stat = IO_STAT.format(10, 20) + IO_STAT.format(1, 2).replace("8:0", "8:16")
+
+    assert parse_cgroup_stats("usage_usec 5\nuser_usec 3\n", "42\n", io_stat) == (
+        5,
+        42,
+        11,
+        22,
+    )
+
+
+def test_get_cgroup_dir__own_process(monkeypatch, tmp_path):
+    monkeypatch.setattr(resource_sampler, "CGROUP_ROOT", str(tmp_path))
+    with open("/proc/self/cgroup", encoding="utf-8") as cgroup_file:
+        if not any(line.startswith("0::") for line in cgroup_file):
+            pytest.skip("no cgroup v2 hierarchy")
+
+    assert get_cgroup_dir(os.getpid()).startswith(str(tmp_path))
+    assert get_cgroup_dir(-1) is None
+
+
+def test_sample__reads_running_containers(sampler, tmp_path):
+    write_cgroup(tmp_path / "databroker", 1500, 2048, 10, 20)
+
+    assert [tuple(sample) for sample in sampler.sample()] == [
+        (0.0, "databroker", 1500, 2048, 10, 20)
+    ]
+
+
+def test_sample__container_restarted__cgroup_located_again(
+    sampler, tmp_path, monkeypatch
+):
+    sampler.sample()
+
+    def pread(*_):
+        raise OSError(errno.ENODEV, "No such device")
+
+    # reading the open files of a removed cgroup fails
+    with monkeypatch.context() as patch:
+        patch.setattr(resource_sampler.os, "pread", pread)
+        shutil.rmtree(tmp_path / "databroker")
+        assert sampler.sample() == []
+
+    write_cgroup(tmp_path / "databroker", 7, 1)
+    assert [sample.cpu_usec for sample in sampler.sample()] == [7]
+
+
+def test_get_peaks__rates_and_ring(sampler, tmp_path):
+    # 50 % CPU, then 200 %
+    for cpu_usec, memory_bytes, read_bytes in [
+        (0, 100, 0),
+        (500_000, 300, 1000),
+        (2_500_000, 200, 1500),
+        (2_600_000, 150, 1500),
+    ]:
+        write_cgroup(tmp_path / "databroker", cpu_usec, memory_bytes, read_bytes)
+        sampler.sample()
+
+    peaks = sampler.get_peaks()["databroker"]
+
+    # the first sample fell out of the ring
+    assert len(sampler.get_samples()) == 3
+    assert peaks.cpu_percent == pytest.approx(200)
+    assert peaks.memory_bytes == 300
+    assert peaks.io_read_bytes_per_sec == pytest.approx(500)
+    assert sampler.summary() == [
+        "databroker: CPU 200.0 %, memory 0.0 MiB, read 0.0 MiB/s, write 0.0 MiB/s"
+    ]
+
+
+def test_write_exports(sampler, tmp_path):
+    sampler.sample()
+    write_cgroup(tmp_path / "databroker", 1_000_000, 4096, 5, 6)
+    sampler.sample()
+
+    sampler.write_csv(str(tmp_path / "resources.csv"))
+    sampler.write_prometheus_textfile(str(tmp_path / "resources.prom"))
+
+    with open(tmp_path / "resources.csv", encoding="utf-8") as csv_file:
+        rows = list(csv.reader(csv_file))
+    assert rows[0][:3] == ["time", "service_id", "cpu_usec"]
+    assert rows[2] == ["1.0", "databroker", "1000000", "4096", "5", "6"]
+    textfile = (tmp_path / "resources.prom").read_text()
+    assert "# TYPE velocitas_service_cpu_usage_seconds_total counter\n" in textfile
+    assert 'velocitas_service_cpu_usage_seconds_total{service="databroker"} 1.0\n' in (
+        textfile
+    )
+    assert 'velocitas_service_memory_peak_bytes{service="databroker"} 4096\n' in (
+        textfile
+    )
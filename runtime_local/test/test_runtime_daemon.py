@@ -0,0 +1,173 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import os
+import subprocess
+import sys
+import time
+from threading import Event, Thread
+from typing import List
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import runtime_daemon  # noqa: E402
+from runtime_daemon import (  # noqa: E402
+    METHOD_NOT_FOUND,
+    DaemonError,
+    RuntimeDaemon,
+    call_daemon,
+    is_daemon_running,
+    serve,
+)
+from velocitas_lib.services import Service  # noqa: E402
+
+
+@pytest.fixture()
+def daemon(tmp_path, monkeypatch):
+    monkeypatch.setenv("VELOCITAS_PACKAGE_DIR", str(tmp_path))
+    monkeypatch.setenv("VELOCITAS_WORKSPACE_DIR", str(tmp_path))
+    monkeypatch.setenv("VELOCITAS_CACHE_DATA", "{}")
+    monkeypatch.setenv("runtimeFilePath", "runtime.json")
+    runtime = [
+        {"id": "broker", "config": [{"key": "image", "value": "broker"}]},
+        {
+            "id": "app",
+            "config": [
+                {"key": "image", "value": "app"},
+                {"key": "depends-on", "value": "broker"},
+            ],
+        },
+    ]
+    (tmp_path / "runtime.json").write_text(json.dumps(runtime))
+
+    stopped: List[str] = []
+
+    def stop_services(services: List[Service]) -> List[Service]:
+        stopped.extend(service.id for service in services)
+        return services
+
+    monkeypatch.setattr(
+        runtime_daemon,
+        "restart_service",
+        lambda _: subprocess.Popen(["sleep", "10"]),
+    )
+    monkeypatch.setattr(runtime_daemon, "stop_services", stop_services)
+
+    daemon = RuntimeDaemon(on_event=lambda _: None)
+    path = str(tmp_path / "daemon.sock")
+    ready = Event()
+    thread = Thread(target=serve, args=(daemon, path, ready.set))
+    thread.start()
+    ready.wait(5)
+
+    yield daemon, path, stopped
+
+    daemon.supervisor.shutdown()
+    thread.join(5)
+    daemon.close()
+
+
+def get_states(path: str):
+    status = call_daemon("status", path)
+    return {service["id"]: service["state"] for service in status["services"]}
+
+
+def test_daemon__start__starts_dependencies(daemon):
+    _, path, _ = daemon
+
+    assert call_daemon("start", path, services=["app"]) == {
+        "started": ["broker", "app"],
+        "running": [],
+    }
+    assert call_daemon("start", path) == {
+        "started": [],
+        "running": ["broker", "app"],
+    }
+    assert get_states(path) == {"broker": "running", "app": "running"}
+
+
+def test_daemon__stop__stops_without_restart(daemon):
+    _, path, stopped = daemon
+    call_daemon("start", path)
+
+    assert call_daemon("stop", path, services=["app"]) == {"stopped": ["app"]}
+    assert stopped == ["app"]
+    assert get_states(path) == {"broker": "running", "app": "stopped"}
+
+
+def test_daemon__errors(daemon):
+    _, path, _ = daemon
+
+    with pytest.raises(DaemonError) as error:
+        call_daemon("unknown", path)
+    assert error.value.code == METHOD_NOT_FOUND
+    with pytest.raises(DaemonError, match="Unknown services: other"):
+        call_daemon("start", path, services=["other"])
+
+
+def test_daemon__shutdown__stops_owned_services(daemon):
+    instance, path, stopped = daemon
+    call_daemon("start", path, services=["broker"])
+
+    call_daemon("shutdown", path)
+
+    assert instance.close() == ["broker"]
+    assert stopped == ["broker"]
+
+
+def test_daemon__manifest_program__serves(tmp_path):
+    package_dir = os.path.join(os.path.dirname(__file__), "..", "..")
+    with open(os.path.join(package_dir, "manifest.json"), encoding="utf-8") as file:
+        components = json.load(file)["components"]
+    program = next(
+        program
+        for component in components
+        if component["id"] == "runtime-local"
+        for program in component["programs"]
+        if program["id"] == "daemon"
+    )
+    (tmp_path / "runtime.json").write_text("[]")
+    docker = tmp_path / "docker"
+    docker.write_text("#!/bin/sh\n")
+    docker.chmod(0o755)
+    path = str(tmp_path / "daemon.sock")
+    env = {
+        **os.environ,
+        "PATH": f"{tmp_path}{os.pathsep}{os.environ['PATH']}",
+        "containerBackend": "cli",
+        "VELOCITAS_PACKAGE_DIR": str(tmp_path),
+        "VELOCITAS_WORKSPACE_DIR": str(tmp_path),
+        "VELOCITAS_CACHE_DATA": "{}",
+        "runtimeFilePath": "runtime.json",
+        "runtimeDaemonSocket": path,
+    }
+
+    process = subprocess.Popen(
+        [sys.executable, *program["args"]], cwd=package_dir, env=env
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while not is_daemon_running(path):
+            assert process.poll() is None
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        call_daemon("shutdown", path)
+        assert process.wait(10) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
@@ -0,0 +1,156 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import os
+import sys
+from typing import List
+
+import pytest
+import velocitas_lib.services
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import service_config  # noqa: E402
+from service_config import (  # noqa: E402
+    get_service_config_values,
+    get_service_port,
+    get_services,
+    get_specific_service,
+)
+from velocitas_lib.services import get_services as parse_services  # noqa: E402
+
+
+@pytest.fixture()
+def runtime_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("VELOCITAS_PACKAGE_DIR", str(tmp_path))
+    monkeypatch.setenv("VELOCITAS_WORKSPACE_DIR", str(tmp_path))
+    monkeypatch.setenv("VELOCITAS_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("VELOCITAS_CACHE_DATA", '{"vspec_file_path": "vss.json"}')
+    monkeypatch.setenv("runtimeFilePath", "runtime.json")
+    monkeypatch.setenv("brokerImage", "broker:1")
+    monkeypatch.setattr(service_config, "_resolved", None)
+    (tmp_path / "config.json").write_text("{}")
+
+    def write_runtime(*services):
+        (tmp_path / "runtime.json").write_text(json.dumps(list(services)))
+
+    write_runtime(
+        {
+            "id": "broker",
+            "config": [
+                {"key": "image", "value": "${{ brokerImage }}"},
+                {"key": "port", "value": "1883"},
+                {"key": "mount", "value": "$pathInWorkspaceOrPackage(config.json)"},
+                {"key": "depends-on", "value": "${{ builtin.cache.vspec_file_path }}"},
+            ],
+        },
+        {
+            "id": "disabled",
+            "config": [
+                {"key": "image", "value": "disabled"},
+                {"key": "enabled", "value": False},
+            ],
+        },
+    )
+    return write_runtime
+
+
+def forget_resolved(monkeypatch):
+    monkeypatch.setattr(service_config, "_resolved", None)
+
+
+def test_get_services__equals_velocitas_lib(runtime_env, tmp_path):
+    assert get_services(verbose=False) == parse_services(verbose=False)
+    assert get_specific_service("broker").config.mounts == [
+        str(tmp_path / "config.json")
+    ]
+    assert get_service_port("broker") == "1883"
+    assert get_service_config_values("broker", "depends-on") == ["vss.json"]
+    with pytest.raises(RuntimeError, match="'disabled' not defined"):
+        get_specific_service("disabled")
+
+
+def test_get_services__functions_resolved_once(runtime_env, monkeypatch):
+    calls: List[str] = []
+
+    def resolve_functions(value: str) -> str:
+        result = resolve(value)
+        if result != value:
+            calls.append(value)
+        return result
+
+    resolve = velocitas_lib.services.resolve_functions
+    monkeypatch.setattr(service_config, "resolve_functions", resolve_functions)
+    monkeypatch.setattr(velocitas_lib.services, "resolve_functions", resolve_functions)
+
+    get_services(verbose=False)
+
+    assert calls == ["$pathInWorkspaceOrPackage(config.json)"]
+
+
+def test_get_services__cached__not_resolved_again(runtime_env, monkeypatch):
+    services = get_services(verbose=False)
+    forget_resolved(monkeypatch)
+
+    def resolve(_):
+        raise AssertionError("resolved again")
+
+    monkeypatch.setattr(service_config, "_resolve", resolve)
+
+    assert get_services(verbose=False) == services
+
+
+def test_get_services__runtime_file_changed__resolved_again(runtime_env, monkeypatch):
+    get_services(verbose=False)
+
+    # same size, written right after the cache
+    runtime_env({"id": "broker", "config": [{"key": "image", "value": "broker:2"}]})
+    runtime_env({"id": "broker", "config": [{"key": "image", "value": "broker:3"}]})
+
+    assert get_specific_service("broker").config.image == "broker:3"
+
+
+@pytest.mark.parametrize(
+    "variable, value",
+    [("brokerImage", "broker:2"), ("VELOCITAS_CACHE_DATA", '{"vspec_file_path": 1}')],
+)
+def test_get_services__variable_changed__resolved_again(
+    runtime_env, monkeypatch, variable, value
+):
+    get_services(verbose=False)
+    forget_resolved(monkeypatch)
+
+    monkeypatch.setenv(variable, value)
+
+    assert get_services(verbose=False) == parse_services(verbose=False)
+    assert get_service_config_values("broker", "depends-on") == [
+        str(json.loads(os.environ["VELOCITAS_CACHE_DATA"])["vspec_file_path"])
+    ]
+
+
+def test_get_services__function_result_changed__resolved_again(
+    runtime_env, tmp_path, monkeypatch
+):
+    get_services(verbose=False)
+    workspace = tmp_path / "workspace"
+    workspace.mkdir()
+    (workspace / "config.json").write_text("{}")
+    (workspace / "runtime.json").write_text((tmp_path / "runtime.json").read_text())
+
+    monkeypatch.setenv("VELOCITAS_WORKSPACE_DIR", str(workspace))
+
+    assert get_specific_service("broker").config.mounts == [
+        str(workspace / "config.json")
+    ]
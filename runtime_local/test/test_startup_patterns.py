@@ -0,0 +1,74 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import re
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from startup_patterns import StartupPatternMatcher, get_required_literal  # noqa: E402
+
+
+def test_matcher__patterns_in_same_line__all_match():
+    first = re.compile("Listening on")
+    second = re.compile(r"port \d+")
+    matcher = StartupPatternMatcher([first, second])
+
+    assert matcher.feed_line("starting\n") == []
+    assert matcher.feed_line("Listening on port 55555\n") == [first, second]
+    assert matcher.is_done()
+
+
+def test_matcher__pattern_with_trailing_newline__matches_line():
+    mosquitto = re.compile(".*mosquitto version \\d+\\.\\d+\\.\\d+ running\n")
+    matcher = StartupPatternMatcher([mosquitto, re.compile("other")])
+
+    assert matcher.feed_line("1: mosquitto version 2.0.14 running") == []
+    assert matcher.feed_line("1: mosquitto version 2.0.14 running\n") == [mosquitto]
+
+
+def test_matcher__pattern_spanning_lines__matches_window():
+    pattern = re.compile(r"Config loaded\n.*Server started")
+    matcher = StartupPatternMatcher([pattern, re.compile("^ready")])
+
+    matcher.feed_line("Config loaded\n")
+    matcher.feed_line("INFO Server started\n")
+
+    assert matcher.remaining == [re.compile("^ready")]
+    assert matcher.feed_line("ready\n") == [re.compile("^ready")]
+
+
+def test_matcher__prefilter__keeps_flags_and_backreferences():
+    ignore_case = re.compile("READY", re.IGNORECASE)
+    inline_flags = re.compile("(?i)started")
+    backreference = re.compile(r"(\w+)=\1 set")
+    matcher = StartupPatternMatcher([ignore_case, inline_flags, backreference])
+
+    assert matcher.feed_line("Ready, started\n") == [ignore_case, inline_flags]
+    assert matcher.feed_line("a=b set\n") == []
+    assert matcher.feed_line("a=a set\n") == [backreference]
+
+
+def test_get_required_literal():
+    assert get_required_literal(re.compile(r".*mosquitto version \d+ running")) == (
+        "mosquitto version "
+    )
+    assert get_required_literal(re.compile("(foo|bar)baz")) == "baz"
+    assert get_required_literal(re.compile("foo|bar")) is None
+    assert get_required_literal(re.compile("foo", re.IGNORECASE)) is None
+    assert get_required_literal(re.compile(r"ab?cd\.ef+")) == "cd.e"
+    assert get_required_literal(re.compile(r"\x41bc \d{2} done")) == " done"
+    assert get_required_literal(re.compile(r"[]a-z]+ (started|up\))\] ok")) == "] ok"
+    assert get_required_literal(re.compile(r"^Server \[(.*)\] ready")) == "Server ["
@@ -0,0 +1,159 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from startup_scheduler import (  # noqa: E402
+    DependencyError,
+    ServiceStartupError,
+    build_dependency_graph,
+    start_services,
+)
+from velocitas_lib.services import get_services  # noqa: E402
+
+
+def create_runtime_file(tmp_path, services) -> None:
+    with open(tmp_path / "runtime.json", "w", encoding="utf-8") as runtime_file:
+        json.dump(services, runtime_file)
+
+
+def service_spec(service_id, *config):
+    return {
+        "id": service_id,
+        "config": [{"key": "image", "value": f"{service_id}:latest"}]
+        + [{"key": key, "value": value} for key, value in config],
+    }
+
+
+@pytest.fixture()
+def runtime_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("VELOCITAS_PACKAGE_DIR", str(tmp_path))
+    monkeypatch.setenv("VELOCITAS_WORKSPACE_DIR", str(tmp_path))
+    monkeypatch.setenv("VELOCITAS_CACHE_DATA", "{}")
+    monkeypatch.setenv("runtimeFilePath", "runtime.json")
+    create_runtime_file(
+        tmp_path,
+        [
+            service_spec("broker", ("port", "1883")),
+            service_spec("databroker", ("port", "55555")),
+            service_spec("feeder", ("env", "VDB_ADDRESS=127.0.0.1:55555")),
+            service_spec("app", ("depends-on", "broker, feeder")),
+        ],
+    )
+
+
+def test_build_dependency_graph__explicit_and_inferred(runtime_env):
+    graph = build_dependency_graph(get_services(verbose=False))
+
+    assert graph == {
+        "broker": set(),
+        "databroker": set(),
+        "feeder": {"databroker"},
+        "app": {"broker", "feeder"},
+    }
+
+
+def test_build_dependency_graph__cycle__raises(tmp_path, runtime_env):
+    create_runtime_file(
+        tmp_path,
+        [
+            service_spec("a", ("depends-on", "b")),
+            service_spec("b", ("depends-on", "a")),
+        ],
+    )
+
+    with pytest.raises(DependencyError, match="Cyclic"):
+        build_dependency_graph(get_services(verbose=False))
+
+
+def test_build_dependency_graph__unknown_dependency__raises(tmp_path, runtime_env):
+    create_runtime_file(tmp_path, [service_spec("a", ("depends-on", "foo"))])
+
+    with pytest.raises(DependencyError, match="foo"):
+        build_dependency_graph(get_services(verbose=False))
+
+
+def test_runtime_up__cycle__fails_without_traceback(tmp_path, runtime_env):
+    create_runtime_file(
+        tmp_path,
+        [
+            service_spec("a", ("depends-on", "b")),
+            service_spec("b", ("depends-on", "a")),
+        ],
+    )
+    script = os.path.join(os.path.dirname(__file__), "..", "src", "runtime-up.py")
+
+    result = subprocess.run(
+        [sys.executable, script],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        timeout=60,
+    )
+
+    assert result.returncode == 1
+    assert "Cyclic service dependencies: a, b" in result.stdout
+    assert "Traceback" not in result.stdout
+
+
+def test_start_services__independent_services_start_concurrently(runtime_env):
+    running = set()
+    max_parallel = 0
+    started = []
+    lock = threading.Lock()
+
+    def start(service):
+        nonlocal max_parallel
+        with lock:
+            running.add(service.id)
+            max_parallel = max(max_parallel, len(running))
+        time.sleep(0.05)
+        with lock:
+            running.remove(service.id)
+        return service.id
+
+    start_services(
+        get_services(verbose=False), start, lambda _, result: started.append(result)
+    )
+
+    assert max_parallel == 2
+    assert started.index("databroker") < started.index("feeder")
+    assert started.index("feeder") < started.index("app")
+    assert started.index("broker") < started.index("app")
+
+
+def test_start_services__failure__skips_dependents(runtime_env):
+    started = []
+
+    def start(service):
+        if service.id == "databroker":
+            raise RuntimeError("boom")
+        return service.id
+
+    with pytest.raises(ServiceStartupError) as error:
+        start_services(
+            get_services(verbose=False), start, lambda _, result: started.append(result)
+        )
+
+    assert error.value.service_id == "databroker"
+    assert started == ["broker"]
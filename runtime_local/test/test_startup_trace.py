@@ -0,0 +1,99 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import io
+import os
+import sys
+from re import compile
+from typing import List
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from local_lib import StartupMonitor  # noqa: E402
+from startup_trace import READY, StartupTrace  # noqa: E402
+
+
+def create_trace() -> StartupTrace:
+    """Trace of a broker (ready at 1 s), a databroker (ready at 2 s) and
+    an app depending on both (ready at 3.5 s)."""
+    trace = StartupTrace()
+    trace.origin = 100.0
+    trace.add_span("broker", "spawn", 100.0, 100.5)
+    trace.add_span("databroker", "spawn", 100.0, 101.5)
+    trace.add_span("app", "spawn", 102.0, 102.5)
+    trace.add_span("app", "startup", 102.5, 103.5)
+    trace.instant("broker", READY, at=101.0)
+    trace.instant("databroker", READY, at=102.0)
+    trace.instant("app", READY, at=103.5)
+    return trace
+
+
+GRAPH = {"broker": set(), "databroker": set(), "app": {"broker", "databroker"}}
+
+
+def test_get_critical_path__follows_latest_dependencies():
+    assert create_trace().get_critical_path(GRAPH) == ["databroker", "app"]
+
+
+def test_summary():
+    assert create_trace().summary(GRAPH) == [
+        "Time to ready: 3.50 s, critical path:",
+        "  databroker: +2.00 s (spawn 1.50 s)",
+        "  app: +1.50 s (spawn 0.50 s, startup 1.00 s)",
+    ]
+
+
+def test_to_chrome_trace():
+    events = create_trace().to_chrome_trace()["traceEvents"]
+
+    assert events[0] == {
+        "name": "thread_name",
+        "ph": "M",
+        "pid": 1,
+        "tid": 1,
+        "args": {"name": "broker"},
+    }
+    assert events[1] == {
+        "name": "spawn",
+        "cat": "startup",
+        "pid": 1,
+        "tid": 1,
+        "ts": 0,
+        "ph": "X",
+        "dur": 500000,
+    }
+    assert {
+        "name": READY,
+        "cat": "startup",
+        "pid": 1,
+        "tid": 3,
+        "ts": 3500000,
+        "ph": "i",
+        "s": "t",
+    } in events
+
+
+def test_startup_monitor__reports_first_output_and_matches():
+    events: List[str] = []
+    monitor = StartupMonitor(
+        io.TextIOWrapper(io.BytesIO()),
+        [compile("foo"), compile("bar")],
+        events.append,
+    )
+
+    monitor.feed(b"starting\nfoo")
+    monitor.feed(b"bar\n")
+
+    assert events == ["first output", "matched 'foo'", "matched 'bar'"]
+    assert monitor.is_started()
@@ -0,0 +1,181 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import List
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import local_lib  # noqa: E402
+import supervisor as supervisor_module  # noqa: E402
+from supervisor import RestartPolicy, Supervisor, get_restart_policy  # noqa: E402
+from velocitas_lib.services import Service, get_services  # noqa: E402
+
+
+@pytest.fixture()
+def runtime_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("VELOCITAS_PACKAGE_DIR", str(tmp_path))
+    monkeypatch.setenv("VELOCITAS_WORKSPACE_DIR", str(tmp_path))
+    monkeypatch.setenv("VELOCITAS_CACHE_DATA", "{}")
+    monkeypatch.setenv("runtimeFilePath", "runtime.json")
+
+    def create_service(*config) -> Service:
+        spec = {
+            "id": "service",
+            "config": [{"key": "image", "value": "service:latest"}]
+            + [{"key": key, "value": value} for key, value in config],
+        }
+        with open(tmp_path / "runtime.json", "w", encoding="utf-8") as runtime_file:
+            json.dump([spec], runtime_file)
+        return get_services(verbose=False)[0]
+
+    return create_service
+
+
+def spawn(script: str) -> subprocess.Popen:
+    return subprocess.Popen(["sh", "-c", script])
+
+
+def test_get_restart_policy(runtime_env):
+    assert get_restart_policy(runtime_env()) == RestartPolicy()
+    assert get_restart_policy(runtime_env(("restart", "never"))) == RestartPolicy()
+    assert get_restart_policy(runtime_env(("restart", "on-failure:3"))) == (
+        RestartPolicy(True, 3)
+    )
+    with pytest.raises(ValueError):
+        get_restart_policy(runtime_env(("restart", "always")))
+
+
+def test_supervisor__crashed_service__is_restarted_until_max_retries(runtime_env):
+    service = runtime_env(("restart", "on-failure:2"))
+    restarts: List[float] = []
+
+    def restart(_service: Service) -> subprocess.Popen:
+        restarts.append(time.monotonic())
+        return spawn("exit 1")
+
+    supervisor = Supervisor(restart)
+    crashed = time.monotonic()
+    supervisor.supervise(service, spawn("exit 1"))
+    supervisor.run()
+
+    assert len(restarts) == 2
+    assert restarts[0] - crashed < 0.5
+    assert supervisor.processes == {}
+
+
+def test_supervisor__stable_restart__resets_retries(runtime_env, monkeypatch):
+    monkeypatch.setattr(supervisor_module, "RESTART_RESET_AFTER_SEC", 0.2)
+    service = runtime_env(("restart", "on-failure:1"))
+    restarts: List[float] = []
+
+    def restart(_service: Service) -> subprocess.Popen:
+        restarts.append(time.monotonic())
+        # crashes after running stable, until the third restart
+        return spawn("sleep 0.3; exit 1" if len(restarts) < 3 else "exit 0")
+
+    supervisor = Supervisor(restart)
+    supervisor.supervise(service, spawn("exit 1"))
+    supervisor.run()
+
+    assert len(restarts) == 3
+
+
+def test_supervisor__successful_exit__is_not_restarted(runtime_env):
+    service = runtime_env(("restart", "on-failure"))
+    events: List[str] = []
+
+    supervisor = Supervisor(lambda _: pytest.fail("restarted"), events.append)
+    supervisor.supervise(service, spawn("exit 0"))
+    supervisor.run()
+
+    assert events == ["service exited with code 0"]
+
+
+def test_supervisor__failed_restart__is_retried(runtime_env):
+    service = runtime_env(("restart", "on-failure:2"))
+    attempts: List[int] = []
+
+    def restart(_service: Service) -> subprocess.Popen:
+        attempts.append(len(attempts))
+        if len(attempts) == 1:
+            raise RuntimeError("Service unexpectedly terminated")
+        return spawn("exit 0")
+
+    supervisor = Supervisor(restart)
+    supervisor.supervise(service, spawn("exit 1"))
+    supervisor.run()
+
+    assert attempts == [0, 1]
+
+
+def test_supervisor__shutdown__stops_supervising(runtime_env):
+    service = runtime_env()
+    process = spawn("sleep 10")
+    supervisor = Supervisor(lambda _: pytest.fail("restarted"))
+    supervisor.supervise(service, process)
+
+    threading.Timer(0.1, supervisor.shutdown).start()
+    supervisor.run()
+
+    assert supervisor.processes == {"service": (service, process)}
+    process.kill()
+    process.wait()
+
+
+def test_supervisor__release__stops_supervising_without_restart(runtime_env):
+    service = runtime_env(("restart", "on-failure"))
+    process = spawn("sleep 10")
+    supervisor = Supervisor(lambda _: pytest.fail("restarted"))
+    thread = threading.Thread(target=supervisor.run, kwargs={"until_idle": False})
+    thread.start()
+    supervisor.supervise_threadsafe(service, process)
+
+    assert supervisor.release("service").result(5) is process
+    process.kill()
+    process.wait()
+    assert supervisor.get_states() == {}
+
+    supervisor.shutdown()
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_supervise_services__shutdown__terminates_services(runtime_env, monkeypatch):
+    stopped: List[str] = []
+    monkeypatch.setattr(
+        local_lib, "stop_container", lambda service_id, _: stopped.append(service_id)
+    )
+    service = runtime_env()
+    process = spawn("sleep 10")
+    supervisor = local_lib.create_supervisor()
+    supervisor.supervise(service, process)
+    polled_on_stop: List[object] = []
+
+    threading.Timer(0.1, supervisor.shutdown).start()
+    local_lib.supervise_services(
+        supervisor, False, on_stopped=lambda: polled_on_stop.append(process.poll())
+    )
+
+    assert polled_on_stop == [None]
+    assert stopped == ["service"]
+    assert process.wait(5) is not None
+    assert supervisor.processes == {}
@@ -0,0 +1,195 @@
+# Copyright (c) 2024 Contributors to the Eclipse Foundation
+#
+# This program and the accompanying materials are made available under the
+# terms of the Apache License, Version 2.0 which is available at
+# https://www.apache.org/licenses/LICENSE-2.0.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import vss_subset  # noqa: E402
+from vss_subset import (  # noqa: E402
+    apply_vss_subset,
+    get_databroker_vspec_file,
+    get_required_datapoints,
+    subset_vss,
+)
+from velocitas_lib.services import Service, ServiceSpecConfig  # noqa: E402
+
+
+def branch(**children):
+    return {"type": "branch", "description": "", "children": children}
+
+
+def sensor(datatype="float"):
+    return {"type": "sensor", "datatype": datatype, "description": ""}
+
+
+VSS = {
+    "Vehicle": branch(
+        Speed=sensor(),
+        Cabin=branch(
+            Door=branch(IsOpen=sensor("boolean"), IsLocked=sensor("boolean")),
+            Light=branch(IsOn=sensor("boolean")),
+        ),
+        Powertrain=branch(Range=sensor("uint32")),
+    )
+}
+
+
+@pytest.fixture()
+def vspec_file(tmp_path, monkeypatch):
+    path = tmp_path / "vss.json"
+    path.write_text(json.dumps(VSS))
+    monkeypatch.setenv("VELOCITAS_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv(
+        "VELOCITAS_CACHE_DATA", json.dumps({"vspec_file_path": str(path)})
+    )
+    monkeypatch.setenv("vssSubsetEnabled", "true")
+
+    def set_required(*paths):
+        manifest = {
+            "manifestVersion": "v3",
+            "interfaces": [
+                {
+                    "type": "vehicle-signal-interface",
+                    "config": {
+                        "datapoints": {"required": [{"path": path} for path in paths]}
+                    },
+                }
+            ],
+        }
+        monkeypatch.setenv("VELOCITAS_APP_MANIFEST", json.dumps(manifest))
+
+    set_required("Vehicle.Speed")
+    return str(path), set_required
+
+
+def test_get_required_datapoints():
+    manifest = {
+        "interfaces": [
+            {"type": "pubsub", "config": {}},
+            {
+                "type": "vehicle-signal-interface",
+                "config": {
+                    "datapoints": {
+                        "required": [
+                            {"path": "Vehicle.Speed", "access": "read"},
+                            {"path": "Vehicle.Speed", "access": "write"},
+                        ]
+                    }
+                },
+            },
+        ],
+        "vehicleModel": {"datapoints": [{"path": "Vehicle.Cabin"}]},
+    }
+
+    assert get_required_datapoints(manifest) == ["Vehicle.Speed", "Vehicle.Cabin"]
+
+
+def test_subset_vss__keeps_ancestors_and_whole_branches():
+    subset, missing = subset_vss(
+        VSS, ["Vehicle.Cabin.Door.IsOpen", "Vehicle.Cabin", "Vehicle.Speed"]
+    )
+
+    assert missing == []
+    assert subset == {
+        "Vehicle": {
+            "type": "branch",
+            "description": "",
+            "children": {
+                "Cabin": VSS["Vehicle"]["children"]["Cabin"],
+                "Speed": sensor(),
+            },
+        }
+    }
+    # the source tree is left untouched
+    assert "Powertrain" in VSS["Vehicle"]["children"]
+
+
+def test_subset_vss__prunes_siblings():
+    subset, _ = subset_vss(VSS, ["Vehicle.Cabin.Door.IsOpen"])
+
+    door = subset["Vehicle"]["children"]["Cabin"]["children"]
+    assert list(door) == ["Door"]
+    assert list(door["Door"]["children"]) == ["IsOpen"]
+
+
+def test_subset_vss__missing_paths():
+    _, missing = subset_vss(VSS, ["Vehicle.Speed", "Vehicle.Cabin.Seat.Position"])
+
+    assert missing == ["Vehicle.Cabin.Seat.Position"]
+
+
+def test_get_databroker_vspec_file__writes_subset_once(vspec_file, monkeypatch):
+    path, _ = vspec_file
+
+    subset_path = get_databroker_vspec_file()
+
+    assert subset_path != path
+    with open(subset_path, encoding="utf-8") as subset_file:
+        assert list(json.load(subset_file)["Vehicle"]["children"]) == ["Speed"]
+    monkeypatch.setattr(vss_subset, "subset_vss", None)
+    assert get_databroker_vspec_file() == subset_path
+
+
+def test_get_databroker_vspec_file__changed_datapoints(vspec_file):
+    _, set_required = vspec_file
+    subset_path = get_databroker_vspec_file()
+
+    set_required("Vehicle.Powertrain.Range")
+
+    assert get_databroker_vspec_file() != subset_path
+
+
+def test_get_databroker_vspec_file__falls_back_to_whole_vss(vspec_file, monkeypatch):
+    path, set_required = vspec_file
+
+    set_required("Vehicle.Speed", "Vehicle.Unknown")
+    assert get_databroker_vspec_file() == path
+    set_required()
+    assert get_databroker_vspec_file() == path
+    set_required("Vehicle.Speed")
+    monkeypatch.setenv("vssSubsetEnabled", "false")
+    assert get_databroker_vspec_file() == path
+
+
+def test_apply_vss_subset__replaces_vspec_file_of_services(vspec_file):
+    path, _ = vspec_file
+    cache_data = os.environ["VELOCITAS_CACHE_DATA"]
+    databroker = Service(
+        "databroker",
+        ServiceSpecConfig(
+            "databroker",
+            env_vars={"KUKSA_DATABROKER_METADATA_FILE": path, "EMPTY": None},
+            args=["--metadata", path],
+            mounts=[f"{path}:{path}:ro"],
+        ),
+    )
+    broker = Service("broker", ServiceSpecConfig("broker", mounts=["/a:/b"]))
+
+    services = apply_vss_subset([databroker, broker])
+
+    subset_path = get_databroker_vspec_file()
+    assert services[0].config.env_vars == {
+        "KUKSA_DATABROKER_METADATA_FILE": subset_path,
+        "EMPTY": None,
+    }
+    assert services[0].config.args == ["--metadata", subset_path]
+    assert services[0].config.mounts == [f"{subset_path}:{subset_path}:ro"]
+    assert services[1] == broker
+    assert os.environ["VELOCITAS_CACHE_DATA"] == cache_data